@@ -8,17 +8,22 @@
 import os
 import json
 import sys
+import time
+import itertools
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple
 
 # 添加src目录到Python路径
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from src.utils import load_config, setup_logging
-from scripts.parse_pdfs import PDFParser
-from scripts.extract_terms import TermExtractor
-from scripts.associate_terms import TermAssociator
-from scripts.validate_output import OutputValidator
+from src.utils import load_config, setup_logging, save_json_output
+from src.metrics import metrics
+from src.profiling import StageProfiler
+from src.cache import ResultCache, corpus_version, rules_version
+
+# 解析、抽取、关联和验证组件（pdfplumber、numpy等）在首次使用时才导入，
+# --help 和完全命中缓存的运行不承担这些导入开销
 
 
 class OceanTerminologySystem:
@@ -28,13 +33,156 @@ class OceanTerminologySystem:
         """初始化系统"""
         self.config = load_config(config_path)
         self.logger = setup_logging()
+        metrics.configure(self.config)
+        
+        # 组件按需创建
+        self._pdf_parser = None
+        self._term_extractor = None
+        self._term_associator = None
+        self._validator = None
+        
+        # 跨运行共享的术语/术语对结果缓存，语料或规则变化时自动失效
+        self.result_cache = ResultCache.from_config(self.config)
+        
+        # 跨运行累积的术语关联图，配置 association_analysis.graph_path 时开启
+        self.graph_path = self.config.get('association_analysis', {}).get('graph_path')
+        
+        # 默认不剖析，通过 enable_profiling 开启
+        self.profiler = StageProfiler()
+        
+        # 进程内只解析一次语料，任务1、任务2和批处理共享
+        self._pdf_documents = None
+        
+    @property
+    def pdf_parser(self):
+        """PDF解析器"""
+        if self._pdf_parser is None:
+            from scripts.parse_pdfs import PDFParser
+            self._pdf_parser = PDFParser(self.config)
+        return self._pdf_parser
+    
+    @property
+    def term_extractor(self):
+        """术语抽取器"""
+        if self._term_extractor is None:
+            from scripts.extract_terms import TermExtractor
+            self._term_extractor = TermExtractor(self.config)
+            self._term_extractor.result_cache = self.result_cache
+        return self._term_extractor
+    
+    @property
+    def term_associator(self):
+        """术语关联分析器"""
+        if self._term_associator is None:
+            from scripts.associate_terms import TermAssociator
+            self._term_associator = TermAssociator(self.config)
+            self._term_associator.result_cache = self.result_cache
+            self._term_associator.association_graph = self._load_association_graph()
+            self._term_associator.semantic_space = self._load_semantic_space()
+        return self._term_associator
+    
+    @property
+    def validator(self):
+        """输出验证器"""
+        if self._validator is None:
+            from scripts.validate_output import OutputValidator
+            self._validator = OutputValidator(self.config)
+        return self._validator
+    
+    @property
+    def shard_coordinator(self):
+        """分片运行协调节点"""
+        from scripts.shard_run import ShardCoordinator
+        return ShardCoordinator(self.config, self.pdf_parser, self.term_extractor, self.term_associator)
+    
+    def enable_profiling(self, output_dir: str, memory: bool = False) -> None:
+        """
+        开启分阶段性能剖析
         
-        # 初始化组件
-        self.pdf_parser = PDFParser(self.config)
-        self.term_extractor = TermExtractor(self.config)
-        self.term_associator = TermAssociator(self.config)
-        self.validator = OutputValidator(self.config)
+        Args:
+            output_dir: 剖析结果输出目录
+            memory: 是否同时跟踪内存分配
+        """
+        profile_config = self.config.get('profiling', {})
+        self.profiler = StageProfiler(
+            output_dir,
+            enabled=True,
+            memory=memory,
+            top_n=profile_config.get('top_n', 30),
+            memory_frames=profile_config.get('memory_frames', 5)
+        )
+    
+    def _load_association_graph(self):
+        """加载持久化的关联图，文件不存在或语料/规则版本变化时新建，未配置路径时返回None"""
+        if not self.graph_path:
+            return None
         
+        from src.graph_store import AssociationGraph
+        version = f"{corpus_version(self.config.get('data_dir', 'data/raw'))}-{rules_version()}"
+        if Path(self.graph_path).exists():
+            try:
+                graph = AssociationGraph.load(self.graph_path)
+                if graph.version == version:
+                    return graph
+                self.logger.info("语料或规则版本已变化，重新构建关联图")
+            except (OSError, ValueError, KeyError) as e:
+                self.logger.warning(f"关联图加载失败，重新构建: {e}")
+        
+        graph = AssociationGraph()
+        graph.version = version
+        return graph
+    
+    def _load_semantic_space(self):
+        """加载离线构建的语义空间（配置 semantic_space.enabled 且已用 scripts/build_semantic_space.py 构建时）"""
+        semantic_config = self.config.get('semantic_space', {})
+        directory = semantic_config.get('dir', 'data/processed/semantic')
+        if not semantic_config.get('enabled', False):
+            return None
+        if not (Path(directory) / 'terms.json').exists():
+            self.logger.warning(f"语义空间不存在，请先运行 scripts/build_semantic_space.py: {directory}")
+            return None
+        
+        from src.nlp_models import SemanticSpace
+        return SemanticSpace.load(directory)
+    
+    def _record_associations(self, association_results: Dict[str, Any]) -> None:
+        """把新分析出的术语关联增量写入关联图"""
+        if self._term_associator is not None and self._term_associator.association_graph is not None:
+            self.term_associator.association_graph.add_associations(association_results)
+    
+    def _save_association_graph(self) -> None:
+        """保存关联图"""
+        if self._term_associator is not None and self._term_associator.association_graph is not None:
+            self._term_associator.association_graph.save(self.graph_path)
+    
+    def _flush_result_cache(self) -> None:
+        """写回结果缓存中批量记录的访问时间"""
+        if self.result_cache is not None:
+            self.result_cache.flush()
+    
+    @contextmanager
+    def _stage(self, name: str):
+        """管道阶段：同时计时并按需剖析"""
+        with metrics.timer(f'stage.{name}'), self.profiler.stage(name):
+            yield
+    
+    def _parse_documents(self) -> List[Dict[str, Any]]:
+        """解析PDF文档（进程内缓存），按配置使用备用后端重试被跳过的页面"""
+        if self._pdf_documents is not None:
+            return self._pdf_documents
+        
+        with self._stage('parse'):
+            pdf_documents = self.pdf_parser.parse_all_pdfs()
+            
+            if self.config.get('pdf_parser', {}).get('retry_skipped', False):
+                self.pdf_parser.retry_skipped_pages(pdf_documents)
+        
+        if self.result_cache is not None:
+            self.result_cache.record_parse_report(self.pdf_parser.parse_report)
+        
+        self._pdf_documents = pdf_documents
+        return pdf_documents
+    
     def run_task1(self, task_json_path: str) -> Dict[str, Any]:
         """
         执行基础任务1：术语识别
@@ -54,13 +202,15 @@ class OceanTerminologySystem:
         self.logger.info(f"需要识别的术语数量: {len(terms_list)}")
         
         # 解析PDF文档
-        pdf_documents = self.pdf_parser.parse_all_pdfs()
+        pdf_documents = self._parse_documents()
         
         # 提取术语信息
-        term_results = self.term_extractor.extract_terms(terms_list, pdf_documents)
+        with self._stage('extract'):
+            term_results = self.term_extractor.extract_terms(terms_list, pdf_documents)
         
         # 验证输出
-        validated_results = self.validator.validate_task1_output(term_results)
+        with self._stage('validate'):
+            validated_results = self.validator.validate_task1_output(term_results)
         
         self.logger.info(f"基础任务1完成，成功识别 {len(validated_results)} 个术语")
         
@@ -85,18 +235,115 @@ class OceanTerminologySystem:
         self.logger.info(f"需要分析关联关系的术语数量: {len(terms_list)}")
         
         # 解析PDF文档
-        pdf_documents = self.pdf_parser.parse_all_pdfs()
+        pdf_documents = self._parse_documents()
         
         # 分析术语关联关系
-        association_results = self.term_associator.analyze_associations(terms_list, pdf_documents)
+        with self._stage('associate'):
+            association_results = self.term_associator.analyze_associations(terms_list, pdf_documents)
+            self._record_associations(association_results)
         
         # 验证输出
-        validated_results = self.validator.validate_task2_output(association_results)
+        with self._stage('validate'):
+            validated_results = self.validator.validate_task2_output(association_results)
         
         self.logger.info(f"进阶任务2完成，识别出 {len(validated_results)} 组关联关系")
         
         return validated_results
     
+    def run_streaming(self, task_json_path: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        流式执行任务1和任务2：页面解析后立即进入抽取和关联分析，不等待整个语料解析完成
+        
+        Args:
+            task_json_path: 任务JSON文件路径
+            
+        Returns:
+            (任务1结果, 任务2结果)
+        """
+        self.logger.info(f"开始流式执行任务1和任务2")
+        
+        with open(task_json_path, 'r', encoding='utf-8') as f:
+            terms_list = json.load(f)
+        
+        from scripts.stream_pipeline import StreamingPipeline
+        
+        pipeline = StreamingPipeline(self.config, self.pdf_parser, self.term_extractor, self.term_associator)
+        with self._stage('stream'):
+            streamed = pipeline.run(terms_list, terms_list)
+        self._pdf_documents = streamed['documents']
+        
+        with self._stage('validate'):
+            task1_results = self.validator.validate_task1_output(
+                self.term_extractor.assemble_term_results(terms_list, streamed['terms'])
+            )
+            task2_results = self.validator.validate_task2_output(
+                self.term_associator.assemble_association_results(terms_list, streamed['pairs'])
+            )
+        self._record_associations(task2_results)
+        
+        self.logger.info(f"流式执行完成，成功识别 {len(task1_results)} 个术语，"
+                         f"识别出 {len(task2_results)} 组关联关系")
+        return task1_results, task2_results
+    
+    def run_sharded(self, task_json_path: str, output_dir: str = None, shards: int = None) -> Dict[str, Any]:
+        """
+        分片运行完整管道：PDF文件分配给本机的多个子进程分别解析和收集候选结果，再合并输出
+        
+        Args:
+            task_json_path: 任务JSON文件路径
+            output_dir: 输出目录
+            shards: 分片数，默认使用配置 shard.shards
+            
+        Returns:
+            任务1和任务2结果
+        """
+        with open(task_json_path, 'r', encoding='utf-8') as f:
+            terms_list = json.load(f)
+        
+        coordinator = self.shard_coordinator
+        with self._stage('shard'):
+            plan_path = coordinator.plan(terms_list, terms_list, shards)
+            failed = coordinator.run_workers(plan_path)
+        if failed:
+            raise RuntimeError(f"{len(failed)} 个分片运行失败，可用 scripts/shard_run.py worker 重跑后再合并: "
+                               f"{', '.join(failed)}")
+        
+        return self.merge_shards(plan_path, output_dir)
+    
+    def merge_shards(self, plan_path: str, output_dir: str = None) -> Dict[str, Any]:
+        """
+        合并分片结果，验证并保存任务1和任务2结果
+        
+        Args:
+            plan_path: 分片计划文件路径
+            output_dir: 输出目录
+            
+        Returns:
+            任务1和任务2结果
+        """
+        if output_dir is None:
+            output_dir = self.config.get('output_dir', 'output')
+        os.makedirs(output_dir, exist_ok=True)
+        
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        
+        with self._stage('merge'):
+            resolved_terms, resolved_pairs = self.shard_coordinator.merge(plan_path)
+        
+        with self._stage('validate'):
+            task1_results = self.validator.validate_task1_output(
+                self.term_extractor.assemble_term_results(plan['definition_terms'], resolved_terms)
+            )
+            task2_results = self.validator.validate_task2_output(
+                self.term_associator.assemble_association_results(plan['association_terms'], resolved_pairs)
+            )
+        self._record_associations(task2_results)
+        
+        self.logger.info(f"分片结果合并完成，成功识别 {len(task1_results)} 个术语，"
+                         f"识别出 {len(task2_results)} 组关联关系")
+        return self._save_pipeline_outputs(task1_results, task2_results, output_dir)
+    
     def run_pipeline(self, task_json_path: str, output_dir: str = None):
         """
         运行完整管道：任务1 + 任务2
@@ -111,28 +358,227 @@ class OceanTerminologySystem:
         # 创建输出目录
         os.makedirs(output_dir, exist_ok=True)
         
+        if self.config.get('pipeline', {}).get('streaming', False) and self._pdf_documents is None:
+            task1_results, task2_results = self.run_streaming(task_json_path)
+            return self._save_pipeline_outputs(task1_results, task2_results, output_dir)
+        
+        if self.config.get('output', {}).get('format', 'json') == 'ndjson':
+            return self.run_ndjson(task_json_path, output_dir)
+        
         # 执行任务1
         task1_results = self.run_task1(task_json_path)
         
+        # 执行任务2
+        task2_results = self.run_task2(task_json_path)
+        
+        return self._save_pipeline_outputs(task1_results, task2_results, output_dir)
+    
+    def _save_pipeline_outputs(self, task1_results: Dict[str, Any], task2_results: Dict[str, Any],
+                               output_dir: str) -> Dict[str, Any]:
+        """保存任务结果、解析报告和运行指标"""
         # 保存任务1结果
         task1_output_path = Path(output_dir) / "task1_results.json"
         with open(task1_output_path, 'w', encoding='utf-8') as f:
             json.dump(task1_results, f, ensure_ascii=False, indent=2)
         
-        # 执行任务2
-        task2_results = self.run_task2(task_json_path)
-        
         # 保存任务2结果
         task2_output_path = Path(output_dir) / "task2_results.json"
         with open(task2_output_path, 'w', encoding='utf-8') as f:
             json.dump(task2_results, f, ensure_ascii=False, indent=2)
         
+        self._save_run_reports(output_dir)
+        
         self.logger.info(f"完整管道执行完成，结果已保存到: {output_dir}")
         
         return {
             "task1": task1_results,
             "task2": task2_results
         }
+    
+    def _save_run_reports(self, output_dir: str) -> None:
+        """保存解析报告、关联图和运行指标"""
+        # 保存PDF解析报告（记录超出预算被跳过的页面）
+        self.pdf_parser.save_parse_report(str(Path(output_dir) / "parse_report.json"))
+        self._save_association_graph()
+        self._flush_result_cache()
+        
+        # 保存运行指标（开启指标收集时）
+        if metrics.enabled:
+            metrics.save(str(Path(output_dir) / "metrics.json"))
+    
+    def run_ndjson(self, task_json_path: str, output_dir: str) -> Dict[str, Any]:
+        """
+        流式输出运行完整管道：术语和术语对分段计算，每条记录验证后立即写入NDJSON文件，
+        运行结束后再逐条组装为W01/R01格式的JSON文件
+        
+        Args:
+            task_json_path: 任务JSON文件路径
+            output_dir: 输出目录
+            
+        Returns:
+            各任务的输出文件和记录数
+        """
+        from scripts.stream_output import NDJSONResultWriter, iter_task1_records, iter_task2_records, assemble_json
+        
+        output_config = self.config.get('output', {})
+        chunk_size = output_config.get('chunk_size', 100)
+        
+        with open(task_json_path, 'r', encoding='utf-8') as f:
+            terms_list = json.load(f)
+        
+        pdf_documents = self._parse_documents()
+        summary = {}
+        
+        with self._stage('extract'):
+            with NDJSONResultWriter(Path(output_dir) / "task1_results.ndjson", 'task1', self.validator) as writer:
+                writer.write_all(iter_task1_records(self.term_extractor, terms_list, pdf_documents, chunk_size))
+            summary['task1'] = writer.summary()
+        
+        with self._stage('associate'):
+            with NDJSONResultWriter(Path(output_dir) / "task2_results.ndjson", 'task2', self.validator) as writer:
+                for key, value in iter_task2_records(self.term_associator, terms_list, pdf_documents, chunk_size):
+                    if writer.write(key, value):
+                        self._record_associations({key: value})
+            summary['task2'] = writer.summary()
+        
+        if self.config.get('validation', {}).get('generate_report', True):
+            report = self.validator.build_report(summary['task1']['validation'], summary['task2']['validation'])
+            save_json_output(report, str(Path(output_dir) / "validation_report.json"))
+        
+        if output_config.get('assemble', True):
+            with self._stage('assemble'):
+                for task in ('task1', 'task2'):
+                    assemble_json(summary[task]['path'], str(Path(output_dir) / f"{task}_results.json"))
+        
+        self._save_run_reports(output_dir)
+        
+        self.logger.info(f"流式输出完成，任务1写出 {summary['task1']['written']} 条记录，"
+                         f"任务2写出 {summary['task2']['written']} 条记录，结果已保存到: {output_dir}")
+        return summary
+    
+    def _resolve_batch_tasks(self, batch_source: str) -> List[Path]:
+        """
+        解析批处理任务来源
+        
+        Args:
+            batch_source: 任务文件目录，或清单文件（.txt每行一个路径，.json为路径列表），
+                          清单中的相对路径相对于清单所在目录
+            
+        Returns:
+            任务文件路径列表
+        """
+        source = Path(batch_source)
+        
+        if source.is_dir():
+            return sorted(source.glob("*.json"))
+        
+        with open(source, 'r', encoding='utf-8') as f:
+            if source.suffix == '.json':
+                entries = json.load(f)
+            else:
+                entries = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        
+        return [path if path.is_absolute() else source.parent / path for path in map(Path, entries)]
+    
+    def run_batch(self, batch_source: str, output_dir: str = None, task: str = 'all') -> Dict[str, Any]:
+        """
+        批处理多个任务文件：语料只解析一次，跨任务去重后的术语和术语对只分析一次
+        
+        Args:
+            batch_source: 任务文件目录或清单文件
+            output_dir: 输出目录，每个任务文件写入以其文件名命名的子目录
+            task: 执行任务 1/2/all
+            
+        Returns:
+            批处理汇总信息
+        """
+        if output_dir is None:
+            output_dir = self.config.get('output_dir', 'output')
+        
+        start = time.perf_counter()
+        task_paths = self._resolve_batch_tasks(batch_source)
+        self.logger.info(f"批处理任务文件数量: {len(task_paths)}")
+        
+        task_terms = {}
+        for task_path in task_paths:
+            with open(task_path, 'r', encoding='utf-8') as f:
+                task_terms[task_path] = json.load(f)
+        
+        # 跨任务去重
+        all_terms = [term for terms in task_terms.values() for term in terms]
+        unique_terms = list(dict.fromkeys(all_terms))
+        all_pairs = [pair for terms in task_terms.values() for pair in itertools.combinations(terms, 2)]
+        
+        pdf_documents = self._parse_documents()
+        
+        resolved_terms = {}
+        resolved_pairs = {}
+        if task in ('1', 'all'):
+            self.logger.info(f"批处理术语: 共 {len(all_terms)} 个，去重后 {len(unique_terms)} 个")
+            with self._stage('extract'):
+                resolved_terms = self.term_extractor.resolve_terms(unique_terms, pdf_documents)
+        if task in ('2', 'all'):
+            with self._stage('associate'):
+                resolved_pairs = self.term_associator.resolve_pairs(all_pairs, pdf_documents)
+            self.logger.info(f"批处理术语对: 共 {len(all_pairs)} 个，去重后 {len(resolved_pairs)} 个")
+        
+        # 分发到各任务的输出目录
+        summary_tasks = []
+        used_names = set()
+        for task_path, terms in task_terms.items():
+            name = task_path.stem
+            suffix = 2
+            while name in used_names:
+                name = f"{task_path.stem}_{suffix}"
+                suffix += 1
+            used_names.add(name)
+            
+            task_output_dir = Path(output_dir) / name
+            os.makedirs(task_output_dir, exist_ok=True)
+            task_summary = {'task_file': str(task_path), 'output_dir': str(task_output_dir), 'terms': len(terms)}
+            
+            if task in ('1', 'all'):
+                with self._stage('validate'):
+                    task1_results = self.validator.validate_task1_output(
+                        self.term_extractor.assemble_term_results(terms, resolved_terms)
+                    )
+                save_json_output(task1_results, str(task_output_dir / "task1_results.json"))
+                task_summary['task1_results'] = len(task1_results)
+            
+            if task in ('2', 'all'):
+                with self._stage('validate'):
+                    task2_results = self.validator.validate_task2_output(
+                        self.term_associator.assemble_association_results(terms, resolved_pairs)
+                    )
+                save_json_output(task2_results, str(task_output_dir / "task2_results.json"))
+                self._record_associations(task2_results)
+                task_summary['task2_results'] = len(task2_results)
+            
+            summary_tasks.append(task_summary)
+        
+        elapsed = time.perf_counter() - start
+        summary = {
+            'task_files': len(task_paths),
+            'total_terms': len(all_terms),
+            'unique_terms': len(unique_terms),
+            'total_pairs': len(all_pairs),
+            'unique_pairs': len(resolved_pairs),
+            'elapsed_seconds': round(elapsed, 3),
+            'task_files_per_minute': round(len(task_paths) / elapsed * 60, 2) if elapsed > 0 else 0.0,
+            'tasks': summary_tasks
+        }
+        
+        os.makedirs(output_dir, exist_ok=True)
+        save_json_output(summary, str(Path(output_dir) / "batch_summary.json"))
+        self.pdf_parser.save_parse_report(str(Path(output_dir) / "parse_report.json"))
+        self._save_association_graph()
+        self._flush_result_cache()
+        if metrics.enabled:
+            metrics.save(str(Path(output_dir) / "metrics.json"))
+        
+        self.logger.info(f"批处理完成: {len(task_paths)} 个任务文件，"
+                         f"{summary['task_files_per_minute']} 个任务文件/分钟，结果已保存到: {output_dir}")
+        return summary
 
 
 def main():
@@ -140,19 +586,47 @@ def main():
     import argparse
     
     parser = argparse.ArgumentParser(description='海洋防灾减灾知识库术语识别系统')
-    parser.add_argument('task_json', help='任务JSON文件路径')
+    parser.add_argument('task_json', help='任务JSON文件路径（批处理模式下为任务文件目录或清单文件）')
+    parser.add_argument('--batch', action='store_true',
+                       help='批处理模式：在一个进程内处理目录或清单中的多个任务文件')
     parser.add_argument('--task', choices=['1', '2', 'all'], default='all', 
                        help='执行任务: 1(术语识别), 2(术语关联), all(全部)')
     parser.add_argument('--output', help='输出目录')
     parser.add_argument('--config', help='配置文件路径')
+    parser.add_argument('--metrics', action='store_true', help='收集各阶段计时和计数指标并输出metrics.json')
+    parser.add_argument('--profile', nargs='?', const='', metavar='DIR',
+                       help='分阶段剖析并输出.prof文件和热点汇总（默认输出到<输出目录>/profile）')
+    parser.add_argument('--stream', action='store_true',
+                       help='流式管道：解析与抽取/关联分析重叠执行（仅完整管道）')
+    parser.add_argument('--shards', type=int, metavar='N',
+                       help='分片运行：PDF文件分配给N个本机子进程分别处理后合并（仅完整管道）')
+    parser.add_argument('--ndjson', action='store_true',
+                       help='流式输出：每条结果验证后立即写入NDJSON，结束后组装JSON（仅完整管道）')
+    parser.add_argument('--profile-memory', action='store_true', help='剖析时同时用tracemalloc跟踪内存分配热点')
     
     args = parser.parse_args()
     
     # 初始化系统
     system = OceanTerminologySystem(args.config)
+    if args.metrics:
+        metrics.enabled = True
+    if args.stream:
+        system.config.setdefault('pipeline', {})['streaming'] = True
+    if args.ndjson:
+        system.config.setdefault('output', {})['format'] = 'ndjson'
+    if args.profile is not None:
+        profile_dir = args.profile or str(Path(args.output or system.config.get('output_dir', 'output')) / 'profile')
+        system.enable_profiling(profile_dir, memory=args.profile_memory)
     
     try:
-        if args.task == '1':
+        if args.batch:
+            summary = system.run_batch(args.task_json, args.output, args.task)
+            print(f"批处理完成: {summary['task_files']} 个任务文件，"
+                  f"{summary['task_files_per_minute']} 个任务文件/分钟")
+        elif args.shards:
+            system.run_sharded(args.task_json, args.output, args.shards)
+            print("分片运行完成")
+        elif args.task == '1':
             results = system.run_task1(args.task_json)
             print(json.dumps(results, ensure_ascii=False, indent=2))
         elif args.task == '2':
@@ -165,6 +639,10 @@ def main():
     except Exception as e:
         print(f"执行错误: {e}")
         sys.exit(1)
+    finally:
+        # 即使执行失败也保留已剖析阶段的结果
+        system.profiler.write_reports()
+        system.profiler.stop()
 
 
 if __name__ == "__main__":
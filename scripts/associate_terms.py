@@ -5,12 +5,18 @@
 分析术语之间的关联关系（主从关系、因果关系）
 """
 
+import time
 import logging
 import itertools
-from typing import List, Dict, Any, Tuple, Optional
+from typing import List, Dict, Any, Tuple, Optional, Iterator
 
-from src.utils import standardize_document_name, format_page_number
+from src.utils import standardize_document_name, format_page_number, corpus_fingerprint
 from src.rules import AssociationRules
+from src.graph_store import AssociationGraph
+from src.term_dictionary import TermDictionary
+from src.sentence_store import SentenceStore
+from scripts.extract_terms import TermExtractor
+from src.metrics import metrics
 
 
 class TermAssociator:
@@ -26,6 +32,31 @@ class TermAssociator:
         self.min_confidence = self.config.get('association_analysis', {}).get('min_confidence', 0.7)
         self.relationship_types = self.config.get('association_analysis', {}).get('relationship_types', 
                                                                                  ["主从关系", "因果关系"])
+        # 关联描述中最多列出的出处数（同一上下文出现在多个页面时）
+        self.max_citations = self.config.get('association_analysis', {}).get('max_citations', 5)
+        
+        # 持久化结果缓存（src.cache.ResultCache），由调用方按需设置
+        self.result_cache = None
+        
+        # 跨运行累积的关联图（src.graph_store.AssociationGraph），由调用方按需设置
+        self.association_graph = None
+        
+        # 直接关联查找使用的已知术语词典（src.term_dictionary.TermDictionary），由调用方按需设置，
+        # 未设置时按文档列表和任务术语构建并缓存
+        self.term_dictionary = None
+        self._term_dictionary = None
+        self._term_dictionary_key = None
+        self._term_dictionary_documents = None
+        
+        # 离线构建的语义空间（src.nlp_models.SemanticSpace），由调用方按需设置，用于术语对预排序
+        self.semantic_space = None
+        # 语义相似度低于该值的术语对不做上下文分析，None表示只排序不剪枝
+        self.semantic_min_score = self.config.get('semantic_space', {}).get('min_score')
+        
+        # 按唯一句子去重的语料视图，按语料指纹缓存（同时持有文档列表的引用）
+        self._sentence_store = None
+        self._sentence_store_key = None
+        self._sentence_store_documents = None
     
     def analyze_associations(self, terms: List[str], pdf_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -40,93 +71,307 @@ class TermAssociator:
         """
         self.logger.info(f"开始分析 {len(terms)} 个术语之间的关联关系")
         
-        results = {}
-        association_count = 0
-        
         # 生成所有可能的术语对
         term_pairs = list(itertools.combinations(terms, 2))
         
         self.logger.info(f"需要分析 {len(term_pairs)} 个术语对")
         
+        resolved = self.resolve_pairs(term_pairs, pdf_documents)
+        return self.assemble_association_results(terms, resolved)
+    
+    @staticmethod
+    def pair_key(term1: str, term2: str) -> Tuple[str, str]:
+        """术语对的无序键"""
+        return (term1, term2) if term1 <= term2 else (term2, term1)
+    
+    def resolve_pairs(self, term_pairs: List[Tuple[str, str]],
+                      pdf_documents: List[Dict[str, Any]]) -> Dict[Tuple[str, str], Optional[Dict[str, Any]]]:
+        """
+        逐个分析去重后的术语对，每个无序术语对只分析一次
+        
+        Args:
+            term_pairs: 术语对列表（可包含重复或反序的术语对）
+            pdf_documents: PDF文档列表
+            
+        Returns:
+            无序术语对键到关联结果的映射
+        """
+        resolved = {}
+        pending = {}
+        cache_params = self.cache_params()
+        
         for term1, term2 in term_pairs:
-            association_result = self._analyze_term_pair_association(term1, term2, pdf_documents)
+            if term1 == term2:
+                continue
+            key = self.pair_key(term1, term2)
+            if key in resolved or key in pending:
+                continue
+            
+            if self.result_cache is not None:
+                hit, cached = self.result_cache.get('pair', list(key), cache_params)
+                if hit:
+                    resolved[key] = cached
+                    continue
+            pending[key] = (term1, term2)
+        
+        ranked, pruned = self.rank_pairs(list(pending))
+        for key in pruned:
+            resolved[key] = None
+        
+        store = self.get_sentence_store(pdf_documents) if ranked else None
+        for key in ranked:
+            term1, term2 = pending[key]
+            resolved[key] = self._analyze_term_pair_association(term1, term2, store)
+            
+            if self.result_cache is not None:
+                self.result_cache.put('pair', list(key), cache_params, resolved[key])
+        
+        return resolved
+    
+    def rank_pairs(self, keys: List[Tuple[str, str]]) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """
+        按语义空间中的相似度从高到低排列待分析的术语对（一次矩阵乘法），
+        设置 semantic_space.min_score 时低于阈值的术语对不再做上下文分析；
+        有术语不在语义空间中的术语对无法评分，排在最后且从不剪枝
+        
+        Args:
+            keys: 待分析的术语对键
+            
+        Returns:
+            (按相似度排序的待分析术语对, 被剪枝的术语对)，未加载语义空间时原样返回
+        """
+        if self.semantic_space is None or not keys:
+            return list(keys), []
+        
+        scores = self.semantic_space.score_pairs(keys)
+        scored = sorted((key for key in keys if scores[key] is not None), key=lambda key: -scores[key])
+        unscored = [key for key in keys if scores[key] is None]
+        if self.semantic_min_score is None:
+            return scored + unscored, []
+        
+        kept = [key for key in scored if scores[key] >= self.semantic_min_score]
+        pruned = [key for key in scored if scores[key] < self.semantic_min_score]
+        metrics.incr('associate.pairs_pruned', len(pruned))
+        if pruned:
+            self.logger.info(f"语义相似度低于 {self.semantic_min_score} 的 {len(pruned)} 个术语对不做上下文分析")
+        return kept + unscored, pruned
+    
+    def cache_params(self) -> Dict[str, Any]:
+        """影响关联分析结果的配置阈值，作为结果缓存键的一部分"""
+        return {'min_confidence': self.min_confidence, 'max_citations': self.max_citations}
+    
+    def assemble_association_results(self, terms: List[str],
+                                     resolved: Dict[Tuple[str, str], Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+        """
+        按任务术语顺序组装R01格式的结果
+        
+        Args:
+            terms: 任务术语列表
+            resolved: resolve_pairs 返回的术语对结果
+            
+        Returns:
+            关联关系分析结果
+        """
+        results = dict(self.iter_association_records(self.task_pairs(terms), resolved))
+        
+        self.logger.info(f"关联关系分析完成，发现 {len(results)} 组关联关系")
+        return results
+    
+    @staticmethod
+    def task_pairs(terms: List[str]) -> List[Tuple[str, str]]:
+        """
+        任务术语两两组合，按任务中的术语顺序排列
+        
+        Args:
+            terms: 任务术语列表
+            
+        Returns:
+            [(术语1, 术语2), ...]
+        """
+        return [(term1, term2) for term1, term2 in itertools.combinations(terms, 2) if term1 != term2]
+    
+    def iter_association_records(self, pairs: List[Tuple[str, str]],
+                                 resolved: Dict[Tuple[str, str], Optional[Dict[str, Any]]],
+                                 start: int = 1) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        按术语对顺序逐条生成R01格式的记录，没有关联的术语对不生成记录
+        
+        Args:
+            pairs: task_pairs 返回的术语对（可为其中的一段）
+            resolved: resolve_pairs 返回的术语对结果
+            start: 第一条记录的序号
+            
+        Yields:
+            (关联键, 关联结果)
+        """
+        association_count = start - 1
+        
+        for term1, term2 in pairs:
+            association_result = resolved.get(self.pair_key(term1, term2))
             
             if association_result and association_result["关联关系"] != "未知关系":
                 association_count += 1
                 result_key = f"R{association_count:02d}"
-                results[result_key] = association_result
+                # 关联分析对术语顺序对称，按任务中的术语顺序输出
+                association_result = dict(association_result)
+                association_result["术语关联"] = [term1, term2]
                 
                 self.logger.info(f"发现关联关系 {result_key}: {term1} - {term2} - {association_result['关联关系']}")
+                yield result_key, association_result
+    
+    def get_sentence_store(self, pdf_documents: List[Dict[str, Any]]) -> SentenceStore:
+        """
+        获取文档列表的句子库，语料指纹不变时只建一次
         
-        self.logger.info(f"关联关系分析完成，发现 {association_count} 组关联关系")
-        return results
+        Args:
+            pdf_documents: PDF文档列表
+            
+        Returns:
+            句子库
+        """
+        key = corpus_fingerprint(pdf_documents)
+        if self._sentence_store is None or self._sentence_store_key != key:
+            self._sentence_store = SentenceStore(pdf_documents)
+            self._sentence_store_key = key
+            self._sentence_store_documents = pdf_documents
+        return self._sentence_store
     
-    def _analyze_term_pair_association(self, term1: str, term2: str, 
-                                      pdf_documents: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    def _analyze_term_pair_association(self, term1: str, term2: str,
+                                      store: SentenceStore) -> Optional[Dict[str, Any]]:
         """
-        分析术语对的关联关系
+        分析术语对的关联关系：每个唯一的共现上下文只评分一次，再展开到所有出现的页面（含近重复副本）
         
         Args:
             term1: 术语1
             term2: 术语2
-            pdf_documents: PDF文档列表
+            store: 语料的句子库
             
         Returns:
             关联关系信息
         """
-        best_association = None
-        best_confidence = 0.0
+        start = time.perf_counter()
+        contexts = store.cooccurrence_contexts(term1, term2)
         
-        for doc in pdf_documents:
-            for page in doc['pages']:
-                page_text = page['text']
-                
-                # 检查两个术语是否同时出现在页面中
-                if term1 not in page_text or term2 not in page_text:
-                    continue
-                
-                # 提取包含两个术语的上下文
-                contexts = self.rules.extract_association_context(page_text, term1, term2)
-                
-                for context in contexts:
-                    # 分析关联关系
-                    relationship_type, confidence, description = self.rules.analyze_relationship(
-                        term1, term2, context
-                    )
-                    
-                    if confidence > best_confidence and confidence >= self.min_confidence:
-                        best_confidence = confidence
-                        best_association = {
-                            "术语关联": [term1, term2],
-                            "关联关系": relationship_type,
-                            "关联描述": [{
-                                "文档出处": standardize_document_name(doc['file_name']),
-                                "文档页数": format_page_number(f"第{page['page_number']}页")
-                            }],
-                            "置信度": confidence,
-                            "上下文": context[:500]  # 截取前500字符
-                        }
-        
-        return best_association
+        candidates = []
+        occurrence_count = 0
+        for context, occurrences in contexts:
+            occurrence_count += len(occurrences)
+            relationship_type, confidence, _ = self.rules.analyze_relationship(term1, term2, context)
+            if confidence < self.min_confidence:
+                continue
+            for page_index, position in occurrences:
+                for order, doc, page in store.page_sources(page_index):
+                    candidates.append(((order, position), confidence, relationship_type, context,
+                                       standardize_document_name(doc['file_name']),
+                                       format_page_number(f"第{page['page_number']}页")))
+        
+        if metrics.enabled:
+            # 没有任何句子同时包含两个术语的术语对视为被剪枝
+            metrics.incr('associate.pairs_pruned' if not contexts else 'associate.pairs_analyzed')
+            metrics.incr('associate.contexts_scored', len(contexts))
+            metrics.incr('associate.context_occurrences', occurrence_count)
+            metrics.observe('associate.pair_seconds', time.perf_counter() - start)
+        
+        return self.select_association(term1, term2, candidates)
+    
+    def select_association(self, term1: str, term2: str, candidates: List[Tuple]) -> Optional[Dict[str, Any]]:
+        """
+        从已评分的上下文中选出置信度最高的关联（同置信度取语料中最靠前的），
+        并把同一上下文的所有出现展开为关联描述中的出处
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+            candidates: [(语料顺序, 置信度, 关联关系, 上下文, 文档出处, 文档页数), ...]，只含达到置信度阈值的上下文
+            
+        Returns:
+            关联关系信息，没有候选时返回None
+        """
+        if not candidates:
+            return None
+        
+        best = min(candidates, key=lambda candidate: (-candidate[1], candidate[0]))
+        _, confidence, relationship_type, context, document_name, page_label = best
+        result = self.build_association_result(term1, term2, relationship_type, confidence, context,
+                                               document_name, page_label)
+        
+        # 最佳上下文按语料顺序的所有出处，第一个即最佳上下文首次出现的页面
+        citations = []
+        for candidate in sorted(candidates, key=lambda candidate: candidate[0]):
+            citation = {"文档出处": candidate[4], "文档页数": candidate[5]}
+            if candidate[3] == context and citation not in citations:
+                citations.append(citation)
+                if len(citations) >= self.max_citations:
+                    break
+        result["关联描述"] = citations
+        return result
+    
+    def score_page_contexts(self, term1: str, term2: str, page_text: str) -> Tuple[List[Tuple[float, str, str]], int]:
+        """
+        对单个页面中两个术语的共现上下文逐个评分
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+            page_text: 页面文本
+            
+        Returns:
+            ([(置信度, 关联关系, 上下文), ...] 按页面中的顺序，只含达到置信度阈值的上下文, 评分的上下文数量)
+        """
+        scored = []
+        contexts = self.rules.extract_association_context(page_text, term1, term2)
+        
+        for context in contexts:
+            relationship_type, confidence, description = self.rules.analyze_relationship(
+                term1, term2, context
+            )
+            if confidence >= self.min_confidence:
+                scored.append((confidence, relationship_type, context))
+        
+        return scored, len(contexts)
+    
+    @staticmethod
+    def build_association_result(term1: str, term2: str, relationship_type: str, confidence: float,
+                                 context: str, document_name: str, page_label: str) -> Dict[str, Any]:
+        """构造R01格式的单个关联结果"""
+        return {
+            "术语关联": [term1, term2],
+            "关联关系": relationship_type,
+            "关联描述": [{
+                "文档出处": document_name,
+                "文档页数": page_label
+            }],
+            "置信度": confidence,
+            "上下文": context[:500]  # 截取前500字符
+        }
     
-    def find_direct_associations(self, term: str, pdf_documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def find_direct_associations(self, term: str, pdf_documents: List[Dict[str, Any]],
+                                 dictionary: TermDictionary = None, terms: List[str] = None) -> List[Dict[str, Any]]:
         """
         查找与指定术语直接关联的其他术语
         
+        候选关联术语只取术语词典中的已知术语（自动抽取的定义术语和任务术语），
+        由词典自动机一次扫描句子得到。
+        
         Args:
             term: 目标术语
             pdf_documents: PDF文档列表
+            dictionary: 术语词典，默认使用 self.term_dictionary，未设置时从文档和任务术语构建
+            terms: 任务术语列表，构建词典时加入
             
         Returns:
             直接关联术语列表
         """
+        if dictionary is None:
+            dictionary = self.term_dictionary or self.get_term_dictionary(pdf_documents, terms)
+        
         associations = []
         
         for doc in pdf_documents:
             for page in doc['pages']:
                 page_text = page['text']
                 
-                if term not in page_text:
+                if term not in page_text or page.get('duplicate_of'):
                     continue
                 
                 # 查找与目标术语出现在同一句子中的其他术语
@@ -134,8 +379,8 @@ class TermAssociator:
                 
                 for sentence in sentences:
                     if term in sentence:
-                        # 提取句子中的其他潜在术语
-                        potential_terms = self._extract_potential_terms(sentence, exclude_term=term)
+                        # 提取句子中的其他已知术语
+                        potential_terms = self._find_dictionary_terms(sentence, term, dictionary)
                         
                         for other_term in potential_terms:
                             # 分析关联关系
@@ -169,50 +414,78 @@ class TermAssociator:
         
         return sorted_associations
     
-    def _extract_potential_terms(self, text: str, exclude_term: str = None) -> List[str]:
+    def get_term_dictionary(self, pdf_documents: List[Dict[str, Any]], terms: List[str] = None) -> TermDictionary:
         """
-        从文本中提取潜在术语
+        获取文档列表和任务术语的术语词典，语料指纹和术语不变时只建一次
         
         Args:
-            text: 输入文本
-            exclude_term: 要排除的术语
+            pdf_documents: PDF文档列表
+            terms: 任务术语列表
             
         Returns:
-            潜在术语列表
+            术语词典
+        """
+        key = (corpus_fingerprint(pdf_documents), tuple(terms or []))
+        if self._term_dictionary is None or self._term_dictionary_key != key:
+            self._term_dictionary = self.build_term_dictionary(pdf_documents, terms)
+            self._term_dictionary_key = key
+            self._term_dictionary_documents = pdf_documents
+        return self._term_dictionary
+    
+    def build_term_dictionary(self, pdf_documents: List[Dict[str, Any]],
+                              terms: List[str] = None) -> TermDictionary:
         """
-        # 简单的基于规则的术语提取
-        import re
+        构建已知术语词典：文档中自动抽取的定义术语加上任务术语
         
-        # 匹配可能的中文术语（2-10个中文字符）
-        potential_terms = re.findall(r'[\u4e00-\u9fff]{2,10}', text)
+        Args:
+            pdf_documents: PDF文档列表
+            terms: 任务术语列表
+            
+        Returns:
+            术语词典
+        """
+        extracted = TermExtractor(self.config).extract_all_terms_from_documents(pdf_documents)
+        dictionary = TermDictionary(record["术语名称"] for record in extracted)
+        dictionary.update(terms or [])
         
-        # 过滤
-        filtered_terms = []
-        for term in potential_terms:
-            # 排除常见虚词和短词
-            if len(term) < 2:
-                continue
+        self.logger.info(f"术语词典包含 {len(dictionary)} 个已知术语")
+        return dictionary
+    
+    def _find_dictionary_terms(self, sentence: str, term: str, dictionary: TermDictionary) -> List[str]:
+        """
+        找出句子中目标术语以外的已知术语，忽略只出现在目标术语内部或与其重叠的术语
+        
+        Args:
+            sentence: 句子
+            term: 目标术语
+            dictionary: 术语词典
             
-            # 排除排除术语
-            if exclude_term and term == exclude_term:
+        Returns:
+            候选关联术语列表（按首次出现顺序）
+        """
+        # 目标术语只作为本次匹配的额外术语，不写入（可能共享的）词典
+        matches = dictionary.find_all(sentence, [term])
+        term_spans = [(start, end) for start, end, found in matches if found == term]
+        
+        candidates = {}
+        for start, end, found in sorted(matches):
+            if found == term or found in candidates:
                 continue
-            
-            # 排除常见虚词
-            common_particles = {'的', '了', '在', '是', '有', '和', '就', '不', '人', '都'}
-            if term in common_particles:
+            if any(start < term_end and term_start < end for term_start, term_end in term_spans):
                 continue
-            
-            filtered_terms.append(term)
+            candidates[found] = True
         
-        return list(set(filtered_terms))
+        return list(candidates)
     
-    def build_association_network(self, terms: List[str], pdf_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+    def build_association_network(self, terms: List[str], pdf_documents: List[Dict[str, Any]],
+                                  associations: Dict[str, Any] = None) -> Dict[str, Any]:
         """
         构建术语关联网络
         
         Args:
             terms: 术语列表
             pdf_documents: PDF文档列表
+            associations: 已有的关联分析结果，未提供时重新分析
             
         Returns:
             关联网络数据
@@ -223,6 +496,23 @@ class TermAssociator:
             "communities": {}
         }
         
+        if associations is None:
+            associations = self.analyze_associations(terms, pdf_documents)
+        
+        # 持久化关联图（如已设置）只做增量累积，输出的链接和统计只来自本次运行的关联结果
+        if self.association_graph is not None:
+            self.association_graph.add_associations(associations)
+        
+        # 只输出任务术语之间的链接
+        term_set = set(terms)
+        graph = AssociationGraph()
+        for term in terms:
+            graph.add_node(term)
+        graph.add_associations({
+            key: association for key, association in associations.items()
+            if all(term in term_set for term in association["术语关联"])
+        })
+        
         # 添加节点
         for term in terms:
             network["nodes"].append({
@@ -231,67 +521,36 @@ class TermAssociator:
                 "group": 1  # 默认分组
             })
         
-        # 分析关联关系并添加链接
-        associations = self.analyze_associations(terms, pdf_documents)
-        
-        for assoc_id, assoc_info in associations.items():
-            term1, term2 = assoc_info["术语关联"]
-            relationship = assoc_info["关联关系"]
-            confidence = assoc_info["置信度"]
-            
-            # 确定链接类型
-            if relationship == "主从关系":
-                link_type = "hierarchical"
-            elif relationship == "因果关系":
-                link_type = "causal"
-            else:
-                link_type = "other"
-            
+        link_types = {"主从关系": "hierarchical", "因果关系": "causal"}
+        for term1, term2, relationship, confidence in graph.edges():
             network["links"].append({
                 "source": term1,
                 "target": term2,
-                "type": link_type,
+                "type": link_types.get(relationship, "other"),
                 "relationship": relationship,
                 "confidence": confidence
             })
         
-        # 简单的社区检测（基于连接度）
-        self._detect_communities(network)
+        # 社区检测（标签传播）
+        self._detect_communities(network, graph)
+        network["statistics"] = graph.degree_stats()
         
         return network
     
-    def _detect_communities(self, network: Dict[str, Any]) -> None:
+    def _detect_communities(self, network: Dict[str, Any], graph: AssociationGraph) -> None:
         """
-        检测关联网络中的社区
+        检测关联网络中的社区（标签传播），社区编号写入节点的 group 和 communities 输出
         
         Args:
             network: 关联网络数据
+            graph: 由网络节点和链接构成的关联图
         """
-        # 简单的基于连接度的社区检测
-        node_degrees = {}
-        
-        for node in network["nodes"]:
-            node_id = node["id"]
-            degree = sum(1 for link in network["links"] 
-                        if link["source"] == node_id or link["target"] == node_id)
-            node_degrees[node_id] = degree
-        
-        # 根据连接度分组
-        high_degree_nodes = [node_id for node_id, degree in node_degrees.items() if degree >= 3]
-        medium_degree_nodes = [node_id for node_id, degree in node_degrees.items() if 1 <= degree < 3]
-        low_degree_nodes = [node_id for node_id, degree in node_degrees.items() if degree == 0]
+        communities = graph.communities(
+            max_iterations=self.config.get('association_analysis', {}).get('community_iterations', 30)
+        )
         
         # 更新节点分组
         for node in network["nodes"]:
-            if node["id"] in high_degree_nodes:
-                node["group"] = 1  # 核心节点
-            elif node["id"] in medium_degree_nodes:
-                node["group"] = 2  # 中等连接节点
-            else:
-                node["group"] = 3  # 孤立节点
-        
-        network["communities"] = {
-            "core_nodes": high_degree_nodes,
-            "medium_nodes": medium_degree_nodes,
-            "isolated_nodes": low_degree_nodes
-        }
\ No newline at end of file
+            node["group"] = communities["assignments"][node["id"]]
+        
+        network["communities"] = communities
\ No newline at end of file
@@ -0,0 +1,582 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能基准测试模块
+对解析、抽取、关联、相似度检索和输出验证各阶段计时，并与历史结果对比发现性能回退
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict, Any, Callable
+
+try:
+    import resource
+except ImportError:  # Windows 没有resource模块，不统计峰值内存
+    resource = None
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import load_config, save_json_output
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+# 启动路径上不应出现的重量级依赖
+HEAVY_MODULES = ('pdfplumber', 'pdfminer', 'numpy', 'scipy', 'sklearn')
+
+
+def peak_rss_mb(children: bool = False) -> float:
+    """
+    返回峰值常驻内存（MB），进程级高水位，只增不减
+    
+    Args:
+        children: 是否统计已结束子进程（如PDF解析工作进程）中的最大值
+    """
+    if resource is None:
+        return 0.0
+    who = resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    if sys.platform == 'darwin':
+        return round(peak / 1024 / 1024, 1)
+    return round(peak / 1024, 1)
+
+
+def reset_peak_rss() -> bool:
+    """
+    把本进程的峰值常驻内存重置为当前值（Linux的 /proc/self/clear_refs），用于逐阶段测量峰值
+    
+    Returns:
+        是否支持重置
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def proc_status_mb(field: str) -> float:
+    """
+    读取 /proc/self/status 中的内存字段（MB），如 VmRSS（当前）、VmHWM（重置后的峰值）
+    
+    Args:
+        field: 字段名
+    """
+    with open('/proc/self/status', 'r') as f:
+        match = re.search(rf'^{field}:\s+(\d+) kB', f.read(), re.MULTILINE)
+    return round(int(match.group(1)) / 1024, 1) if match else 0.0
+
+
+def run_measured(command: List[str]) -> Dict[str, Any]:
+    """
+    运行子进程并单独取得该子进程的峰值常驻内存（wait4），不受之前其他子进程的影响
+    
+    Args:
+        command: 命令行
+    
+    Returns:
+        退出码、标准错误输出、耗时和峰值内存（MB）
+    """
+    with tempfile.TemporaryFile() as stderr:
+        start = time.perf_counter()
+        process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=stderr, cwd=PROJECT_ROOT)
+        if hasattr(os, 'wait4'):
+            _, status, usage = os.wait4(process.pid, 0)
+            process.returncode = os.waitstatus_to_exitcode(status)
+            peak = usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+        else:
+            process.wait()
+            peak = 0.0
+        wall_time = time.perf_counter() - start
+        stderr.seek(0)
+        output = stderr.read().decode('utf-8', errors='replace')
+    return {'returncode': process.returncode, 'stderr': output,
+            'wall_time': round(wall_time, 4), 'peak_rss_mb': round(peak, 1)}
+
+
+def parse_importtime(stderr: str) -> Dict[str, Any]:
+    """
+    解析 `python -X importtime` 的输出
+    
+    Args:
+        stderr: 子进程的标准错误输出
+    
+    Returns:
+        顶层导入总耗时（秒）、导入的模块数、耗时最多的顶层模块和已导入的重量级依赖
+    """
+    top_level = []
+    modules = set()
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[1].strip().isdigit():
+            continue
+        name = fields[2][1:]
+        modules.add(name.strip())
+        if not name.startswith(' '):
+            top_level.append((name, int(fields[1])))
+    
+    top_level.sort(key=lambda item: item[1], reverse=True)
+    return {
+        'import_seconds': round(sum(cumulative for _, cumulative in top_level) / 1e6, 4),
+        'modules': len(modules),
+        'top_imports': [{'module': name, 'seconds': round(cumulative / 1e6, 4)} for name, cumulative in top_level[:10]],
+        'heavy_modules': sorted(name for name in HEAVY_MODULES if name in modules)
+    }
+
+
+class PipelineBenchmark:
+    """全流程性能基准测试"""
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        """初始化基准测试"""
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+        
+        benchmark_config = self.config.get('benchmark', {})
+        self.similarity_queries = benchmark_config.get('similarity_queries', 3)
+        # 向量存储基准测试：除术语向量外追加的页面向量查询数，以及重新排序的候选数
+        self.vector_queries = benchmark_config.get('vector_queries', 50)
+        self.vector_rerank = benchmark_config.get('vector_rerank', 50)
+        self.regression_tolerance = benchmark_config.get('regression_tolerance', 0.2)
+        # 耗时过短的阶段计时噪声大，绝对增量低于该值不算回退
+        self.min_regression_seconds = benchmark_config.get('min_regression_seconds', 0.05)
+    
+    def _measure(self, func: Callable[[], Any]) -> Dict[str, Any]:
+        """
+        执行函数并记录耗时和本阶段的内存
+        
+        支持重置峰值的平台（Linux）记录本阶段的峰值常驻内存 peak_rss_mb 和阶段前后常驻内存之差 rss_delta_mb；
+        其他平台用tracemalloc记录本阶段Python对象分配的峰值 peak_alloc_mb（开启跟踪会拖慢计时）
+        """
+        if reset_peak_rss():
+            before = proc_status_mb('VmRSS')
+            start = time.perf_counter()
+            result = func()
+            wall_time = time.perf_counter() - start
+            return {
+                'result': result,
+                'wall_time': round(wall_time, 4),
+                'peak_rss_mb': proc_status_mb('VmHWM'),
+                'rss_delta_mb': round(proc_status_mb('VmRSS') - before, 1)
+            }
+        
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            result = func()
+        finally:
+            wall_time = time.perf_counter() - start
+            peak = tracemalloc.get_traced_memory()[1]
+            if not tracing:
+                tracemalloc.stop()
+        return {
+            'result': result,
+            'wall_time': round(wall_time, 4),
+            'peak_alloc_mb': round((peak - base) / 1024 / 1024, 1)
+        }
+    
+    def _rate(self, count: int, wall_time: float) -> float:
+        """计算吞吐量"""
+        return round(count / wall_time, 2) if wall_time > 0 else 0.0
+    
+    def bench_startup(self) -> Dict[str, Any]:
+        """
+        基准测试命令行启动开销：在子进程中以 -X importtime 运行 `app.py --help` 和 `import app`
+        
+        Returns:
+            各启动路径的测量结果
+        """
+        commands = {
+            'startup_help': [sys.executable, '-X', 'importtime', 'app.py', '--help'],
+            'startup_import': [sys.executable, '-X', 'importtime', '-c', 'import app']
+        }
+        
+        results = {}
+        for name, command in commands.items():
+            completed = run_measured(command)
+            measured = {'wall_time': completed['wall_time'], 'peak_rss_mb': completed['peak_rss_mb']}
+            measured.update(parse_importtime(completed['stderr']))
+            if completed['returncode'] != 0:
+                measured['error'] = completed['stderr'].strip().splitlines()[-1] if completed['stderr'].strip() else ''
+            results[name] = measured
+        return results
+    
+    def bench_parse(self, pdf_dir: str, max_pdfs: int = None) -> Dict[str, Any]:
+        """
+        基准测试PDF解析
+        
+        Args:
+            pdf_dir: PDF目录
+            max_pdfs: 最多解析的PDF数量（用于快速运行）
+        
+        Returns:
+            解析阶段的测量结果，附带解析后的文档
+        """
+        from scripts.parse_pdfs import PDFParser
+        
+        parser = PDFParser(self.config)
+        # 测量的是实际解析，不读取解析结果缓存
+        parser.parse_cache = None
+        if max_pdfs:
+            # 只解析部分文件时复用并行解析逻辑
+            pdf_paths = [str(path) for path in sorted(Path(pdf_dir).glob("*.pdf"))[:max_pdfs]]
+            if parser.workers and parser.workers > 0:
+                run = lambda: parser._parse_with_workers(pdf_paths)
+            else:
+                run = lambda: [doc for doc in map(parser.parse_pdf, pdf_paths) if doc]
+        else:
+            run = lambda: parser.parse_all_pdfs(pdf_dir)
+        
+        measured = self._measure(run)
+        documents = measured.pop('result')
+        pages = sum(len(doc['pages']) for doc in documents)
+        measured.update({
+            'documents': len(documents),
+            'pages': pages,
+            'pages_per_sec': self._rate(pages, measured['wall_time']),
+            # 已结束子进程（解析工作进程）中的最大峰值
+            'peak_rss_workers_mb': peak_rss_mb(children=True)
+        })
+        return {'metrics': measured, 'documents': documents}
+    
+    def scale_corpus(self, pdf_documents: List[Dict[str, Any]], scale: int) -> List[Dict[str, Any]]:
+        """
+        生成按倍数放大的合成语料
+        
+        副本只复制文档结构并改名，页面文本对象在副本间共享，
+        因此放大的是扫描工作量而不是文本内存。
+        
+        Args:
+            pdf_documents: 原始文档列表
+            scale: 放大倍数
+        
+        Returns:
+            合成语料
+        """
+        if scale <= 1:
+            return pdf_documents
+        
+        scaled = []
+        for copy_index in range(scale):
+            for doc in pdf_documents:
+                copy = dict(doc)
+                if copy_index:
+                    copy['file_stem'] = f"{doc['file_stem']}-副本{copy_index}"
+                    copy['file_name'] = f"{copy['file_stem']}.pdf"
+                copy['pages'] = [dict(page) for page in doc['pages']]
+                scaled.append(copy)
+        return scaled
+    
+    def bench_stages(self, terms: List[str], pdf_documents: List[Dict[str, Any]],
+                     scale: int) -> Dict[str, Any]:
+        """
+        在给定语料上基准测试抽取、关联、相似度检索和验证阶段
+        
+        Args:
+            terms: 目标术语列表
+            pdf_documents: 文档列表
+            scale: 语料放大倍数（用于放大验证记录数）
+        
+        Returns:
+            各阶段测量结果
+        """
+        from scripts.extract_terms import TermExtractor
+        from scripts.associate_terms import TermAssociator
+        from scripts.validate_output import OutputValidator
+        from src.nlp_models import NLPModels
+        
+        pages = sum(len(doc['pages']) for doc in pdf_documents)
+        pairs = len(terms) * (len(terms) - 1) // 2
+        stages = {}
+        
+        # 术语抽取
+        extractor = TermExtractor(self.config)
+        measured = self._measure(lambda: extractor.extract_terms(terms, pdf_documents))
+        task1_results = measured.pop('result')
+        measured.update({
+            'terms': len(terms),
+            'pages': pages,
+            'pages_per_sec': self._rate(pages, measured['wall_time']),
+            # 每个术语都扫描全部页面，按页面×术语计的吞吐量
+            'term_pages_per_sec': self._rate(pages * len(terms), measured['wall_time']),
+            'terms_found': sum(1 for value in task1_results.values() if value['术语定义'])
+        })
+        stages['extract'] = measured
+        
+        # 术语关联
+        associator = TermAssociator(self.config)
+        measured = self._measure(lambda: associator.analyze_associations(terms, pdf_documents))
+        task2_results = measured.pop('result')
+        measured.update({
+            'pairs': pairs,
+            'pairs_per_sec': self._rate(pairs, measured['wall_time']),
+            'associations_found': len(task2_results)
+        })
+        stages['associate'] = measured
+        
+        # 相似文档检索
+        nlp_models = NLPModels(self.config)
+        doc_texts = [doc.get('full_text', '') for doc in pdf_documents]
+        queries = terms[:self.similarity_queries]
+        
+        def run_similarity():
+            nlp_models.fit_tfidf(doc_texts)
+            return [nlp_models.find_similar_documents(query, doc_texts) for query in queries]
+        
+        measured = self._measure(run_similarity)
+        measured.pop('result')
+        measured.update({
+            'queries': len(queries),
+            'documents': len(doc_texts),
+            'documents_per_sec': self._rate(len(doc_texts) * len(queries), measured['wall_time'])
+        })
+        stages['similar_documents'] = measured
+        
+        # 输出验证（记录数随语料放大倍数放大）
+        validator = OutputValidator(self.config)
+        task1_records = self._scale_records(task1_results, 'W', scale)
+        task2_records = self._scale_records(task2_results, 'R', scale)
+        
+        def run_validation():
+            return validator.validate_outputs(task1_records, task2_records)
+        
+        measured = self._measure(run_validation)
+        measured.pop('result')
+        records = len(task1_records) + len(task2_records)
+        measured.update({
+            'records': records,
+            'records_per_sec': self._rate(records, measured['wall_time'])
+        })
+        stages['validate'] = measured
+        
+        return stages
+    
+    def bench_vector_store(self, terms: List[str], pdf_documents: List[Dict[str, Any]],
+                           top_k: int = 10) -> Dict[str, Any]:
+        """
+        基准测试向量存储的精度与内存：以语义空间的页面向量为库、术语向量和页面向量为查询，
+        对比各存储精度（及全精度重新排序）相对float32精确检索的 recall@k、常驻字节数和检索耗时
+        
+        Args:
+            terms: 目标术语列表
+            pdf_documents: 文档列表
+            top_k: 检索结果数
+        
+        Returns:
+            各存储配置的测量结果，语料不足以构建语义空间时为空
+        """
+        import numpy as np
+        from src.nlp_models import SemanticSpace
+        from src.vector_store import VectorStore
+        
+        texts = [page['text'] for doc in pdf_documents for page in doc['pages']
+                 if not page.get('duplicate_of') and page.get('text')]
+        try:
+            space = SemanticSpace.build(texts, terms, dtype='float32')
+        except ValueError as e:
+            self.logger.warning(f"跳过向量存储基准测试: {e}")
+            return {}
+        
+        page_vectors = np.asarray(space.page_store.codes)
+        term_vectors = np.asarray(space.term_store.codes)
+        queries = np.vstack([term_vectors[np.linalg.norm(term_vectors, axis=1) > 0],
+                             page_vectors[:self.vector_queries]])
+        exact = [{row for row, _ in VectorStore(page_vectors).search(query, top_k)} for query in queries]
+        
+        results = {}
+        for dtype, rerank in (('float32', 0), ('float16', 0), ('float16', self.vector_rerank),
+                              ('int8', 0), ('int8', self.vector_rerank)):
+            store = VectorStore.from_vectors(page_vectors, dtype, keep_full=bool(rerank))
+            measured = self._measure(lambda: [store.search(query, top_k, rerank) for query in queries])
+            found = measured.pop('result')
+            recalls = [len(exact[index] & {row for row, _ in hits}) / max(len(exact[index]), 1)
+                       for index, hits in enumerate(found)]
+            stats = store.memory_stats()
+            measured.update({
+                'vectors': len(store),
+                'dim': store.dim,
+                'queries': len(queries),
+                # 全精度副本按内存映射访问，只有重新排序的候选行被读入，不计入常驻字节数
+                'resident_bytes': stats['codes_bytes'] + stats['scales_bytes'],
+                'full_bytes': stats['full_bytes'],
+                'recall_at_k': round(float(np.mean(recalls)), 4) if recalls else 0.0
+            })
+            results[f"{dtype}_rerank" if rerank else dtype] = measured
+        return results
+    
+    def _scale_records(self, results: Dict[str, Any], prefix: str, scale: int) -> Dict[str, Any]:
+        """按倍数复制输出记录并重新编号"""
+        records = list(results.values()) * max(scale, 1)
+        width = max(2, len(str(len(records))))
+        return {f"{prefix}{i:0{width}d}": record for i, record in enumerate(records, 1)}
+    
+    def run(self, terms: List[str], pdf_dir: str, scales: List[int],
+            max_pdfs: int = None) -> Dict[str, Any]:
+        """
+        运行完整基准测试
+        
+        Args:
+            terms: 目标术语列表
+            pdf_dir: PDF目录
+            scales: 语料放大倍数列表
+            max_pdfs: 最多解析的PDF数量
+        
+        Returns:
+            基准测试报告
+        """
+        report = {
+            'timestamp': datetime.now().isoformat(timespec='seconds'),
+            'git_commit': self._git_commit(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'pdf_dir': pdf_dir,
+            'max_pdfs': max_pdfs,
+            'results': {}
+        }
+        
+        # 启动开销最先测量，子进程峰值内存不受解析工作进程影响
+        self.logger.info("基准测试: 命令行启动")
+        report['results']['startup'] = self.bench_startup()
+        
+        self.logger.info(f"基准测试: 解析 {pdf_dir}")
+        parsed = self.bench_parse(pdf_dir, max_pdfs)
+        base_documents = parsed['documents']
+        
+        self.logger.info("基准测试: 向量存储精度与内存")
+        report['results']['vector_store'] = self.bench_vector_store(terms, base_documents)
+        
+        for scale in scales:
+            self.logger.info(f"基准测试: {scale}倍语料")
+            documents = self.scale_corpus(base_documents, scale)
+            scale_result = {}
+            if scale == 1:
+                scale_result['parse'] = parsed['metrics']
+            scale_result.update(self.bench_stages(terms, documents, scale))
+            report['results'][f"x{scale}"] = scale_result
+        
+        # 进程级高水位，只增不减，只在整个运行结束时记录一次
+        report['peak_rss_mb'] = peak_rss_mb()
+        return report
+    
+    def _git_commit(self) -> str:
+        """获取当前提交号，便于对比不同版本的结果"""
+        try:
+            return subprocess.run(
+                ['git', 'rev-parse', '--short', 'HEAD'],
+                capture_output=True, text=True, cwd=PROJECT_ROOT
+            ).stdout.strip()
+        except Exception:
+            return ""
+    
+    def compare(self, current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        与基线结果对比，找出耗时增长超过容差的阶段
+        
+        Args:
+            current: 本次基准测试报告
+            baseline: 基线报告
+        
+        Returns:
+            各阶段对比结果列表
+        """
+        comparison = []
+        for scale_key, stages in current.get('results', {}).items():
+            baseline_stages = baseline.get('results', {}).get(scale_key, {})
+            for stage, metrics in stages.items():
+                if stage not in baseline_stages:
+                    continue
+                before = baseline_stages[stage]['wall_time']
+                after = metrics['wall_time']
+                ratio = after / before if before > 0 else 1.0
+                comparison.append({
+                    'scale': scale_key,
+                    'stage': stage,
+                    'baseline_wall_time': before,
+                    'wall_time': after,
+                    'ratio': round(ratio, 3),
+                    'regression': (ratio > 1 + self.regression_tolerance and
+                                   after - before > self.min_regression_seconds)
+                })
+        return comparison
+
+
+def main():
+    """主函数 - 命令行接口"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='术语识别系统性能基准测试')
+    parser.add_argument('--task', default='data/task.json', help='任务JSON文件路径')
+    parser.add_argument('--data-dir', help='PDF目录（默认使用配置中的data_dir）')
+    parser.add_argument('--scales', type=int, nargs='+', default=[1, 10, 100], help='语料放大倍数')
+    parser.add_argument('--max-pdfs', type=int, help='最多解析的PDF数量')
+    parser.add_argument('--output', default='output/benchmark.json', help='结果输出路径')
+    parser.add_argument('--baseline', help='用于对比的历史基准结果')
+    parser.add_argument('--fail-on-regression', action='store_true', help='发现性能回退时返回非零退出码')
+    parser.add_argument('--config', help='配置文件路径')
+    
+    args = parser.parse_args()
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # 基准测试只关心阶段耗时，屏蔽各模块逐条输出
+    for name in ('scripts.parse_pdfs', 'scripts.extract_terms', 'scripts.associate_terms',
+                 'scripts.validate_output', 'src.nlp_models'):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    
+    config = load_config(args.config)
+    benchmark = PipelineBenchmark(config)
+    
+    with open(args.task, 'r', encoding='utf-8') as f:
+        terms = json.load(f)
+    
+    report = benchmark.run(terms, args.data_dir or config.get('data_dir', 'data/raw'),
+                           args.scales, args.max_pdfs)
+    
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        report['baseline'] = args.baseline
+        report['comparison'] = benchmark.compare(report, baseline)
+        regressions = [item for item in report['comparison'] if item['regression']]
+    
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    save_json_output(report, args.output)
+    
+    for scale_key, stages in report['results'].items():
+        for stage, metrics in stages.items():
+            if 'peak_rss_mb' in metrics:
+                memory = f"峰值内存 {metrics['peak_rss_mb']}MB"
+            else:
+                memory = f"峰值分配 {metrics.get('peak_alloc_mb', 0.0)}MB"
+            print(f"{scale_key:>5} {stage:<18} {metrics['wall_time']:>10.3f}s  {memory}")
+    
+    for item in regressions:
+        print(f"性能回退: {item['scale']} {item['stage']} "
+              f"{item['baseline_wall_time']:.3f}s -> {item['wall_time']:.3f}s (x{item['ratio']})")
+    
+    print(f"基准测试结果已保存到: {args.output}")
+    
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+语义空间构建脚本
+离线解析语料，用规范副本页面的字符n-gram TF-IDF和TruncatedSVD构建LSA语义空间，
+为任务术语和页面预计算量化存储的向量，供关联分析按语义相似度预排序术语对
+
+用法：
+    python scripts/build_semantic_space.py data/task.json [--output data/processed/semantic] [--components 128]
+"""
+
+import sys
+import json
+import logging
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import load_config
+
+
+def main():
+    """主函数 - 命令行接口"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='构建术语语义空间')
+    parser.add_argument('task_json', nargs='+', help='任务JSON文件路径（可多个，术语合并）')
+    parser.add_argument('--output', help='输出目录（默认使用配置 semantic_space.dir）')
+    parser.add_argument('--components', type=int, help='降维后的维数')
+    parser.add_argument('--config', help='配置文件路径')
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    from scripts.parse_pdfs import PDFParser
+    from src.nlp_models import SemanticSpace
+    
+    config = load_config(args.config)
+    semantic_config = config.get('semantic_space', {})
+    output_dir = args.output or semantic_config.get('dir', 'data/processed/semantic')
+    
+    terms = []
+    for task_path in args.task_json:
+        with open(task_path, 'r', encoding='utf-8') as f:
+            terms.extend(json.load(f))
+    
+    pdf_documents = PDFParser(config).parse_all_pdfs()
+    canonical = [(doc, page) for doc in pdf_documents for page in doc['pages']
+                 if not page.get('duplicate_of') and page.get('text')]
+    
+    try:
+        space = SemanticSpace.build(
+            [page['text'] for _, page in canonical],
+            terms,
+            n_components=args.components or semantic_config.get('n_components', 128),
+            max_features=semantic_config.get('max_features', 50000),
+            ngram_range=semantic_config.get('ngram_range', [1, 2]),
+            pages=[(doc['file_stem'], page['page_number']) for doc, page in canonical],
+            dtype=semantic_config.get('dtype', 'float16')
+        )
+    except ValueError as e:
+        print(f"执行错误: {e}")
+        sys.exit(1)
+    
+    space.save(output_dir)
+    print(f"语义空间已保存到: {output_dir}（{len(space.terms)} 个术语，{space.metadata['n_components']} 维，{space.metadata['dtype']}存储，"
+          f"{space.metadata['terms_covered']} 个术语在语料中出现）")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -5,13 +5,22 @@
 从PDF文档中提取标准化术语及其定义
 """
 
+import time
+import heapq
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple, Iterator
 from pathlib import Path
 
 from src.utils import clean_text, format_page_number, standardize_document_name, extract_term_definition
 from src.rules import ExtractionRules
+from src.metrics import metrics
+
+# _calculate_definition_confidence 可达到的最高置信度，达到后无需继续搜索
+MAX_DEFINITION_CONFIDENCE = 1.0
+
+# 标准正文中"术语和定义"章节标题，如 "3 术语和定义"（目次中的条目不带章节号）
+DEFINITION_SECTION_PATTERN = re.compile(r'^\s*(\d+)\s*术语和定义\s*$', re.MULTILINE)
 
 
 class TermExtractor:
@@ -27,6 +36,15 @@ class TermExtractor:
         self.similarity_threshold = self.config.get('term_extraction', {}).get('similarity_threshold', 0.8)
         self.max_definition_length = self.config.get('term_extraction', {}).get('max_definition_length', 500)
         self.min_definition_length = self.config.get('term_extraction', {}).get('min_definition_length', 10)
+        self.early_termination = self.config.get('term_extraction', {}).get('early_termination', True)
+        self.top_k_alternates = self.config.get('term_extraction', {}).get('top_k_alternates', 0)
+        
+        # 候选页面排序用的文档级信号，按文件名缓存
+        self._section_pages: Dict[str, set] = {}
+        self._topic_texts: Dict[str, str] = {}
+        
+        # 持久化结果缓存（src.cache.ResultCache），由调用方按需设置
+        self.result_cache = None
     
     def extract_terms(self, target_terms: List[str], pdf_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
@@ -41,32 +59,104 @@ class TermExtractor:
         """
         self.logger.info(f"开始提取 {len(target_terms)} 个目标术语")
         
-        results = {}
+        resolved = self.resolve_terms(target_terms, pdf_documents)
+        return self.assemble_term_results(target_terms, resolved)
+    
+    def resolve_terms(self, terms: List[str], pdf_documents: List[Dict[str, Any]]) -> Dict[str, Optional[Dict[str, str]]]:
+        """
+        逐个提取去重后的术语，每个术语只在语料中搜索一次
+        
+        Args:
+            terms: 术语列表（可包含重复）
+            pdf_documents: PDF文档列表
+            
+        Returns:
+            术语到提取结果的映射，未找到定义的术语映射为None
+        """
+        resolved = {}
+        cache_params = self.cache_params()
+        
+        for term in terms:
+            if term in resolved:
+                continue
+            
+            if self.result_cache is not None:
+                hit, cached = self.result_cache.get('term', [term], cache_params)
+                if hit:
+                    resolved[term] = cached
+                    continue
+            
+            resolved[term] = self._extract_single_term(term, pdf_documents)
+            
+            if self.result_cache is not None:
+                self.result_cache.put('term', [term], cache_params, resolved[term])
+        
+        return resolved
+    
+    def cache_params(self) -> Dict[str, Any]:
+        """影响术语提取结果的配置阈值，作为结果缓存键的一部分"""
+        return {
+            'similarity_threshold': self.similarity_threshold,
+            'min_definition_length': self.min_definition_length,
+            'max_definition_length': self.max_definition_length,
+            'early_termination': self.early_termination,
+            'top_k_alternates': self.top_k_alternates
+        }
+    
+    def assemble_term_results(self, target_terms: List[str],
+                              resolved: Dict[str, Optional[Dict[str, str]]]) -> Dict[str, Any]:
+        """
+        按任务术语顺序组装W01格式的结果
+        
+        Args:
+            target_terms: 任务术语列表
+            resolved: resolve_terms 返回的术语结果
+            
+        Returns:
+            术语提取结果
+        """
+        results = dict(self.iter_term_records(target_terms, resolved))
+        
+        self.logger.info(f"术语提取完成，成功提取 {len([r for r in results.values() if r['术语定义']])} 个术语")
+        return results
+    
+    def iter_term_records(self, target_terms: List[str], resolved: Dict[str, Optional[Dict[str, str]]],
+                          start: int = 1) -> Iterator[Tuple[str, Dict[str, str]]]:
+        """
+        按任务术语顺序逐条生成W01格式的记录
         
-        for i, term in enumerate(target_terms, 1):
+        Args:
+            target_terms: 任务术语列表（可为完整列表中的一段）
+            resolved: resolve_terms 返回的术语结果
+            start: 第一个术语在完整任务列表中的序号
+            
+        Yields:
+            (术语键, 术语结果)
+        """
+        for i, term in enumerate(target_terms, start):
             term_key = f"W{i:02d}"
-            term_result = self._extract_single_term(term, pdf_documents)
+            term_result = resolved.get(term)
             
             if term_result:
-                results[term_key] = term_result
                 self.logger.info(f"成功提取术语: {term}")
+                yield term_key, dict(term_result)
             else:
                 self.logger.warning(f"未找到术语定义: {term}")
                 # 创建空结果以保持结构
-                results[term_key] = {
+                yield term_key, {
                     "术语名称": term,
                     "术语定义": "",
                     "文档出处": "",
                     "文档页数": ""
                 }
-        
-        self.logger.info(f"术语提取完成，成功提取 {len([r for r in results.values() if r['术语定义']])} 个术语")
-        return results
     
     def _extract_single_term(self, term: str, pdf_documents: List[Dict[str, Any]]) -> Optional[Dict[str, str]]:
         """
         提取单个术语的定义信息
         
+        候选页面按"术语和定义"章节归属、术语出现频次和标准主题匹配度排序后依次评估，
+        一旦某个定义达到最高可能置信度即停止搜索；同时用有界堆保留前k个候选定义。
+        
         Args:
             term: 术语名称
             pdf_documents: PDF文档列表
@@ -74,34 +164,228 @@ class TermExtractor:
         Returns:
             术语信息字典
         """
-        best_result = None
-        best_confidence = 0.0
+        start = time.perf_counter()
+        candidates, pages_scanned = self._rank_candidate_pages(term, pdf_documents)
+        
+        # 小顶堆保留置信度最高的 top_k_alternates+1 个定义，同置信度时排序靠前的页面优先
+        heap = []
+        heap_size = self.top_k_alternates + 1
+        pages_evaluated = 0
+        
+        for rank, (doc, page) in enumerate(candidates):
+            pages_evaluated += 1
+            scored = self.score_page_definition(term, page['text'])
+            if scored is None:
+                continue
+            
+            confidence, definition = scored
+            entry = (confidence, -rank, definition, doc['file_name'], page['page_number'])
+            if len(heap) < heap_size:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+            
+            if self.early_termination and confidence >= MAX_DEFINITION_CONFIDENCE:
+                metrics.incr('extract.early_terminations')
+                break
+        
+        if metrics.enabled:
+            metrics.incr('extract.terms_searched')
+            metrics.incr('extract.pages_scanned', pages_scanned)
+            metrics.incr('extract.pages_matched', len(candidates))
+            metrics.incr('extract.pages_evaluated', pages_evaluated)
+            metrics.observe('extract.term_seconds', time.perf_counter() - start)
+        
+        ranked = [
+            (confidence, definition, standardize_document_name(file_name), format_page_number(f"第{page_number}页"))
+            for confidence, _, definition, file_name, page_number in sorted(heap, reverse=True)
+        ]
+        return self.build_ranked_result(term, ranked)
+    
+    def build_ranked_result(self, term: str, ranked: List[Tuple[float, str, str, str]]) -> Optional[Dict[str, Any]]:
+        """
+        由排好序的候选定义构造术语结果，开启 top_k_alternates 时附带候选定义
+        
+        Args:
+            term: 术语名称
+            ranked: [(置信度, 定义, 文档出处, 文档页数), ...]，按优先级从高到低
+            
+        Returns:
+            术语信息字典，最佳定义未达到相似度阈值时返回None
+        """
+        if not ranked or ranked[0][0] < self.similarity_threshold:
+            return None
+        
+        _, definition, document_name, page_label = ranked[0]
+        best_result = self.build_term_result(term, definition, document_name, page_label)
+        if self.top_k_alternates > 0:
+            best_result["候选定义"] = [{
+                "术语定义": definition,
+                "文档出处": document_name,
+                "文档页数": page_label,
+                "置信度": confidence
+            } for confidence, definition, document_name, page_label in ranked[1:self.top_k_alternates + 1]]
+        return best_result
+    
+    def _rank_candidate_pages(self, term: str,
+                              pdf_documents: List[Dict[str, Any]]) -> Tuple[List[Tuple[Dict[str, Any], Dict[str, Any]]], int]:
+        """
+        找出包含术语的页面并按定义可能性排序
+        
+        排序依据依次为：页面是否属于"术语和定义"章节、标准主题（封面标题）与术语的匹配度、
+        术语在页面中的出现次数；以上相同时保持语料顺序。
+        
+        Args:
+            term: 术语名称
+            pdf_documents: PDF文档列表
+            
+        Returns:
+            (排序后的(文档, 页面)列表, 扫描的页面数)
+        """
+        ranked = []
+        pages_scanned = 0
         
         for doc in pdf_documents:
             for page in doc['pages']:
+                if page.get('duplicate_of'):
+                    continue
                 page_text = page['text']
+                pages_scanned += 1
                 
                 # 检查术语是否出现在页面中
                 if term not in page_text:
                     continue
                 
-                # 尝试提取定义
-                definition = extract_term_definition(page_text, term)
-                
-                if definition:
-                    # 计算置信度
-                    confidence = self._calculate_definition_confidence(definition, term)
-                    
-                    if confidence > best_confidence:
-                        best_confidence = confidence
-                        best_result = {
-                            "术语名称": term,
-                            "术语定义": definition,
-                            "文档出处": standardize_document_name(doc['file_name']),
-                            "文档页数": format_page_number(f"第{page['page_number']}页")
-                        }
-        
-        return best_result if best_confidence >= self.similarity_threshold else None
+                rank_key = self.candidate_rank(term, doc, page['page_number'], page_text.count(term))
+                ranked.append((rank_key + (len(ranked),), doc, page))
+        
+        ranked.sort(key=lambda item: item[0])
+        return [(doc, page) for _, doc, page in ranked], pages_scanned
+    
+    def candidate_rank(self, term: str, doc: Dict[str, Any], page_number: int, occurrences: int) -> Tuple[bool, float, int]:
+        """
+        计算候选页面的排序键（值越小越靠前），逐文档搜索和流式管道共用
+        
+        Args:
+            term: 术语名称
+            doc: 页面所属的完整PDF文档
+            page_number: 页码
+            occurrences: 术语在页面中的出现次数
+            
+        Returns:
+            (不在"术语和定义"章节中, -主题匹配度, -出现次数)，相同时由调用方按语料顺序排列
+        """
+        return (page_number not in self._definition_section_pages(doc),
+                -self._topic_match(term, doc), -occurrences)
+    
+    def select_definitions(self, candidates: List[Tuple[float, Tuple, Any]], partial: bool = False) -> List[Tuple[float, Tuple, Any]]:
+        """
+        按与逐文档搜索相同的规则从已排序键标注的候选定义中选择结果
+        
+        逐文档搜索按排序键依次评估页面，提前终止时只有排在首个最高置信度定义之前（含）的页面参与选择；
+        保留的定义按置信度降序、排序键升序排列。
+        
+        Args:
+            candidates: [(置信度, 排序键, 定义结果), ...]，排序键为 candidate_rank 的结果加语料顺序
+            partial: 候选是否只来自部分语料（分片）。提前终止时部分语料无法确定全局终止位置，
+                     此时只剔除本地终止位置之后的候选而不截断，以免丢失最终应保留的备选定义
+            
+        Returns:
+            选中的候选列表
+        """
+        ordered = sorted(candidates, key=lambda candidate: candidate[1])
+        if self.early_termination:
+            for position, candidate in enumerate(ordered):
+                if candidate[0] >= MAX_DEFINITION_CONFIDENCE:
+                    del ordered[position + 1:]
+                    break
+        
+        ordered.sort(key=lambda candidate: (-candidate[0], candidate[1]))
+        if partial and self.early_termination:
+            return ordered
+        return ordered[:self.top_k_alternates + 1]
+    
+    def _definition_section_pages(self, doc: Dict[str, Any]) -> set:
+        """
+        定位文档中"术语和定义"章节覆盖的页码（按文件名缓存）
+        
+        Args:
+            doc: PDF文档
+            
+        Returns:
+            章节覆盖的页码集合，未找到章节时为空集合
+        """
+        if doc['file_name'] in self._section_pages:
+            return self._section_pages[doc['file_name']]
+        
+        section_pages = set()
+        next_heading = None
+        
+        for page in doc['pages']:
+            page_text = page['text']
+            if next_heading is None:
+                match = DEFINITION_SECTION_PATTERN.search(page_text)
+                if not match:
+                    continue
+                # 章节结束于下一个一级标题
+                next_heading = re.compile(rf'^\s*{int(match.group(1)) + 1}\s*[\u4e00-\u9fff]{{2,}}', re.MULTILINE)
+                section_pages.add(page['page_number'])
+                if next_heading.search(page_text, match.end()):
+                    break
+            else:
+                section_pages.add(page['page_number'])
+                if next_heading.search(page_text):
+                    break
+        
+        self._section_pages[doc['file_name']] = section_pages
+        return section_pages
+    
+    def _topic_match(self, term: str, doc: Dict[str, Any]) -> float:
+        """
+        计算术语与标准主题的匹配度：术语的字符二元组在封面标题区域中出现的比例
+        
+        Args:
+            term: 术语名称
+            doc: PDF文档
+            
+        Returns:
+            匹配度 (0-1)
+        """
+        topic_text = self._topic_texts.get(doc['file_name'])
+        if topic_text is None:
+            cover = doc['pages'][0]['text'] if doc['pages'] else ''
+            topic_text = self._topic_texts[doc['file_name']] = re.sub(r'\s+', '', cover[:300])
+        
+        bigrams = {term[i:i + 2] for i in range(len(term) - 1)} or {term}
+        return sum(1 for bigram in bigrams if bigram in topic_text) / len(bigrams)
+    
+    def score_page_definition(self, term: str, page_text: str) -> Optional[Tuple[float, str]]:
+        """
+        从单个页面提取术语定义并计算置信度，供逐文档搜索和流式管道共用
+        
+        Args:
+            term: 术语名称
+            page_text: 已确认包含术语的页面文本
+            
+        Returns:
+            (置信度, 定义)，页面中没有有效定义时返回None
+        """
+        definition = extract_term_definition(page_text, term)
+        if not definition:
+            return None
+        
+        confidence = self._calculate_definition_confidence(definition, term)
+        return (confidence, definition) if confidence > 0 else None
+    
+    @staticmethod
+    def build_term_result(term: str, definition: str, document_name: str, page_label: str) -> Dict[str, str]:
+        """构造W01格式的单个术语结果"""
+        return {
+            "术语名称": term,
+            "术语定义": definition,
+            "文档出处": document_name,
+            "文档页数": page_label
+        }
     
     def _calculate_definition_confidence(self, definition: str, term: str) -> float:
         """
@@ -147,32 +431,38 @@ class TermExtractor:
             所有提取的术语列表
         """
         all_terms = []
+        candidates = []
         
         for doc in pdf_documents:
             for page in doc['pages']:
+                if page.get('duplicate_of'):
+                    continue
                 page_text = page['text']
                 
                 # 使用规则提取术语定义
-                definitions = self.rules.extract_term_definitions(page_text)
-                
-                for definition_info in definitions:
-                    term = definition_info['term']
-                    definition = definition_info['definition']
-                    
-                    # 过滤非海洋相关术语
-                    if not self.rules.is_ocean_related_term(term):
-                        continue
-                    
-                    # 创建术语记录
-                    term_record = {
-                        "术语名称": term,
-                        "术语定义": definition,
-                        "文档出处": standardize_document_name(doc['file_name']),
-                        "文档页数": format_page_number(f"第{page['page_number']}页"),
-                        "置信度": self._calculate_definition_confidence(definition, term)
-                    }
-                    
-                    all_terms.append(term_record)
+                for definition_info in self.rules.extract_term_definitions(page_text):
+                    candidates.append((doc, page, definition_info))
+        
+        # 批量过滤非海洋相关术语
+        mask = self.rules.filter_ocean_related_terms([info['term'] for _, _, info in candidates])
+        
+        for (doc, page, definition_info), related in zip(candidates, mask):
+            if not related:
+                continue
+            
+            term = definition_info['term']
+            definition = definition_info['definition']
+            
+            # 创建术语记录
+            term_record = {
+                "术语名称": term,
+                "术语定义": definition,
+                "文档出处": standardize_document_name(doc['file_name']),
+                "文档页数": format_page_number(f"第{page['page_number']}页"),
+                "置信度": self._calculate_definition_confidence(definition, term)
+            }
+            
+            all_terms.append(term_record)
         
         # 去重（基于术语名称）
         unique_terms = {}
@@ -6,11 +6,227 @@ PDF文档解析模块
 """
 
 import os
+import time
+import signal
 import logging
-import pdfplumber
+import multiprocessing
+from contextlib import contextmanager
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+from src.utils import save_json_output, corpus_fingerprint
+from src.metrics import metrics
+from src.parse_cache import ParseCache, TableCache
+from src.table_detector import TableDetector
+from src.text_store import CompressedTextStore, CompressedDocument
+
+try:
+    import resource
+except ImportError:  # Windows 没有resource模块，内存预算不生效
+    resource = None
+
+
+class PageTimeoutError(BaseException):
+    """单页解析超出时间预算（继承BaseException，避免被解析库内部的异常处理吞掉）"""
+
+
+class WorkerCancelled(BaseException):
+    """工作进程收到取消请求"""
+
+
+# 父进程在预算之外再等待的秒数：超过后仍无任何事件（预算计时器未能中断解析）才终止工作进程
+WORKER_GRACE = 10.0
+
+# 请求工作进程停止后等待其自行退出的秒数
+WORKER_STOP_TIMEOUT = 2.0
+
+# 工作进程解析页面使用的后端；备用后端重试时跳过已用同一后端失败过的页面
+PRIMARY_BACKEND = 'pdfplumber'
+
+
+def _raise_page_timeout(signum, frame):
+    raise PageTimeoutError()
+
+
+class _EventChannel:
+    """
+    工作进程的事件发送端：每个工作进程独占一个管道，可选的信号量限制未被父进程取走的事件数；
+    记录阻塞在发送上的时间，文档预算只计算实际解析的时间
+    """
+    
+    def __init__(self, connection, credits=None, cancel_event=None):
+        """
+        Args:
+            connection: 管道写端
+            credits: 未取走事件数的信号量，None表示不限
+            cancel_event: 父进程的取消请求
+        """
+        self.connection = connection
+        self.credits = credits
+        self.cancel_event = cancel_event
+        self.start = time.perf_counter()
+        self.blocked = 0.0
+    
+    def cancelled(self) -> bool:
+        """父进程是否已请求停止"""
+        return self.cancel_event is not None and self.cancel_event.is_set()
+    
+    def elapsed(self) -> float:
+        """不含发送阻塞时间的解析耗时"""
+        return time.perf_counter() - self.start - self.blocked
+    
+    def send(self, event: Any) -> None:
+        """发送事件，消费方处理不过来时阻塞，阻塞期间收到取消请求时抛出 WorkerCancelled"""
+        start = time.perf_counter()
+        try:
+            if self.credits is not None:
+                while not self.credits.acquire(timeout=0.2):
+                    if self.cancelled():
+                        raise WorkerCancelled()
+            self.connection.send(event)
+        finally:
+            self.blocked += time.perf_counter() - start
+
+
+@contextmanager
+def _open_pdf(pdf_path: str, backend: str):
+    """
+    用指定后端打开PDF
+    
+    Args:
+        pdf_path: PDF文件路径
+        backend: 解析后端（pdfplumber/pypdf2）
+    
+    Yields:
+        (页面序列, 元数据)
+    """
+    if backend == 'pdfplumber':
+        import pdfplumber
+        with pdfplumber.open(pdf_path) as pdf:
+            yield pdf.pages, pdf.metadata or {}
+    elif backend == 'pypdf2':
+        from PyPDF2 import PdfReader
+        yield PdfReader(pdf_path).pages, {}
+    else:
+        raise ValueError(f"不支持的解析后端: {backend}")
+
+
+def _parse_pdf_worker(pdf_path: str, config: Dict[str, Any], connection,
+                      credits=None, cancel_event=None, task: str = 'parse',
+                      page_numbers: List[int] = None, backend: str = PRIMARY_BACKEND) -> None:
+    """
+    工作进程入口：在时间/内存预算内逐页解析单个PDF，并把结果逐页回传
+    
+    单页预算和文档预算都由工作进程自己计时执行，文档预算不计阻塞在回传上的时间，
+    因此消费方暂停时不会把正常文档判为超时。
+    
+    Args:
+        pdf_path: PDF文件路径
+        config: 系统配置
+        connection: 本工作进程独占的管道写端，事件格式为 (事件类型, 文件路径, 数据)
+        credits: 未取走事件数的信号量，None表示不限
+        cancel_event: 父进程的取消请求
+        task: parse 完整解析；tables 只抽取表格（为已缓存文本的文档补充表格），页面事件只含页码和表格；
+            retry 用 backend 重新提取 page_numbers 中页面的文本，页面事件只含页码和文本
+        page_numbers: 只处理这些页面（从1开始），默认处理全部页面
+        backend: 打开PDF的后端，只抽取表格和完整解析时为 PRIMARY_BACKEND
+    """
+    parser_config = config.get('pdf_parser', {})
+    page_timeout = parser_config.get('page_timeout', 60)
+    document_timeout = parser_config.get('document_timeout', 600)
+    max_memory_mb = parser_config.get('max_memory_mb', 0)
+    
+    # 内存预算作用于整个工作进程，即单个文档
+    if resource is not None and max_memory_mb:
+        limit = int(max_memory_mb) * 1024 * 1024
+        try:
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ValueError, OSError):
+            pass
+    
+    use_alarm = bool(page_timeout or document_timeout) and hasattr(signal, 'setitimer')
+    if use_alarm:
+        signal.signal(signal.SIGALRM, _raise_page_timeout)
+    
+    parser = PDFParser(config)
+    channel = _EventChannel(connection, credits, cancel_event)
+    status = 'ok'
+    try:
+        with _open_pdf(pdf_path, backend) as (pages, metadata):
+            channel.send(('meta', pdf_path, {
+                'page_count': len(pages),
+                'metadata': metadata
+            }))
+            
+            for page_num in page_numbers or range(1, len(pages) + 1):
+                page = pages[page_num - 1]
+                if channel.cancelled():
+                    raise WorkerCancelled()
+                
+                # 本页的时间预算：单页预算和文档剩余预算中较小的一个
+                budget = page_timeout or None
+                if document_timeout:
+                    remaining = document_timeout - channel.elapsed()
+                    if remaining <= 0:
+                        status = 'document_timeout'
+                        break
+                    budget = min(budget, remaining) if budget else remaining
+                
+                start = time.perf_counter()
+                try:
+                    if use_alarm and budget:
+                        signal.setitimer(signal.ITIMER_REAL, budget)
+                    if task == 'tables':
+                        page_info = parser._parse_page_tables(page, page_num)
+                    elif task == 'retry':
+                        page_info = {'page_number': page_num, 'text': (page.extract_text() or '').strip()}
+                    else:
+                        page_info = parser._parse_page(page, page_num)
+                except PageTimeoutError:
+                    if document_timeout and channel.elapsed() >= document_timeout:
+                        status = 'document_timeout'
+                        break
+                    channel.send(('skip', pdf_path, {
+                        'page_number': page_num,
+                        'reason': 'page_timeout',
+                        'elapsed': round(time.perf_counter() - start, 3)
+                    }))
+                    continue
+                except MemoryError:
+                    channel.send(('skip', pdf_path, {
+                        'page_number': page_num,
+                        'reason': 'page_memory',
+                        'elapsed': round(time.perf_counter() - start, 3)
+                    }))
+                    continue
+                finally:
+                    if use_alarm:
+                        signal.setitimer(signal.ITIMER_REAL, 0)
+                    if backend == 'pdfplumber':
+                        page.close()
+                
+                # 图像对象包含不可序列化的数据流，只保留基本字段
+                if page_info.get('images'):
+                    page_info['images'] = [
+                        {k: v for k, v in image.items() if k != 'stream'}
+                        for image in page_info['images']
+                    ]
+                page_info['elapsed'] = round(time.perf_counter() - start, 3)
+                channel.send(('page', pdf_path, page_info))
+    except WorkerCancelled:
+        # 父进程已不再读取，直接退出
+        return
+    except Exception as e:
+        try:
+            channel.send(('error', pdf_path, str(e)))
+        except WorkerCancelled:
+            return
+    
+    try:
+        channel.send(('done', pdf_path, {'status': status, 'elapsed': round(channel.elapsed(), 3)}))
+    except WorkerCancelled:
+        pass
+
 
 class PDFParser:
     """PDF文档解析器"""
@@ -23,6 +239,37 @@ class PDFParser:
         # 获取数据目录
         self.data_dir = self.config.get('data_dir', 'data/raw')
         
+        # 解析预算：工作进程数、单页/单文档时间预算、单文档内存预算
+        parser_config = self.config.get('pdf_parser', {})
+        self.workers = parser_config.get('workers', min(4, os.cpu_count() or 1))
+        self.page_timeout = parser_config.get('page_timeout', 60)
+        self.document_timeout = parser_config.get('document_timeout', 600)
+        self.max_memory_mb = parser_config.get('max_memory_mb', 0)
+        self.fallback_backend = parser_config.get('fallback_backend', 'pypdf2')
+        
+        # 表格抽取只在横竖线足以构成表格的页面上进行
+        self.extract_tables = parser_config.get('extract_tables', False)
+        self.table_detector = TableDetector.from_config(self.config)
+        
+        # 解析报告：记录各文档耗时和被跳过的页面
+        self.parse_report = self._new_parse_report()
+        
+        # 按文件指纹缓存的逐文档解析结果，命中时不加载pdfplumber
+        self.parse_cache = ParseCache.from_config(self.config)
+        self.table_cache = TableCache.from_config(
+            self.config, self.table_detector.settings() if self.table_detector is not None else None
+        )
+        
+        # 页面文本按页压缩存储，读取时按需解压
+        self.text_store = None
+        if self.config.get('text_store', {}).get('enabled', False):
+            self.text_store = CompressedTextStore.from_config(self.config)
+        
+        # 全文索引，按语料指纹缓存（同时持有文档列表的引用）
+        self._search_index = None
+        self._search_index_key = None
+        self._search_index_documents = None
+        
     def parse_pdf(self, pdf_path: str) -> Optional[Dict[str, Any]]:
         """
         解析单个PDF文档
@@ -37,6 +284,8 @@ class PDFParser:
             self.logger.error(f"PDF文件不存在: {pdf_path}")
             return None
         
+        import pdfplumber
+        
         try:
             with pdfplumber.open(pdf_path) as pdf:
                 document_info = {
@@ -53,6 +302,7 @@ class PDFParser:
                 for page_num, page in enumerate(pdf.pages, 1):
                     page_info = self._parse_page(page, page_num)
                     document_info['pages'].append(page_info)
+                    metrics.incr('parse.pages_scanned')
                     
                     # 累积全文
                     document_info['full_text'] += f"\n\n--- 第{page_num}页 ---\n{page_info['text']}"
@@ -88,11 +338,9 @@ class PDFParser:
             text = page.extract_text() or ""
             page_info['text'] = text.strip()
             
-            # 提取表格（如果配置需要）
-            if self.config.get('pdf_parser', {}).get('extract_tables', False):
-                tables = page.extract_tables()
-                if tables:
-                    page_info['tables'] = tables
+            # 提取表格（如果配置需要），先用横竖线检测排除没有表格的页面
+            if self.extract_tables:
+                page_info['tables'] = self._extract_page_tables(page)
             
             # 提取图像信息（如果配置需要）
             if self.config.get('pdf_parser', {}).get('extract_images', False):
@@ -100,12 +348,36 @@ class PDFParser:
                 if images:
                     page_info['images'] = images
                     
+        except (PageTimeoutError, MemoryError):
+            # 超出预算交由调用方记录并跳过
+            raise
         except Exception as e:
             self.logger.warning(f"解析PDF页面 {page_num} 失败: {e}")
             page_info['text'] = ""
         
         return page_info
     
+    def _parse_page_tables(self, page, page_num: int) -> Dict[str, Any]:
+        """
+        只抽取单个页面的表格
+        
+        Args:
+            page: PDF页面对象
+            page_num: 页码
+            
+        Returns:
+            页面表格信息字典，只含页码和表格
+        """
+        page_info = {'page_number': page_num, 'tables': []}
+        try:
+            page_info['tables'] = self._extract_page_tables(page)
+        except (PageTimeoutError, MemoryError):
+            # 超出预算交由调用方记录并跳过
+            raise
+        except Exception as e:
+            self.logger.warning(f"抽取PDF页面 {page_num} 的表格失败: {e}")
+        return page_info
+    
     def parse_all_pdfs(self, pdf_dir: str = None) -> List[Dict[str, Any]]:
         """
         解析目录中的所有PDF文档
@@ -123,80 +395,776 @@ class PDFParser:
             self.logger.error(f"PDF目录不存在: {pdf_dir}")
             return []
         
-        pdf_documents = []
-        pdf_files = list(Path(pdf_dir).glob("*.pdf"))
+        pdf_files = self.list_pdf_files(pdf_dir)
         
         self.logger.info(f"开始解析目录中的PDF文件: {pdf_dir}")
         self.logger.info(f"找到 {len(pdf_files)} 个PDF文件")
         
-        for pdf_file in pdf_files:
-            document = self.parse_pdf(str(pdf_file))
-            if document:
-                pdf_documents.append(document)
+        self.reset_parse_report()
+        pdf_documents = self._parse_with_workers(pdf_files)
+        
+        # 标记近重复页面，抽取和关联分析只扫描规范副本
+        if self.config.get('dedup', {}).get('enabled', False):
+            from src.dedup import CorpusDeduplicator
+            self.parse_report['duplicates'] = CorpusDeduplicator(self.config).deduplicate(pdf_documents)
+        
+        if self.text_store is not None:
+            self.parse_report['text_store'] = self.text_store.stats()
         
         self.logger.info(f"成功解析 {len(pdf_documents)} 个PDF文档")
+        if self.parse_report['skipped_pages']:
+            self.logger.warning(f"共跳过 {len(self.parse_report['skipped_pages'])} 个超出预算的页面，详见解析报告")
+        if self.parse_report['skipped_table_pages']:
+            self.logger.warning(
+                f"共有 {len(self.parse_report['skipped_table_pages'])} 个页面的表格抽取超出预算被跳过，详见解析报告"
+            )
         return pdf_documents
     
-    def search_text_in_pdfs(self, search_term: str, pdf_documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def list_pdf_files(self, pdf_dir: str = None) -> List[str]:
         """
-        在PDF文档中搜索文本
+        按文件名顺序列出目录中的PDF文件
+        
+        Args:
+            pdf_dir: PDF目录路径
+            
+        Returns:
+            PDF文件路径列表
+        """
+        return [str(pdf_file) for pdf_file in sorted(Path(pdf_dir or self.data_dir).glob("*.pdf"))]
+    
+    def reset_parse_report(self) -> None:
+        """开始新一轮解析前清空解析报告，并换用新的文本存储（上一轮的文档仍引用旧存储，不再使用后随之释放）"""
+        self.parse_report = self._new_parse_report()
+        if self.text_store is not None:
+            self.text_store = CompressedTextStore.from_config(self.config)
+    
+    def _new_parse_report(self) -> Dict[str, Any]:
+        """创建空的解析报告"""
+        return {
+            'budgets': {
+                'workers': self.workers,
+                'page_timeout': self.page_timeout,
+                'document_timeout': self.document_timeout,
+                'max_memory_mb': self.max_memory_mb
+            },
+            'documents': {},
+            'skipped_pages': [],
+            'skipped_table_pages': []
+        }
+    
+    def _parse_with_workers(self, pdf_paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        在工作进程中并行解析PDF，并执行单页/单文档预算
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            
+        Returns:
+            按输入顺序排列的PDF文档解析结果列表
+        """
+        finished = {}
+        for event_type, pdf_path, payload in self.iter_parsed_pages(pdf_paths):
+            if event_type == 'document':
+                finished[pdf_path] = payload
+        return [finished[pdf_path] for pdf_path in pdf_paths if finished.get(pdf_path)]
+    
+    def iter_parsed_pages(self, pdf_paths: List[str], max_queue: int = 0):
+        """
+        逐页产出解析结果，供流式管道在解析进行中消费
+        
+        每个文档占用一个工作进程，页面逐页回传，因此文档超时被终止时
+        已解析的页面仍然保留，剩余页面记入解析报告。workers 为0时在当前进程内顺序解析。
+        从解析缓存读取、但需要补充表格的文档同样在工作进程中按预算只抽取表格，
+        表格抽取完成后再产出。
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            max_queue: 工作进程回传队列的容量，0表示不限；消费方处理不过来时工作进程阻塞
+            
+        Yields:
+            ('page', 文件路径, 页面信息)：每个页面（含被跳过页面的占位信息），完成顺序
+            ('document', 文件路径, 文档或None)：文档解析结束，失败时为None
+        """
+        if self.parse_cache is not None:
+            uncached = []
+            missing_tables = {}
+            for pdf_path in pdf_paths:
+                document = self.parse_cache.get(pdf_path)
+                if document is None:
+                    uncached.append(pdf_path)
+                    continue
+                self._record_cached_document(document)
+                if self.extract_tables:
+                    tables = self.table_cache.get(pdf_path) if self.table_cache is not None else None
+                    if tables is None:
+                        missing_tables[pdf_path] = document
+                        continue
+                    self._attach_tables(document, tables)
+                yield from self._iter_cached_document(pdf_path, document)
+            
+            for _, pdf_path, result in self._iter_document_tables(list(missing_tables), max_queue):
+                document = missing_tables.pop(pdf_path)
+                self._record_document_tables(pdf_path, document, result)
+                yield from self._iter_cached_document(pdf_path, document)
+            pdf_paths = uncached
+        
+        for event in self._iter_parsed_uncached(pdf_paths, max_queue):
+            if event[0] == 'document' and event[2] and self.parse_cache is not None:
+                self.parse_cache.put(event[1], event[2])
+                if self.table_cache is not None and not any(page.get('skipped') for page in event[2]['pages']):
+                    self.table_cache.put(event[1], self._document_tables(event[2]))
+            if event[0] == 'document' and event[2]:
+                event = ('document', event[1], self._compress_document(event[2]))
+            yield event
+    
+    def _extract_page_tables(self, page) -> List[Any]:
+        """抽取单页表格，检测器判断没有表格时跳过"""
+        if self.table_detector is not None and not self.table_detector.is_table_page(page):
+            return []
+        metrics.incr('parse.table_pages')
+        return page.extract_tables() or []
+    
+    def _document_tables(self, document: Dict[str, Any]) -> Dict[int, List[Any]]:
+        """文档中有表格的页面，{页码: 表格列表}"""
+        return {page['page_number']: page['tables'] for page in document['pages'] if page.get('tables')}
+    
+    def extract_document_tables(self, pdf_path: str) -> Optional[Dict[int, List[Any]]]:
+        """
+        只抽取文档的表格（不抽取文本），在当前进程内执行，不受解析预算约束
+        
+        Args:
+            pdf_path: PDF文件路径
+            
+        Returns:
+            {页码: 表格列表}，打开失败时返回None
+        """
+        import pdfplumber
+        
+        tables = {}
+        try:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page in enumerate(pdf.pages, 1):
+                    try:
+                        page_tables = self._parse_page_tables(page, page_num)['tables']
+                    finally:
+                        page.close()
+                    if page_tables:
+                        tables[page_num] = page_tables
+        except Exception as e:
+            self.logger.error(f"抽取PDF表格失败 {pdf_path}: {e}")
+            return None
+        return tables
+    
+    def _iter_document_tables(self, pdf_paths: List[str], max_queue: int):
+        """
+        为已缓存文本的文档只抽取表格：与文本解析相同，每个文档占用一个工作进程并执行
+        单页/单文档/内存预算；workers 为0时在当前进程内顺序抽取
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            max_queue: 工作进程回传队列的容量，0表示不限
+        
+        Yields:
+            ('tables', 文件路径, {'tables': {页码: 表格列表}, 'skipped': 被跳过的页码, 'status': 结束状态})
+        """
+        if not pdf_paths:
+            return
+        
+        if not self.workers or self.workers <= 0:
+            for pdf_path in pdf_paths:
+                tables = self.extract_document_tables(pdf_path)
+                yield 'tables', pdf_path, {
+                    'tables': tables or {},
+                    'skipped': [],
+                    'status': 'ok' if tables is not None else 'failed'
+                }
+            return
+        
+        yield from self._iter_parsed_uncached(pdf_paths, max_queue, task='tables')
+    
+    def _record_document_tables(self, pdf_path: str, document: Dict[str, Any], result: Dict[str, Any]) -> None:
+        """
+        把表格抽取结果补充到缓存读取的文档，并记入解析报告；
+        有页面被跳过时不写入表格缓存，下次运行重新抽取
+        
+        Args:
+            pdf_path: PDF文件路径
+            document: 从解析缓存读取的文档
+            result: _iter_document_tables 产出的抽取结果
+        """
+        status = result['status']
+        self.parse_report['documents'][document['file_name']]['tables'] = 'extracted' if status == 'ok' else status
+        if self.table_cache is not None and status == 'ok' and not result['skipped']:
+            self.table_cache.put(pdf_path, result['tables'])
+        self._attach_tables(document, result['tables'])
+    
+    def _attach_tables(self, document: Dict[str, Any], tables: Dict[int, List[Any]]) -> None:
+        """
+        为缓存读取的文档补充表格
+        
+        Args:
+            document: 从解析缓存读取的文档
+            tables: {页码: 表格列表}
+        """
+        for page_info in document['pages']:
+            page_info['tables'] = tables.get(page_info['page_number'], [])
+    
+    def _iter_cached_document(self, pdf_path: str, document: Dict[str, Any]):
+        """逐页产出缓存读取的文档，事件同 iter_parsed_pages"""
+        document = self._compress_document(document)
+        for page_info in document['pages']:
+            yield 'page', pdf_path, page_info
+        yield 'document', pdf_path, document
+    
+    def _compress_document(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        启用压缩文本存储时，把文档的页面文本移入存储，全文改为按需拼接
+        
+        Args:
+            document: 文档解析结果
+            
+        Returns:
+            文档（未启用时原样返回）
+        """
+        if self.text_store is None:
+            return document
+        return CompressedDocument(document, self.text_store)
+    
+    def _record_cached_document(self, document: Dict[str, Any]) -> None:
+        """在解析报告中记录从缓存读取的文档"""
+        self.parse_report['documents'][document['file_name']] = {
+            'status': 'cached',
+            'page_count': document['page_count'],
+            'pages_parsed': len(document['pages']),
+            'elapsed': 0.0
+        }
+    
+    def _iter_parsed_uncached(self, pdf_paths: List[str], max_queue: int, task: str = 'parse',
+                              task_options: Dict[str, Dict[str, Any]] = None):
+        """
+        解析未缓存的文档，产出事件同 iter_parsed_pages；task 为 tables（只抽取表格，产出事件同 _iter_document_tables）
+        或 retry（重新提取跳过页面的文本，产出事件同 _iter_retried_pages）时必须启用工作进程
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            max_queue: 工作进程回传队列的容量，0表示不限
+            task: 工作进程的任务，见 _parse_pdf_worker
+            task_options: {文件路径: 传给工作进程的 page_numbers/backend}
+        """
+        if task == 'parse' and (not self.workers or self.workers <= 0):
+            for pdf_path in pdf_paths:
+                document = self.parse_pdf(pdf_path)
+                for page_info in (document['pages'] if document else []):
+                    yield 'page', pdf_path, page_info
+                yield 'document', pdf_path, document
+            return
+        
+        pending = list(pdf_paths)
+        running = {}
+        partial_docs = {}
+        outbox = []
+        
+        try:
+            yield from self._run_workers(max_queue, pending, running, partial_docs, outbox, task, task_options or {})
+        finally:
+            # 消费方提前结束时请求仍在运行的工作进程停止；每个工作进程独占回传管道，
+            # 未能及时退出的进程可以直接终止，不影响其他进程
+            for job in running.values():
+                job['cancel'].set()
+            for job in running.values():
+                job['process'].join(timeout=WORKER_STOP_TIMEOUT)
+                if job['process'].is_alive():
+                    job['process'].kill()
+                    job['process'].join()
+                job['reader'].close()
+    
+    def _start_worker(self, pdf_path: str, max_queue: int, task: str = 'parse',
+                      options: Dict[str, Any] = None) -> Dict[str, Any]:
+        """
+        为一个文档启动工作进程
+        
+        Args:
+            pdf_path: PDF文件路径
+            max_queue: 未取走事件数上限，0表示不限
+            task: 工作进程的任务，见 _parse_pdf_worker
+            options: 传给工作进程的 page_numbers/backend
+        
+        Returns:
+            工作进程信息：进程、管道读端、事件额度、取消请求、启动时间、任务及其参数
+        """
+        options = options or {}
+        reader, writer = multiprocessing.Pipe(duplex=False)
+        credits = multiprocessing.Semaphore(max_queue) if max_queue else None
+        cancel = multiprocessing.Event()
+        process = multiprocessing.Process(
+            target=_parse_pdf_worker,
+            args=(pdf_path, self.config, writer, credits, cancel, task),
+            kwargs=options,
+            daemon=True
+        )
+        process.start()
+        # 只保留子进程中的写端，子进程退出后读端能读到EOF
+        writer.close()
+        now = time.perf_counter()
+        return {'process': process, 'reader': reader, 'credits': credits, 'cancel': cancel,
+                'start': now, 'last_event': now, 'closed': False, 'task': task, 'options': options}
+    
+    def _hang_timeout(self) -> Optional[float]:
+        """工作进程无任何事件超过该秒数时视为卡死（预算计时器未能中断解析），未设置预算时为None"""
+        budgets = [budget for budget in (self.page_timeout, self.document_timeout) if budget]
+        return min(budgets) + WORKER_GRACE if budgets else None
+    
+    def _run_workers(self, max_queue: int, pending: List[str], running: Dict[str, Any],
+                     partial_docs: Dict[str, Any], outbox: List[Any], task: str = 'parse',
+                     task_options: Dict[str, Dict[str, Any]] = None):
+        """调度工作进程并逐个产出outbox中的事件，task/task_options 见 _iter_parsed_uncached"""
+        from multiprocessing.connection import wait
+        
+        hang_timeout = self._hang_timeout()
+        while pending or running:
+            # 启动工作进程直到达到并发上限
+            while pending and len(running) < self.workers:
+                pdf_path = pending.pop(0)
+                running[pdf_path] = self._start_worker(pdf_path, max_queue, task, (task_options or {}).get(pdf_path))
+                partial_docs[pdf_path] = self._new_document(pdf_path)
+            
+            readers = {job['reader']: pdf_path for pdf_path, job in running.items() if not job['closed']}
+            for reader in wait(list(readers), timeout=0.5):
+                self._drain_worker_events(readers[reader], partial_docs, running, outbox)
+            
+            # 检查卡死和异常退出的工作进程；先处理完已到达的事件，消费方暂停期间的等待不算卡死
+            now = time.perf_counter()
+            for pdf_path, job in list(running.items()):
+                if hang_timeout and now - job['last_event'] > hang_timeout:
+                    job['process'].kill()
+                    job['process'].join()
+                    self._finish_document(pdf_path, 'document_timeout', partial_docs, running, outbox)
+                elif job['closed'] or not job['process'].is_alive():
+                    self._drain_worker_events(pdf_path, partial_docs, running, outbox)
+                    if pdf_path in running:
+                        self._finish_document(pdf_path, 'worker_crashed', partial_docs, running, outbox)
+            
+            while outbox:
+                yield outbox.pop(0)
+    
+    def _drain_worker_events(self, pdf_path: str, partial_docs: Dict[str, Any],
+                             running: Dict[str, Any], outbox: List[Any]) -> None:
+        """处理一个工作进程管道中已到达的事件"""
+        while pdf_path in running:
+            job = running[pdf_path]
+            if job['closed']:
+                return
+            try:
+                if not job['reader'].poll():
+                    return
+                event_type, event_path, payload = job['reader'].recv()
+            except (EOFError, OSError):
+                # 工作进程已退出（或在写入途中被终止），管道中不会再有完整事件
+                job['closed'] = True
+                return
+            if job['credits'] is not None:
+                job['credits'].release()
+            job['last_event'] = time.perf_counter()
+            self._handle_worker_event(event_type, event_path, payload, partial_docs, running, outbox)
+    
+    def _handle_worker_event(self, event_type: str, pdf_path: str, payload: Any,
+                             partial_docs: Dict[str, Any], running: Dict[str, Any],
+                             outbox: List[Any]) -> None:
+        """处理单个工作进程事件，产生的页面/文档事件放入outbox"""
+        if pdf_path not in running:
+            # 已被终止的文档可能仍有残留事件
+            return
+        
+        document = partial_docs[pdf_path]
+        task = running[pdf_path]['task']
+        if event_type == 'meta':
+            document['page_count'] = payload['page_count']
+            document['metadata'] = payload['metadata']
+        elif event_type == 'page' and task != 'parse':
+            document['pages'].append(payload)
+        elif event_type == 'skip' and task == 'retry':
+            # 重试的页面已在 skipped_pages 中，结果由 retry_skipped_pages 更新
+            document['pages'].append({'page_number': payload['page_number'], 'skipped': payload['reason']})
+        elif event_type == 'skip' and task == 'tables':
+            metrics.incr('parse.table_pages_skipped')
+            document['pages'].append({'page_number': payload['page_number'], 'tables': [],
+                                      'skipped': payload['reason']})
+            self._record_skipped_page(document, payload['page_number'], payload['reason'],
+                                      payload['elapsed'], 'skipped_table_pages')
+        elif event_type == 'page':
+            document['pages'].append(payload)
+            outbox.append(('page', pdf_path, payload))
+            metrics.incr('parse.pages_scanned')
+            metrics.observe('parse.page_seconds', payload['elapsed'])
+        elif event_type == 'skip':
+            metrics.incr('parse.pages_skipped')
+            page_info = self._skipped_page(payload['page_number'], payload['reason'])
+            document['pages'].append(page_info)
+            outbox.append(('page', pdf_path, page_info))
+            self._record_skipped_page(document, payload['page_number'], payload['reason'], payload['elapsed'])
+        elif event_type == 'error':
+            self.logger.error(f"解析PDF失败 {pdf_path}: {payload}")
+            document['error'] = payload
+        elif event_type == 'done':
+            self._finish_document(pdf_path, payload['status'], partial_docs, running, outbox, payload['elapsed'])
+    
+    def _finish_document(self, pdf_path: str, status: str, partial_docs: Dict[str, Any],
+                         running: Dict[str, Any], outbox: List[Any], elapsed: float = None) -> None:
+        """
+        结束一个文档的解析，补齐未解析页面并生成全文
+        
+        Args:
+            pdf_path: PDF文件路径
+            status: 结束状态（ok/document_timeout/worker_crashed）
+            partial_docs: 解析中的文档
+            running: 运行中的工作进程
+            outbox: 待产出的事件
+            elapsed: 工作进程报告的解析耗时（不含回传阻塞时间），默认为启动以来的时间
+        """
+        if running[pdf_path]['task'] == 'tables':
+            self._finish_tables(pdf_path, status, partial_docs, running, outbox)
+            return
+        if running[pdf_path]['task'] == 'retry':
+            self._finish_retry(pdf_path, status, partial_docs, running, outbox)
+            return
+        
+        job = running.pop(pdf_path)
+        job['process'].join(timeout=1)
+        job['reader'].close()
+        document = partial_docs.pop(pdf_path)
+        
+        if 'error' in document and not document['pages']:
+            status = 'failed'
+        elif status != 'ok':
+            # 文档被终止时，剩余页面记为跳过
+            parsed = {page['page_number'] for page in document['pages']}
+            for page_num in range(1, document['page_count'] + 1):
+                if page_num not in parsed:
+                    page_info = self._skipped_page(page_num, status)
+                    document['pages'].append(page_info)
+                    outbox.append(('page', pdf_path, page_info))
+                    self._record_skipped_page(document, page_num, status, 0.0)
+        
+        document['pages'].sort(key=lambda page: page['page_number'])
+        document.pop('error', None)
+        self._rebuild_full_text(document)
+        
+        if elapsed is None:
+            elapsed = round(time.perf_counter() - job['start'], 3)
+        metrics.observe('parse.document_seconds', elapsed)
+        self.parse_report['documents'][document['file_name']] = {
+            'status': status,
+            'page_count': document['page_count'],
+            'pages_parsed': sum(1 for page in document['pages'] if not page.get('skipped')),
+            'elapsed': elapsed
+        }
+        
+        if status == 'failed':
+            outbox.append(('document', pdf_path, None))
+            return
+        
+        if status != 'ok':
+            self.logger.warning(f"PDF解析未完成 {pdf_path}: {status}，耗时{elapsed}秒")
+        else:
+            self.logger.info(f"成功解析PDF: {pdf_path}, 共{document['page_count']}页")
+        outbox.append(('document', pdf_path, document))
+    
+    def _finish_tables(self, pdf_path: str, status: str, partial_docs: Dict[str, Any],
+                       running: Dict[str, Any], outbox: List[Any]) -> None:
+        """
+        结束一个文档的表格抽取，未抽取的页面记入解析报告的 skipped_table_pages
+        
+        Args:
+            pdf_path: PDF文件路径
+            status: 结束状态（ok/document_timeout/worker_crashed）
+            partial_docs: 抽取中的文档，pages 中只有页码和表格
+            running: 运行中的工作进程
+            outbox: 待产出的事件
+        """
+        job = running.pop(pdf_path)
+        job['process'].join(timeout=1)
+        job['reader'].close()
+        document = partial_docs.pop(pdf_path)
+        
+        if 'error' in document and not document['pages']:
+            status = 'failed'
+        elif status != 'ok':
+            done = {page['page_number'] for page in document['pages']}
+            for page_num in range(1, document['page_count'] + 1):
+                if page_num not in done:
+                    document['pages'].append({'page_number': page_num, 'tables': [], 'skipped': status})
+                    self._record_skipped_page(document, page_num, status, 0.0, 'skipped_table_pages')
+        
+        if status != 'ok':
+            self.logger.warning(f"PDF表格抽取未完成 {pdf_path}: {status}")
+        outbox.append(('tables', pdf_path, {
+            'tables': self._document_tables(document),
+            'skipped': sorted(page['page_number'] for page in document['pages'] if page.get('skipped')),
+            'status': status
+        }))
+    
+    def _finish_retry(self, pdf_path: str, status: str, partial_docs: Dict[str, Any],
+                      running: Dict[str, Any], outbox: List[Any]) -> None:
+        """
+        结束一个文档的备用后端重试，未重新提取的页面记为仍被跳过
+        
+        Args:
+            pdf_path: PDF文件路径
+            status: 结束状态（ok/document_timeout/worker_crashed）
+            partial_docs: 重试中的文档，pages 中只有页码和文本（或跳过原因）
+            running: 运行中的工作进程
+            outbox: 待产出的事件
+        """
+        job = running.pop(pdf_path)
+        job['process'].join(timeout=1)
+        job['reader'].close()
+        document = partial_docs.pop(pdf_path)
+        
+        if 'error' in document:
+            status = 'failed'
+        done = {page['page_number'] for page in document['pages']}
+        for page_num in job['options'].get('page_numbers', []):
+            if page_num not in done:
+                document['pages'].append({'page_number': page_num, 'skipped': status})
+        
+        outbox.append(('retried', pdf_path, {
+            'texts': {page['page_number']: page['text'] for page in document['pages'] if not page.get('skipped')},
+            'skipped': {page['page_number']: page['skipped'] for page in document['pages'] if page.get('skipped')},
+            'status': status
+        }))
+    
+    def _new_document(self, pdf_path: str) -> Dict[str, Any]:
+        """创建空的文档结构"""
+        return {
+            'file_path': pdf_path,
+            'file_name': Path(pdf_path).name,
+            'file_stem': Path(pdf_path).stem,
+            'page_count': 0,
+            'pages': [],
+            'full_text': '',
+            'metadata': {}
+        }
+    
+    def _skipped_page(self, page_num: int, reason: str) -> Dict[str, Any]:
+        """生成被跳过页面的占位信息"""
+        return {
+            'page_number': page_num,
+            'text': '',
+            'tables': [],
+            'images': [],
+            'bbox': None,
+            'skipped': reason,
+            'failed_backends': [PRIMARY_BACKEND]
+        }
+    
+    def _record_skipped_page(self, document: Dict[str, Any], page_num: int,
+                             reason: str, elapsed: float, report_key: str = 'skipped_pages') -> None:
+        """在解析报告中记录被跳过的页面，只抽取表格时记入 skipped_table_pages"""
+        self.parse_report[report_key].append({
+            'file_path': document['file_path'],
+            'file_name': document['file_name'],
+            'page_number': page_num,
+            'reason': reason,
+            'elapsed': elapsed
+        })
+    
+    def _rebuild_full_text(self, document: Dict[str, Any]) -> None:
+        """根据页面重新生成全文"""
+        document['full_text'] = ''.join(
+            f"\n\n--- 第{page['page_number']}页 ---\n{page['text']}" for page in document['pages']
+        )
+    
+    def retry_skipped_pages(self, pdf_documents: List[Dict[str, Any]],
+                            backend: str = None) -> Dict[str, Any]:
+        """
+        使用备用后端重新解析被跳过的页面
+        
+        重试与首次解析一样在工作进程中执行单页/单文档/内存预算（workers 为0时在当前进程内顺序提取），
+        已用同一后端失败过的页面不再重试。
         
         Args:
-            search_term: 搜索词
             pdf_documents: PDF文档列表
+            backend: 解析后端（pypdf2/pdfplumber），默认使用配置中的fallback_backend
             
         Returns:
-            搜索结果列表
+            更新后的解析报告
         """
-        results = []
+        backend = backend or self.fallback_backend
         
+        retries = {}
         for doc in pdf_documents:
+            page_numbers = [page['page_number'] for page in doc['pages']
+                            if page.get('skipped') and backend not in page.get('failed_backends', ())]
+            if page_numbers:
+                retries[doc['file_path']] = (doc, page_numbers)
+        if not retries:
+            self.logger.info(f"没有可用 {backend} 重试的跳过页面")
+            return self.parse_report
+        
+        entries = {(entry['file_path'], entry['page_number']): entry for entry in self.parse_report['skipped_pages']}
+        page_numbers = {pdf_path: numbers for pdf_path, (_, numbers) in retries.items()}
+        for _, pdf_path, result in self._iter_retried_pages(page_numbers, backend):
+            doc = retries[pdf_path][0]
             for page in doc['pages']:
-                if search_term in page['text']:
-                    result = {
-                        'document': doc['file_stem'],
-                        'page_number': page['page_number'],
-                        'text_snippet': self._extract_context(page['text'], search_term),
-                        'full_text': page['text']
-                    }
-                    results.append(result)
+                page_num = page['page_number']
+                entry = entries.get((pdf_path, page_num), {})
+                if page_num in result['texts']:
+                    page['text'] = result['texts'][page_num]
+                    page['recovered_by'] = backend
+                    page.pop('skipped')
+                    page.pop('failed_backends', None)
+                    entry.update(retried_with=backend, recovered=True)
+                elif page_num in result['skipped']:
+                    page.setdefault('failed_backends', []).append(backend)
+                    entry.update(retried_with=backend, recovered=False, retry_reason=result['skipped'][page_num])
+            
+            self._rebuild_full_text(doc)
+            self.logger.info(f"使用 {backend} 重新解析 {doc['file_name']} 的 {len(page_numbers[pdf_path])} 个跳过页面，"
+                             f"恢复 {len(result['texts'])} 个")
         
-        return results
+        return self.parse_report
     
-    def _extract_context(self, text: str, search_term: str, context_length: int = 200) -> str:
+    def _iter_retried_pages(self, page_numbers: Dict[str, List[int]], backend: str):
         """
-        提取搜索词周围的上下文
+        用备用后端重新提取页面文本，每个文档占用一个工作进程并执行解析预算
         
         Args:
-            text: 文本
-            search_term: 搜索词
-            context_length: 上下文长度
+            page_numbers: {文件路径: 要重新提取的页码}
+            backend: 解析后端
+        
+        Yields:
+            ('retried', 文件路径, {'texts': {页码: 文本}, 'skipped': {页码: 原因}, 'status': 结束状态})
+        """
+        if not self.workers or self.workers <= 0:
+            for pdf_path, numbers in page_numbers.items():
+                try:
+                    texts = {page_num: text.strip() for page_num, text in
+                             self._extract_with_backend(pdf_path, numbers, backend).items()}
+                    status = 'ok'
+                except Exception as e:
+                    self.logger.error(f"备用后端 {backend} 解析失败 {pdf_path}: {e}")
+                    texts, status = {}, 'failed'
+                yield 'retried', pdf_path, {
+                    'texts': texts,
+                    'skipped': {page_num: status for page_num in numbers if page_num not in texts},
+                    'status': status
+                }
+            return
+        
+        options = {pdf_path: {'page_numbers': numbers, 'backend': backend} for pdf_path, numbers in page_numbers.items()}
+        yield from self._iter_parsed_uncached(list(page_numbers), 0, task='retry', task_options=options)
+    
+    def _extract_with_backend(self, pdf_path: str, page_numbers: List[int], backend: str) -> Dict[int, str]:
+        """
+        在当前进程内使用指定后端提取指定页面的文本（不受解析预算约束）
+        
+        Args:
+            pdf_path: PDF文件路径
+            page_numbers: 页码列表（从1开始）
+            backend: 解析后端
+            
+        Returns:
+            页码到文本的映射
+        """
+        texts = {}
+        with _open_pdf(pdf_path, backend) as (pages, _):
+            for page_num in page_numbers:
+                page = pages[page_num - 1]
+                texts[page_num] = page.extract_text() or ""
+                if backend == 'pdfplumber':
+                    page.close()
+        return texts
+    
+    def save_parse_report(self, output_path: str) -> bool:
+        """
+        保存解析报告
+        
+        Args:
+            output_path: 输出路径
+            
+        Returns:
+            是否保存成功
+        """
+        return save_json_output(self.parse_report, output_path)
+    
+    def get_search_index(self, pdf_documents: List[Dict[str, Any]]) -> 'SearchIndex':
+        """
+        获取文档列表的全文索引，语料指纹不变时只建一次
+        
+        Args:
+            pdf_documents: PDF文档列表
             
         Returns:
-            上下文片段
+            全文索引
+        """
+        from src.search_index import SearchIndex
+        
+        key = corpus_fingerprint(pdf_documents)
+        if self._search_index is None or self._search_index_key != key:
+            search_config = self.config.get('search', {})
+            self._search_index = SearchIndex.from_documents(
+                pdf_documents,
+                k1=search_config.get('bm25_k1', 1.2),
+                b=search_config.get('bm25_b', 0.75),
+                snippet_length=search_config.get('snippet_length', 200)
+            )
+            self._search_index_key = key
+            self._search_index_documents = pdf_documents
+        return self._search_index
+    
+    def search(self, query: str, pdf_documents: List[Dict[str, Any]], **options) -> Dict[str, Any]:
         """
-        if search_term not in text:
-            return ""
+        在PDF文档中检索，支持短语、AND/OR、文档前缀/页码过滤、BM25排序和分页
         
-        index = text.find(search_term)
-        if index == -1:
-            return ""
+        Args:
+            query: 查询字符串，如 '风暴潮 OR 海啸 "警戒 潮位"'
+            pdf_documents: PDF文档列表
+            **options: 传给 SearchIndex.search 的过滤和分页参数（doc_prefixes, documents, page_range, page, page_size, sort）
+            
+        Returns:
+            分页检索结果
+        """
+        return self.get_search_index(pdf_documents).search(query, **options)
+    
+    def search_text_in_pdfs(self, search_term: str, pdf_documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        在PDF文档中搜索文本（整个搜索词作为一个短语，按文档和页码顺序返回全部命中）
         
-        start = max(0, index - context_length // 2)
-        end = min(len(text), index + len(search_term) + context_length // 2)
+        索引只保存近重复页面的规范副本，命中页面的副本中同样包含搜索词时也作为命中返回（摘要取自规范副本）。
         
-        context = text[start:end]
+        Args:
+            search_term: 搜索词
+            pdf_documents: PDF文档列表
+            
+        Returns:
+            搜索结果列表
+        """
+        quoted = '"' + search_term.replace('"', '') + '"'
+        response = self.search(quoted, pdf_documents, page_size=None, sort='document')
         
-        # 确保上下文以完整句子开始和结束（如果可能）
-        if start > 0:
-            # 查找前一个句子结束位置
-            sentence_end = max(text.rfind('。', 0, start), 
-                             text.rfind('！', 0, start), 
-                             text.rfind('？', 0, start))
-            if sentence_end != -1:
-                context = text[sentence_end + 1:end]
+        # 各页面的语料顺序，副本按 (文档名, 页码) 查找
+        pages = {}
+        for doc in pdf_documents:
+            document = doc.get('file_stem', doc['file_name'].rsplit('.', 1)[0])
+            for page in doc['pages']:
+                pages[(document, page['page_number'])] = (len(pages), page)
         
-        return context.strip()
+        results = []
+        for hit in response['results']:
+            results.append((pages.get((hit['document'], hit['page_number']), (-1, None))[0], hit, hit))
+            for source in hit['duplicates']:
+                order, page = pages.get((source['document'], source['page_number']), (-1, None))
+                if page is not None and search_term in (page.get('text') or ''):
+                    results.append((order, source, hit))
+        results.sort(key=lambda item: item[0])
+        return [
+            {
+                'document': source['document'],
+                'page_number': source['page_number'],
+                'text_snippet': hit['snippet']
+            }
+            for _, source, hit in results
+        ]
     
     def get_document_statistics(self, pdf_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
         """
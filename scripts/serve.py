@@ -0,0 +1,413 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+术语查询服务模块
+基于asyncio的JSON行协议服务：结果缓存命中和全文检索等廉价查询直接在事件循环中完成，
+定义抽取和问答、术语对关联评分分别在两个有界进程池中执行；同一术语或术语对的并发请求合并为一次计算，
+每个请求可设置截止时间，慢的术语对分析不会阻塞术语查询
+
+用法：
+    python scripts/serve.py [--host 127.0.0.1] [--port 8765] [--workers 2] [--config config.json]
+
+请求（每行一个JSON）：
+    {"id": 1, "op": "term", "term": "风暴潮", "deadline": 2.0}
+    {"id": 2, "op": "pair", "terms": ["风暴潮", "海岸侵蚀"]}
+    {"id": 3, "op": "search", "query": "风暴潮 预警", "page_size": 5}
+    {"id": 4, "op": "qa", "question": "什么是风暴潮"}
+    {"id": 5, "op": "stats"}
+响应：
+    {"id": 1, "ok": true, "result": ...} 或 {"id": 1, "ok": false, "error": "deadline_exceeded"}
+    同一进程池中进行中的计算数达到 server.max_pending 时，新的计算请求立即返回 "overloaded"
+"""
+
+import sys
+import json
+import asyncio
+import logging
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.utils import load_config, standardize_document_name
+from src.cache import ResultCache
+
+# 传给 PDFParser.search 的检索参数
+SEARCH_OPTIONS = ('doc_prefixes', 'documents', 'page_range', 'page', 'page_size', 'sort')
+
+
+class ServerOverloaded(Exception):
+    """同一进程池中进行中的计算数已达 server.max_pending，新的计算请求被拒绝"""
+
+
+# 工作进程内的语料和分析组件，由 _init_worker 创建
+_WORKER_STATE: Dict[str, Any] = {}
+
+
+def _init_worker(config: Dict[str, Any], pdf_documents: List[Dict[str, Any]]) -> None:
+    """
+    工作进程初始化：使用服务启动时解析的语料创建抽取器、关联分析器和问答系统
+    
+    Args:
+        config: 系统配置
+        pdf_documents: 服务启动时解析的文档（以fork启动工作进程时直接继承，不重新解析或序列化）
+    """
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    from src.nlp_models import NLPModels, QASystem
+    
+    _WORKER_STATE.update({
+        'documents': pdf_documents,
+        'extractor': TermExtractor(config),
+        'associator': TermAssociator(config),
+        'qa': QASystem(NLPModels(config)),
+        'qa_pages': [
+            {'text': page['text'],
+             'source': f"{standardize_document_name(doc['file_name'])} 第{page['page_number']}页"}
+            for doc in pdf_documents for page in doc['pages']
+            if not page.get('duplicate_of') and page.get('text')
+        ]
+    })
+
+
+def _worker_term(term: str) -> Optional[Dict[str, Any]]:
+    """在工作进程中提取术语定义"""
+    return _WORKER_STATE['extractor'].resolve_terms([term], _WORKER_STATE['documents'])[term]
+
+
+def _worker_pair(term1: str, term2: str) -> Optional[Dict[str, Any]]:
+    """在工作进程中分析术语对关联"""
+    associator = _WORKER_STATE['associator']
+    resolved = associator.resolve_pairs([(term1, term2)], _WORKER_STATE['documents'])
+    return resolved[associator.pair_key(term1, term2)]
+
+
+def _worker_qa(question: str) -> Dict[str, Any]:
+    """在工作进程中回答问题"""
+    return _WORKER_STATE['qa'].find_answer(question, _WORKER_STATE['qa_pages'])
+
+
+class TerminologyServer:
+    """术语查询服务"""
+    
+    def __init__(self, config: Dict[str, Any] = None, pdf_documents: List[Dict[str, Any]] = None,
+                 executor: Executor = None, pair_executor: Executor = None):
+        """
+        初始化服务
+        
+        Args:
+            config: 系统配置
+            pdf_documents: 已解析的文档，默认在 start 时解析
+            executor: 执行定义抽取和问答的执行器（需已用 _init_worker 初始化），默认在 start 时创建进程池
+            pair_executor: 执行术语对关联评分的执行器，默认在 start 时创建进程池（传入 executor 时与其共用）
+        """
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+        
+        server_config = self.config.get('server', {})
+        self.workers = server_config.get('workers', 2)
+        self.pair_workers = server_config.get('pair_workers', 1)
+        self.max_pending = server_config.get('max_pending', 64)
+        self.default_deadline = server_config.get('default_deadline', 30)
+        self.memory_results = server_config.get('memory_results', 10000)
+        
+        self.pdf_documents = pdf_documents
+        self.executor = executor
+        self.pair_executor = pair_executor if pair_executor is not None else executor
+        self._owns_executor = executor is None
+        self._owns_pair_executor = self.pair_executor is None
+        
+        from scripts.parse_pdfs import PDFParser
+        from scripts.extract_terms import TermExtractor
+        from scripts.associate_terms import TermAssociator
+        self.pdf_parser = PDFParser(self.config)
+        self.term_extractor = TermExtractor(self.config)
+        self.term_associator = TermAssociator(self.config)
+        self.result_cache = ResultCache.from_config(self.config)
+        
+        # 最近完成的结果和进行中的计算，键为 (类型, 主题)
+        self._results: 'OrderedDict[Tuple[str, Tuple[str, ...]], Any]' = OrderedDict()
+        self._inflight: Dict[Tuple[str, Tuple[str, ...]], asyncio.Future] = {}
+        
+        self.stats = {'requests': 0, 'inline': 0, 'offloaded': 0, 'coalesced': 0,
+                      'deadline_exceeded': 0, 'overloaded': 0, 'errors': 0}
+    
+    def start(self) -> None:
+        """解析语料、建立全文索引并启动进程池（语料只解析一次，工作进程直接使用）"""
+        if self.pdf_documents is None:
+            self.pdf_documents = self.pdf_parser.parse_all_pdfs()
+            if self.result_cache is not None:
+                self.result_cache.record_parse_report(self.pdf_parser.parse_report)
+        # 全文索引在启动时建好，检索请求只读索引
+        self.pdf_parser.get_search_index(self.pdf_documents)
+        
+        # 术语对评分单独使用一个进程池，慢的术语对不占用定义抽取和问答的工作进程
+        if self.executor is None:
+            self.executor = self._create_pool(self.workers)
+        if self.pair_executor is None:
+            self.pair_executor = self._create_pool(self.pair_workers)
+        self.logger.info(f"术语查询服务就绪: {len(self.pdf_documents)} 个文档，"
+                         f"{self.workers} + {self.pair_workers} 个工作进程")
+    
+    def _create_pool(self, workers: int) -> ProcessPoolExecutor:
+        """
+        创建使用已解析语料初始化的进程池；支持fork时工作进程继承语料，不重新序列化
+        
+        Args:
+            workers: 工作进程数
+        
+        Returns:
+            进程池
+        """
+        context = None
+        if 'fork' in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context('fork')
+        return ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                                   initargs=(self.config, self.pdf_documents))
+    
+    def close(self) -> None:
+        """关闭进程池和结果缓存"""
+        if self.pair_executor is not None and self._owns_pair_executor:
+            self.pair_executor.shutdown(wait=False, cancel_futures=True)
+            self.pair_executor = None
+        if self.executor is not None and self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+        if self.result_cache is not None:
+            self.result_cache.close()
+            self.result_cache = None
+    
+    async def handle(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        处理一个请求
+        
+        Args:
+            request: 请求对象
+        
+        Returns:
+            响应对象
+        """
+        self.stats['requests'] += 1
+        request_id = request.get('id')
+        deadline = request.get('deadline', self.default_deadline)
+        op = request.get('op')
+        
+        try:
+            if op == 'term':
+                result = await self.lookup_term(request['term'], deadline)
+            elif op == 'pair':
+                term1, term2 = request['terms']
+                result = await self.lookup_pair(term1, term2, deadline)
+            elif op == 'search':
+                self.stats['inline'] += 1
+                options = {name: request[name] for name in SEARCH_OPTIONS if name in request}
+                result = self.pdf_parser.search(request['query'], self.pdf_documents, **options)
+            elif op == 'qa':
+                result = await self._resolve('qa', [request['question']], None, _worker_qa,
+                                             (request['question'],), deadline)
+            elif op == 'stats':
+                result = dict(self.stats, inflight=len(self._inflight))
+            else:
+                return {'id': request_id, 'ok': False, 'error': f"unknown_op: {op}"}
+        except asyncio.TimeoutError:
+            self.stats['deadline_exceeded'] += 1
+            return {'id': request_id, 'ok': False, 'error': 'deadline_exceeded'}
+        except ServerOverloaded:
+            self.stats['overloaded'] += 1
+            return {'id': request_id, 'ok': False, 'error': 'overloaded'}
+        except (KeyError, TypeError, ValueError) as e:
+            self.stats['errors'] += 1
+            return {'id': request_id, 'ok': False, 'error': f"bad_request: {e}"}
+        except Exception as e:
+            self.stats['errors'] += 1
+            self.logger.error(f"请求处理失败 {request}: {e}")
+            return {'id': request_id, 'ok': False, 'error': str(e)}
+        
+        return {'id': request_id, 'ok': True, 'result': result}
+    
+    async def lookup_term(self, term: str, deadline: float = None) -> Optional[Dict[str, Any]]:
+        """
+        查询术语定义
+        
+        Args:
+            term: 术语
+            deadline: 截止时间（秒），None表示不限
+        
+        Returns:
+            术语结果，未找到定义时为None
+        """
+        return await self._resolve('term', [term], self.term_extractor.cache_params(),
+                                   _worker_term, (term,), deadline)
+    
+    async def lookup_pair(self, term1: str, term2: str, deadline: float = None) -> Optional[Dict[str, Any]]:
+        """
+        查询术语对关联
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+            deadline: 截止时间（秒），None表示不限
+        
+        Returns:
+            关联结果，没有关联时为None
+        """
+        key = self.term_associator.pair_key(term1, term2)
+        return await self._resolve('pair', list(key), self.term_associator.cache_params(),
+                                   _worker_pair, key, deadline)
+    
+    async def _resolve(self, kind: str, subject: List[str], cache_params: Optional[Dict[str, Any]],
+                       func, args: tuple, deadline: Optional[float]) -> Any:
+        """
+        先查内存结果和结果缓存，未命中时在进程池中计算；相同的进行中计算只执行一次，
+        同一进程池中进行中的计算数达到 max_pending 时拒绝新的计算（合并到已有计算的请求不受影响）
+        
+        Args:
+            kind: 结果类型
+            subject: 术语或术语对
+            cache_params: 结果缓存参数，None表示不使用结果缓存
+            func: 工作进程中执行的函数
+            args: 函数参数
+            deadline: 截止时间（秒）
+        
+        Returns:
+            结果
+        
+        Raises:
+            ServerOverloaded: 同一进程池中进行中的计算数已达上限
+        """
+        key = (kind, tuple(subject))
+        if key in self._results:
+            self._results.move_to_end(key)
+            self.stats['inline'] += 1
+            return self._results[key]
+        if cache_params is not None and self.result_cache is not None:
+            hit, cached = self.result_cache.get(kind, subject, cache_params)
+            if hit:
+                self.stats['inline'] += 1
+                self._remember(key, cached)
+                return cached
+        
+        future = self._inflight.get(key)
+        if future is None:
+            # 超时放弃等待的计算仍占用名额，直到在进程池中完成；两个进程池分别计数
+            pending = sum(1 for pending_kind, _ in self._inflight if (pending_kind == 'pair') == (kind == 'pair'))
+            if pending >= self.max_pending:
+                raise ServerOverloaded()
+            future = asyncio.ensure_future(self._compute(key, cache_params, func, args))
+            self._inflight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.stats['coalesced'] += 1
+        
+        # shield：某个请求超时只放弃等待，计算继续进行，结果供后续请求使用
+        return await asyncio.wait_for(asyncio.shield(future), deadline)
+    
+    async def _compute(self, key: Tuple[str, Tuple[str, ...]], cache_params: Optional[Dict[str, Any]],
+                       func, args: tuple) -> Any:
+        """在进程池中计算并保存结果，术语对在术语对进程池中计算"""
+        self.stats['offloaded'] += 1
+        executor = self.pair_executor if key[0] == 'pair' else self.executor
+        value = await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+        
+        self._remember(key, value)
+        if cache_params is not None and self.result_cache is not None:
+            self.result_cache.put(key[0], list(key[1]), cache_params, value)
+        return value
+    
+    def _finish(self, key: Tuple[str, Tuple[str, ...]], future: asyncio.Future) -> None:
+        """计算结束后移出进行中表；所有请求都已超时时记录异常，避免异常无人读取"""
+        self._inflight.pop(key, None)
+        if not future.cancelled() and future.exception() is not None:
+            self.logger.error(f"计算失败 {key}: {future.exception()}")
+    
+    def _remember(self, key: Tuple[str, Tuple[str, ...]], value: Any) -> None:
+        """保存最近完成的结果"""
+        self._results[key] = value
+        self._results.move_to_end(key)
+        while len(self._results) > self.memory_results:
+            self._results.popitem(last=False)
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """一个连接上的请求并发处理，响应按完成顺序写回（以id对应）"""
+        write_lock = asyncio.Lock()
+        pending = set()
+        
+        async def respond(line: bytes) -> None:
+            try:
+                request = json.loads(line)
+                if not isinstance(request, dict):
+                    raise ValueError("请求必须是JSON对象")
+            except ValueError:
+                response = {'id': None, 'ok': False, 'error': 'invalid_json'}
+            else:
+                response = await self.handle(request)
+            async with write_lock:
+                writer.write((json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8'))
+                await writer.drain()
+        
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                task = asyncio.ensure_future(respond(line))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        finally:
+            writer.close()
+    
+    async def serve(self, host: str = None, port: int = None) -> None:
+        """
+        启动服务并一直运行
+        
+        Args:
+            host: 监听地址，默认使用配置 server.host
+            port: 监听端口，默认使用配置 server.port
+        """
+        server_config = self.config.get('server', {})
+        self.start()
+        server = await asyncio.start_server(self._handle_connection,
+                                            host or server_config.get('host', '127.0.0.1'),
+                                            port if port is not None else server_config.get('port', 8765))
+        address = server.sockets[0].getsockname()
+        self.logger.info(f"术语查询服务监听 {address[0]}:{address[1]}")
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.close()
+
+
+def main():
+    """主函数 - 命令行接口"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='术语查询服务')
+    parser.add_argument('--host', help='监听地址')
+    parser.add_argument('--port', type=int, help='监听端口')
+    parser.add_argument('--workers', type=int, help='工作进程数')
+    parser.add_argument('--config', help='配置文件路径')
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    config = load_config(args.config)
+    if args.workers:
+        config.setdefault('server', {})['workers'] = args.workers
+    
+    try:
+        asyncio.run(TerminologyServer(config).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
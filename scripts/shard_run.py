@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分片运行模块
+协调节点把PDF文件按大小均衡地分配给多个分片，每个分片（本机子进程或其他机器）独立解析自己的文件，
+收集术语定义候选和术语对共现上下文候选，经文件系统交换；合并节点汇总所有分片的候选，
+按与单进程运行相同的规则（置信度最高，其次语料顺序靠前）确定结果
+
+用法：
+    python app.py data/task.json --shards 4                  # 本机子进程分片运行完整管道
+    python scripts/shard_run.py plan data/task.json --shards 4 --work-dir /shared/shards
+    python scripts/shard_run.py worker /shared/shards/shard_000.json [--data-dir /mnt/pdfs]
+    python scripts/shard_run.py merge /shared/shards/plan.json --output output
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import subprocess
+from pathlib import Path
+from typing import List, Dict, Any, Tuple
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from scripts.stream_pipeline import StreamingPipeline
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def assign_shards(file_sizes: List[int], shards: int) -> List[List[int]]:
+    """
+    按文件大小把文件分配到分片：从大到小依次放入当前总量最小的分片
+    
+    Args:
+        file_sizes: 各文件的大小
+        shards: 分片数
+    
+    Returns:
+        每个分片的文件下标列表（升序），不含空分片
+    """
+    assignments = [[] for _ in range(max(1, shards))]
+    loads = [0] * len(assignments)
+    for index in sorted(range(len(file_sizes)), key=lambda index: (-file_sizes[index], index)):
+        target = loads.index(min(loads))
+        assignments[target].append(index)
+        loads[target] += file_sizes[index]
+    return [sorted(indices) for indices in assignments if indices]
+
+
+def _relative_path(path: Path, base_dir: Path) -> str:
+    """
+    计算相对于交换目录的路径，交换目录整体挂载或复制到其他位置（其他机器）后仍然有效
+    
+    Args:
+        path: 文件路径
+        base_dir: 交换目录
+    
+    Returns:
+        相对路径，无法表示为相对路径（如不同盘符）时为绝对路径
+    """
+    try:
+        return os.path.relpath(Path(path).resolve(), Path(base_dir).resolve())
+    except ValueError:
+        return str(Path(path).resolve())
+
+
+def _resolve_path(path: str, base_dir: Path) -> Path:
+    """按清单或计划文件所在目录解析其中记录的路径（兼容绝对路径）"""
+    return Path(base_dir) / path
+
+
+def _write_json_atomic(data: Any, output_path: Path) -> None:
+    """先写临时文件再替换，读取方不会看到写了一半的文件"""
+    temp_path = output_path.with_name(output_path.name + '.tmp')
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, output_path)
+
+
+class ShardCoordinator:
+    """分片运行的协调和合并"""
+    
+    def __init__(self, config: Dict[str, Any], pdf_parser, term_extractor, term_associator):
+        """
+        初始化协调节点
+        
+        Args:
+            config: 系统配置（原样下发给各分片）
+            pdf_parser: PDF解析器（PDFParser），只用于列出文件和记录合并后的解析报告
+            term_extractor: 术语抽取器（TermExtractor）
+            term_associator: 术语关联分析器（TermAssociator）
+        """
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+        self.pdf_parser = pdf_parser
+        self.term_extractor = term_extractor
+        self.term_associator = term_associator
+        
+        shard_config = self.config.get('shard', {})
+        self.shards = shard_config.get('shards', 2)
+        self.work_dir = shard_config.get('work_dir', 'data/processed/shards')
+        self.worker_timeout = shard_config.get('worker_timeout', 3600)
+    
+    def _pipeline(self) -> StreamingPipeline:
+        """复用流式管道的结果缓存预取、候选合并和结果确定逻辑"""
+        return StreamingPipeline(self.config, self.pdf_parser, self.term_extractor, self.term_associator)
+    
+    def plan(self, definition_terms: List[str], association_terms: List[str],
+             shards: int = None, pdf_dir: str = None, work_dir: str = None) -> str:
+        """
+        生成分片计划：结果缓存中已有的术语和术语对不再下发，其余作为各分片的待处理项
+        
+        Args:
+            definition_terms: 需要提取定义的术语（任务1）
+            association_terms: 需要分析关联的术语（任务2）
+            shards: 分片数，默认使用配置
+            pdf_dir: PDF目录，默认使用解析器配置的目录
+            work_dir: 分片清单和结果的交换目录，默认使用配置
+        
+        Returns:
+            分片计划文件路径
+        """
+        work_path = Path(work_dir or self.work_dir)
+        work_path.mkdir(parents=True, exist_ok=True)
+        
+        pipeline = self._pipeline()
+        pipeline.prepare(definition_terms, association_terms)
+        pdf_paths = self.pdf_parser.list_pdf_files(pdf_dir)
+        assignments = assign_shards([os.path.getsize(pdf_path) for pdf_path in pdf_paths], shards or self.shards)
+        
+        shard_entries = []
+        for shard, indices in enumerate(assignments):
+            manifest_path = work_path / f"shard_{shard:03d}.json"
+            result_path = work_path / f"shard_{shard:03d}.result.json"
+            if result_path.exists():
+                result_path.unlink()
+            _write_json_atomic({
+                'shard': shard,
+                'config': self.config,
+                'documents': [{'path': _relative_path(pdf_paths[index], work_path), 'index': index}
+                              for index in indices],
+                'terms': pipeline.pending_terms,
+                'pairs': [list(pair) for pair in pipeline.pending_pairs],
+                'result': result_path.name
+            }, manifest_path)
+            shard_entries.append({'manifest': manifest_path.name, 'result': result_path.name,
+                                  'documents': len(indices)})
+        
+        plan_path = work_path / "plan.json"
+        _write_json_atomic({
+            'definition_terms': list(definition_terms),
+            'association_terms': list(association_terms),
+            'terms': pipeline.pending_terms,
+            'pairs': [list(pair) for pair in pipeline.pending_pairs],
+            'shards': shard_entries
+        }, plan_path)
+        
+        self.logger.info(f"分片计划: {len(pdf_paths)} 个PDF文件分为 {len(shard_entries)} 个分片，"
+                         f"待提取术语 {len(pipeline.pending_terms)} 个，待分析术语对 {len(pipeline.pending_pairs)} 个")
+        return str(plan_path)
+    
+    def run_workers(self, plan_path: str) -> List[str]:
+        """
+        在本机为每个分片启动一个子进程并等待完成
+        
+        Args:
+            plan_path: 分片计划文件路径
+        
+        Returns:
+            失败的分片清单路径列表（全部成功时为空）
+        """
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        plan_dir = Path(plan_path).resolve().parent
+        
+        running = []
+        for entry in plan['shards']:
+            manifest_path = _resolve_path(entry['manifest'], plan_dir)
+            log_file = open(manifest_path.with_suffix('.log'), 'w', encoding='utf-8')
+            process = subprocess.Popen(
+                [sys.executable, str(Path(__file__).resolve()), 'worker', str(manifest_path)],
+                cwd=str(PROJECT_ROOT), stdout=log_file, stderr=subprocess.STDOUT
+            )
+            running.append((entry, process, log_file))
+        
+        deadline = time.monotonic() + self.worker_timeout
+        failed = []
+        for entry, process, log_file in running:
+            try:
+                returncode = process.wait(timeout=max(0.0, deadline - time.monotonic()))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+                returncode = None
+            finally:
+                log_file.close()
+            
+            if returncode != 0 or not _resolve_path(entry['result'], plan_dir).exists():
+                self.logger.error(f"分片运行失败（退出码 {returncode}）: {entry['manifest']}")
+                failed.append(str(_resolve_path(entry['manifest'], plan_dir)))
+        
+        return failed
+    
+    def merge(self, plan_path: str) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Any]]:
+        """
+        合并所有分片的候选结果并确定最终结果，合并后的解析报告写入解析器
+        
+        Args:
+            plan_path: 分片计划文件路径
+        
+        Returns:
+            (术语结果映射, 术语对结果映射)，格式与 StreamingPipeline.run 的 terms / pairs 相同
+        """
+        with open(plan_path, 'r', encoding='utf-8') as f:
+            plan = json.load(f)
+        plan_dir = Path(plan_path).resolve().parent
+        
+        result_paths = [_resolve_path(entry['result'], plan_dir) for entry in plan['shards']]
+        missing = [str(result_path) for result_path in result_paths if not result_path.exists()]
+        if missing:
+            raise RuntimeError(f"{len(missing)} 个分片没有结果: {', '.join(missing)}")
+        
+        pipeline = self._pipeline()
+        resolved_terms, resolved_pairs = pipeline.prepare(plan['definition_terms'], plan['association_terms'])
+        # 以计划中的待处理项为准，计划之后写入缓存的结果不影响合并
+        pipeline.reset_candidates(plan['terms'], plan['pairs'])
+        
+        self.pdf_parser.reset_parse_report()
+        parse_report = self.pdf_parser.parse_report
+        parse_report['shards'] = []
+        for result_path in result_paths:
+            with open(result_path, 'r', encoding='utf-8') as f:
+                result = json.load(f)
+            pipeline.merge_candidates(result['candidates'])
+            parse_report['documents'].update(result['parse_report'].get('documents', {}))
+            parse_report['skipped_pages'].extend(result['parse_report'].get('skipped_pages', []))
+            parse_report['skipped_table_pages'].extend(result['parse_report'].get('skipped_table_pages', []))
+            parse_report['shards'].append({'shard': result['shard'], 'documents': result['documents'],
+                                           'elapsed': result['elapsed']})
+        
+        terms, pairs = pipeline.finalize()
+        resolved_terms.update(terms)
+        resolved_pairs.update(pairs)
+        
+        self.logger.info(f"合并 {len(plan['shards'])} 个分片的结果")
+        return resolved_terms, resolved_pairs
+
+
+def run_shard(manifest_path: str, data_dir: str = None) -> str:
+    """
+    分片运行：解析清单中的PDF文件并导出候选结果
+    
+    Args:
+        manifest_path: 分片清单路径
+        data_dir: 本机的PDF目录，PDF不在清单记录的路径时按文件名在此目录中查找
+    
+    Returns:
+        分片结果文件路径
+    """
+    from scripts.parse_pdfs import PDFParser
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    manifest_dir = Path(manifest_path).resolve().parent
+    
+    config = manifest['config']
+    # 分片之间不共享结果缓存，结果在合并节点统一确定和缓存
+    pipeline = StreamingPipeline(config, PDFParser(config), TermExtractor(config), TermAssociator(config))
+    pipeline.reset_candidates(manifest['terms'], manifest['pairs'])
+    
+    pdf_paths = [str(_resolve_path(entry['path'], manifest_dir)) if data_dir is None
+                 else str(Path(data_dir) / Path(entry['path']).name)
+                 for entry in manifest['documents']]
+    start_time = time.time()
+    documents = pipeline.collect(pdf_paths, [entry['index'] for entry in manifest['documents']])
+    
+    result_path = _resolve_path(manifest['result'], manifest_dir)
+    _write_json_atomic({
+        'shard': manifest['shard'],
+        'documents': len(documents),
+        'elapsed': round(time.time() - start_time, 3),
+        'parse_report': pipeline.pdf_parser.parse_report,
+        'candidates': pipeline.export_candidates()
+    }, result_path)
+    return str(result_path)
+
+
+def main():
+    """主函数 - 命令行接口"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='术语识别系统分片运行')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    plan_parser = subparsers.add_parser('plan', help='生成分片计划和各分片清单')
+    plan_parser.add_argument('task_json', help='任务JSON文件路径')
+    plan_parser.add_argument('--shards', type=int, help='分片数')
+    plan_parser.add_argument('--work-dir', help='分片清单和结果的交换目录')
+    plan_parser.add_argument('--config', help='配置文件路径')
+    
+    worker_parser = subparsers.add_parser('worker', help='运行一个分片')
+    worker_parser.add_argument('manifest', help='分片清单路径')
+    worker_parser.add_argument('--data-dir', help='本机的PDF目录')
+    
+    merge_parser = subparsers.add_parser('merge', help='合并分片结果并输出任务结果')
+    merge_parser.add_argument('plan', help='分片计划文件路径')
+    merge_parser.add_argument('--output', help='输出目录')
+    merge_parser.add_argument('--config', help='配置文件路径')
+    
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    try:
+        if args.command == 'worker':
+            print(f"分片结果已保存到: {run_shard(args.manifest, args.data_dir)}")
+            return
+        
+        from app import OceanTerminologySystem
+        
+        system = OceanTerminologySystem(args.config)
+        if args.command == 'plan':
+            with open(args.task_json, 'r', encoding='utf-8') as f:
+                terms_list = json.load(f)
+            plan_path = system.shard_coordinator.plan(terms_list, terms_list, args.shards, work_dir=args.work_dir)
+            print(f"分片计划已保存到: {plan_path}")
+        else:
+            system.merge_shards(args.plan, args.output)
+            print("分片结果合并完成")
+    except Exception as e:
+        print(f"执行错误: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式输出模块
+任务结果按术语（术语对）分段计算，每条记录验证后立即以NDJSON格式（每行一个 {"W01": {...}} 对象）写出，
+运行过程中即可读取已完成的结果；结束后由NDJSON逐条组装为要求的W01/R01格式JSON，不在内存中保留完整结果
+
+用法：
+    python scripts/stream_output.py output/task1_results.ndjson [--output output/task1_results.json]
+"""
+
+import os
+import sys
+import json
+import logging
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Iterator, Iterable
+
+
+def iter_task1_records(term_extractor, terms: List[str], pdf_documents: List[Dict[str, Any]],
+                       chunk_size: int = 100) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """
+    分段提取术语定义，每段完成后立即生成该段的W01格式记录
+    
+    Args:
+        term_extractor: 术语抽取器
+        terms: 任务术语列表
+        pdf_documents: PDF文档列表
+        chunk_size: 每段术语数
+    
+    Yields:
+        (术语键, 术语结果)
+    """
+    # 每个术语最后一次出现的位置：结果只保留到不再需要为止，内存占用不随任务规模增长
+    last_position = {term: position for position, term in enumerate(terms)}
+    resolved = {}
+    for start in range(0, len(terms), chunk_size):
+        end = start + chunk_size
+        batch = terms[start:end]
+        # 重复术语只在第一次出现时提取
+        resolved.update(term_extractor.resolve_terms([term for term in batch if term not in resolved], pdf_documents))
+        yield from term_extractor.iter_term_records(batch, resolved, start + 1)
+        resolved = {term: result for term, result in resolved.items() if last_position[term] >= end}
+
+
+def iter_task2_records(term_associator, terms: List[str], pdf_documents: List[Dict[str, Any]],
+                       chunk_size: int = 100) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    分段分析术语对关联，每段完成后立即生成该段的R01格式记录
+    
+    Args:
+        term_associator: 术语关联分析器
+        terms: 任务术语列表
+        pdf_documents: PDF文档列表
+        chunk_size: 每段术语对数
+    
+    Yields:
+        (关联键, 关联结果)
+    """
+    pairs = term_associator.task_pairs(terms)
+    count = 0
+    for start in range(0, len(pairs), chunk_size):
+        batch = pairs[start:start + chunk_size]
+        resolved = term_associator.resolve_pairs(batch, pdf_documents)
+        for key, value in term_associator.iter_association_records(batch, resolved, count + 1):
+            count += 1
+            yield key, value
+
+
+def read_ndjson(path: str) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    逐条读取NDJSON结果文件
+    
+    Args:
+        path: NDJSON文件路径
+    
+    Yields:
+        (记录键, 记录)
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if not isinstance(record, dict) or len(record) != 1:
+                raise ValueError(f"{path} 第{line_number}行不是单个记录对象")
+            yield next(iter(record.items()))
+
+
+def assemble_json(ndjson_path: str, json_path: str) -> int:
+    """
+    把NDJSON结果逐条组装为W01/R01格式的JSON文件，输出与 json.dump(indent=2) 完全相同
+    
+    Args:
+        ndjson_path: NDJSON文件路径
+        json_path: 输出JSON文件路径
+    
+    Returns:
+        记录数
+    """
+    count = 0
+    temp_path = f"{json_path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write('{')
+        for key, value in read_ndjson(ndjson_path):
+            f.write(',\n  ' if count else '\n  ')
+            # 嵌套部分整体再缩进一级；字符串中的换行已转义，不受影响
+            f.write(json.dumps(key, ensure_ascii=False) + ': '
+                    + json.dumps(value, ensure_ascii=False, indent=2).replace('\n', '\n  '))
+            count += 1
+        f.write('\n}' if count else '}')
+    os.replace(temp_path, json_path)
+    return count
+
+
+class NDJSONResultWriter:
+    """逐条验证并写出任务结果的NDJSON写入器"""
+    
+    def __init__(self, path: str, task: str, validator=None):
+        """
+        Args:
+            path: NDJSON文件路径
+            task: 任务类型（task1/task2）
+            validator: 输出验证器，为None时不验证
+        """
+        if task not in ('task1', 'task2'):
+            raise ValueError(f"不支持的任务类型: {task}")
+        self.path = Path(path)
+        self.task = task
+        # 增量验证会话，验证的同时累计报告统计
+        self.session = validator.session(task) if validator is not None else None
+        self.logger = logging.getLogger(__name__)
+        
+        self.written = 0
+        self.rejected = 0
+        self._file = None
+    
+    def __enter__(self) -> 'NDJSONResultWriter':
+        self.open()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+    
+    def open(self) -> None:
+        """打开输出文件（行缓冲，每条记录写出后即可被读取）"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8', buffering=1)
+    
+    def write(self, key: str, value: Dict[str, Any]) -> bool:
+        """
+        验证并写出一条记录
+        
+        Args:
+            key: 记录键
+            value: 记录
+        
+        Returns:
+            是否通过验证并写出
+        """
+        if self.session is not None and self.session.add(key, value):
+            self.rejected += 1
+            return False
+        
+        self._file.write(json.dumps({key: value}, ensure_ascii=False) + '\n')
+        self.written += 1
+        return True
+    
+    def write_all(self, records: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """
+        逐条写出记录
+        
+        Args:
+            records: (记录键, 记录) 序列
+        
+        Returns:
+            写出的记录数
+        """
+        written = self.written
+        for key, value in records:
+            self.write(key, value)
+        return self.written - written
+    
+    def close(self) -> None:
+        """关闭输出文件"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self.session is not None:
+            self.session.log_errors(self.logger)
+    
+    def summary(self) -> Dict[str, Any]:
+        """
+        输出统计
+        
+        Returns:
+            文件路径、写出和未通过验证的记录数，验证时包含写出记录的完整性分析
+        """
+        summary = {'path': str(self.path), 'written': self.written, 'rejected': self.rejected}
+        if self.session is not None:
+            summary['validation'] = self.session.analysis()
+        return summary
+
+
+def main():
+    """主函数 - 命令行接口"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description='把NDJSON结果组装为W01/R01格式JSON')
+    parser.add_argument('ndjson', help='NDJSON结果文件路径')
+    parser.add_argument('--output', help='输出JSON文件路径（默认同名.json）')
+    
+    args = parser.parse_args()
+    output_path = args.output or str(Path(args.ndjson).with_suffix('.json'))
+    
+    try:
+        count = assemble_json(args.ndjson, output_path)
+    except (OSError, ValueError) as e:
+        print(f"执行错误: {e}")
+        sys.exit(1)
+    print(f"已组装 {count} 条记录: {output_path}")
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式处理管道模块
+解析出的页面立即流入规范化、术语定位、定义抽取和共现分析阶段，
+各阶段在独立线程中运行，通过有界队列连接实现背压
+"""
+
+import time
+import queue
+import logging
+import itertools
+import threading
+from typing import List, Dict, Any, Tuple
+
+from src.utils import standardize_document_name, format_page_number
+from src.metrics import metrics
+
+# 队列结束标记
+_END = object()
+
+
+class StreamingPipeline:
+    """解析与抽取/关联分析重叠执行的流式管道"""
+    
+    def __init__(self, config: Dict[str, Any], pdf_parser, term_extractor, term_associator):
+        """
+        初始化流式管道
+        
+        Args:
+            config: 系统配置
+            pdf_parser: PDF解析器（PDFParser）
+            term_extractor: 术语抽取器（TermExtractor）
+            term_associator: 术语关联分析器（TermAssociator）
+        """
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+        self.pdf_parser = pdf_parser
+        self.term_extractor = term_extractor
+        self.term_associator = term_associator
+        
+        stream_config = self.config.get('pipeline', {})
+        self.queue_size = stream_config.get('queue_size', 256)
+        self.worker_queue_size = stream_config.get('worker_queue_size', 64)
+        
+        self._stop = threading.Event()
+        self._errors: List[BaseException] = []
+        
+        if self.config.get('dedup', {}).get('enabled', False):
+            self.logger.warning("流式管道不做近重复检测，文档出处和关联描述可能与逐阶段运行不同")
+    
+    def run(self, definition_terms: List[str], association_terms: List[str],
+            pdf_dir: str = None) -> Dict[str, Any]:
+        """
+        流式解析语料，同时提取术语定义和分析术语对关联
+        
+        Args:
+            definition_terms: 需要提取定义的术语（任务1）
+            association_terms: 需要分析关联的术语（任务2）
+            pdf_dir: PDF目录，默认使用解析器配置的目录
+        
+        Returns:
+            {'documents': 文档列表, 'terms': 术语结果映射, 'pairs': 术语对结果映射}，
+            结果映射与 resolve_terms / resolve_pairs 的返回格式相同
+        """
+        resolved_terms, resolved_pairs = self.prepare(definition_terms, association_terms)
+        documents = self.collect(self.pdf_parser.list_pdf_files(pdf_dir))
+        terms, pairs = self.finalize()
+        resolved_terms.update(terms)
+        resolved_pairs.update(pairs)
+        
+        self.logger.info(f"流式管道完成，成功解析 {len(documents)} 个PDF文档")
+        return {'documents': documents, 'terms': resolved_terms, 'pairs': resolved_pairs}
+    
+    def prepare(self, definition_terms: List[str],
+                association_terms: List[str]) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Any]]:
+        """
+        从结果缓存中取出已有结果，其余术语和术语对作为待处理项
+        
+        Args:
+            definition_terms: 需要提取定义的术语（任务1）
+            association_terms: 需要分析关联的术语（任务2）
+        
+        Returns:
+            (已解决的术语结果, 已解决的术语对结果)
+        """
+        resolved_terms, pending_terms = self._preresolve_terms(definition_terms)
+        resolved_pairs, pending_pairs = self._preresolve_pairs(association_terms)
+        self.reset_candidates(pending_terms, pending_pairs)
+        return resolved_terms, resolved_pairs
+    
+    def reset_candidates(self, pending_terms: List[str], pending_pairs: List[Tuple[str, str]]) -> None:
+        """
+        设置待处理的术语和术语对，清空候选结果
+        
+        Args:
+            pending_terms: 待提取定义的术语
+            pending_pairs: 待分析的术语对（pair_key 顺序）
+        """
+        self.pending_terms = list(pending_terms)
+        self.pending_pairs = [tuple(pair) for pair in pending_pairs]
+        
+        # 流式阶段的候选结果：术语保留候选定义（文档解析完成后换算为与逐文档搜索相同的排序键），
+        # 术语对保留所有达到阈值的上下文（用于展开出处）
+        self._term_candidates: Dict[str, List[Tuple[float, Tuple, Tuple[float, str, str, str]]]] = {}
+        self._unranked_terms: Dict[str, List[Tuple[float, Tuple[int, int], int, Tuple[float, str, str, str]]]] = {}
+        self._pair_candidates: Dict[Tuple[str, str], List[Tuple]] = {}
+        self._pending_terms = set(self.pending_terms)
+        self._pending_pairs = set(self.pending_pairs)
+        self._pair_terms = {term for pair in self.pending_pairs for term in pair}
+        self._locate_terms = list(dict.fromkeys(self.pending_terms + sorted(self._pair_terms)))
+    
+    def collect(self, pdf_paths: List[str], doc_indices: List[int] = None) -> List[Dict[str, Any]]:
+        """
+        流式解析PDF文件，为待处理项收集候选结果
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            doc_indices: 各文件在整个语料中的序号（决定同置信度时的语料顺序），默认为列表下标
+        
+        Returns:
+            按文件顺序排列的文档列表
+        """
+        self._stop.clear()
+        self._errors = []
+        
+        self.pdf_parser.reset_parse_report()
+        self.logger.info(f"流式管道开始处理 {len(pdf_paths)} 个PDF文件，"
+                         f"待提取术语 {len(self.pending_terms)} 个，待分析术语对 {len(self.pending_pairs)} 个")
+        
+        normalize_queue = queue.Queue(self.queue_size)
+        locate_queue = queue.Queue(self.queue_size)
+        define_queue = queue.Queue(self.queue_size)
+        cooccur_queue = queue.Queue(self.queue_size)
+        
+        stages = [
+            threading.Thread(target=self._stage_loop, name='normalize', daemon=True,
+                             args=('normalize', normalize_queue, self._normalize, [locate_queue])),
+            threading.Thread(target=self._stage_loop, name='locate', daemon=True,
+                             args=('locate', locate_queue, self._locate, [define_queue, cooccur_queue])),
+            threading.Thread(target=self._stage_loop, name='define', daemon=True,
+                             args=('define', define_queue, self._define, [])),
+            threading.Thread(target=self._stage_loop, name='cooccur', daemon=True,
+                             args=('cooccur', cooccur_queue, self._cooccur, []))
+        ]
+        for stage in stages:
+            stage.start()
+        
+        documents = self._produce(pdf_paths, normalize_queue, doc_indices)
+        
+        for stage in stages:
+            stage.join()
+        if self._errors:
+            raise self._errors[0]
+        
+        doc_index = dict(zip(pdf_paths, doc_indices if doc_indices is not None else range(len(pdf_paths))))
+        self.rank_candidates({doc_index[doc['file_path']]: doc for doc in documents})
+        return documents
+    
+    def rank_candidates(self, documents: Dict[int, Dict[str, Any]]) -> None:
+        """
+        文档解析完成后为候选定义计算排序键（"术语和定义"章节、主题匹配度、出现次数、语料顺序），
+        使同置信度时的选择与逐文档搜索一致
+        
+        Args:
+            documents: {语料序号: 完整文档}，解析失败的文档不在其中，其页面上的候选被丢弃
+        """
+        for term, unranked in self._unranked_terms.items():
+            candidates = self._term_candidates.setdefault(term, [])
+            for confidence, order, occurrences, result in unranked:
+                doc = documents.get(order[0])
+                if doc is None:
+                    continue
+                rank_key = self.term_extractor.candidate_rank(term, doc, order[1], occurrences) + tuple(order)
+                candidates.append((confidence, rank_key, result))
+            self._term_candidates[term] = self.term_extractor.select_definitions(candidates, partial=True)
+        self._unranked_terms = {}
+    
+    def export_candidates(self) -> Dict[str, Any]:
+        """
+        导出候选结果（可JSON序列化），供分片运行时在合并节点汇总
+        
+        Returns:
+            {'terms': {术语: [[置信度, 排序键, 定义结果], ...]}, 'pairs': [[术语1, 术语2, [候选, ...]], ...]}
+        """
+        return {
+            'terms': {term: [list(candidate) for candidate in candidates]
+                      for term, candidates in self._term_candidates.items()},
+            'pairs': [[term1, term2, [list(candidate) for candidate in candidates]]
+                      for (term1, term2), candidates in self._pair_candidates.items()]
+        }
+    
+    def merge_candidates(self, exported: Dict[str, Any]) -> None:
+        """
+        合并其他分片导出的候选结果，选择规则与单进程运行相同（置信度最高，其次排序键靠前）
+        
+        Args:
+            exported: export_candidates 的返回值（可来自JSON）
+        """
+        for term, candidates in exported.get('terms', {}).items():
+            if term not in self._pending_terms:
+                continue
+            merged = self._term_candidates.get(term, [])
+            merged.extend((confidence, tuple(rank_key), tuple(result)) for confidence, rank_key, result in candidates)
+            self._term_candidates[term] = self.term_extractor.select_definitions(merged, partial=True)
+        
+        for term1, term2, candidates in exported.get('pairs', []):
+            if (term1, term2) not in self._pending_pairs:
+                continue
+            self._pair_candidates.setdefault((term1, term2), []).extend(
+                (tuple(candidate[0]),) + tuple(candidate[1:]) for candidate in candidates
+            )
+    
+    def finalize(self) -> Tuple[Dict[str, Any], Dict[Tuple[str, str], Any]]:
+        """
+        根据已收集和合并的候选结果确定待处理项的结果并写入缓存
+        
+        Returns:
+            (术语结果映射, 术语对结果映射)
+        """
+        # 有页面被跳过时结果不代表完整语料，不写入缓存
+        caches = (self.term_extractor.result_cache, self.term_associator.result_cache)
+        for cache in {id(cache): cache for cache in caches if cache is not None}.values():
+            cache.record_parse_report(self.pdf_parser.parse_report)
+        return self._finalize_terms(self.pending_terms), self._finalize_pairs(self.pending_pairs)
+    
+    def _cache_params(self, component) -> Dict[str, Any]:
+        """
+        流式管道使用的缓存键参数
+        
+        流式和分片运行不做近重复检测，会扫描逐阶段运行跳过的重复页面，
+        开启近重复检测时在缓存键中区分运行方式，两种运行的结果互不复用
+        
+        Args:
+            component: 术语抽取器或术语关联分析器
+        
+        Returns:
+            缓存键参数
+        """
+        cache_params = dict(component.cache_params())
+        if self.config.get('dedup', {}).get('enabled', False):
+            cache_params['pipeline'] = 'stream'
+        return cache_params
+    
+    def _preresolve_terms(self, terms: List[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """从结果缓存中取出已有的术语结果，返回(已解决结果, 待流式提取的术语)"""
+        resolved = {}
+        pending = []
+        cache = self.term_extractor.result_cache
+        cache_params = self._cache_params(self.term_extractor)
+        
+        for term in dict.fromkeys(terms):
+            if cache is not None:
+                hit, cached = cache.get('term', [term], cache_params)
+                if hit:
+                    resolved[term] = cached
+                    continue
+            pending.append(term)
+        
+        return resolved, pending
+    
+    def _preresolve_pairs(self, terms: List[str]) -> Tuple[Dict[Tuple[str, str], Any], List[Tuple[str, str]]]:
+        """从结果缓存中取出已有的术语对结果，返回(已解决结果, 待流式分析的术语对)"""
+        resolved = {}
+        pending = {}
+        cache = self.term_associator.result_cache
+        cache_params = self._cache_params(self.term_associator)
+        
+        for term1, term2 in itertools.combinations(terms, 2):
+            if term1 == term2:
+                continue
+            key = self.term_associator.pair_key(term1, term2)
+            if key in resolved or key in pending:
+                continue
+            if cache is not None:
+                hit, cached = cache.get('pair', list(key), cache_params)
+                if hit:
+                    resolved[key] = cached
+                    continue
+            pending[key] = None
+        
+        ranked, pruned = self.term_associator.rank_pairs(list(pending))
+        for key in pruned:
+            resolved[key] = None
+        return resolved, ranked
+    
+    def _produce(self, pdf_paths: List[str], sink: queue.Queue, doc_indices: List[int] = None) -> List[Dict[str, Any]]:
+        """
+        解析阶段：逐页把解析结果送入规范化队列
+        
+        Args:
+            pdf_paths: PDF文件路径列表
+            sink: 规范化队列
+            doc_indices: 各文件在整个语料中的序号
+        
+        Returns:
+            按文件顺序排列的文档列表
+        """
+        doc_index = dict(zip(pdf_paths, doc_indices if doc_indices is not None else range(len(pdf_paths))))
+        finished = {}
+        
+        try:
+            with metrics.timer('stream.parse'):
+                for event_type, pdf_path, payload in self.pdf_parser.iter_parsed_pages(pdf_paths, self.worker_queue_size):
+                    if event_type == 'document':
+                        finished[pdf_path] = payload
+                    elif not self._put(sink, (doc_index[pdf_path], pdf_path, payload)):
+                        break
+            
+            documents = [finished[pdf_path] for pdf_path in pdf_paths if finished.get(pdf_path)]
+            
+            if not self._stop.is_set() and self.config.get('pdf_parser', {}).get('retry_skipped', False):
+                # 备用后端恢复的页面在第一次流过时被丢弃，这里补送
+                self.pdf_parser.retry_skipped_pages(documents)
+                for doc in documents:
+                    for page in doc['pages']:
+                        if page.get('recovered_by'):
+                            self._put(sink, (doc_index[doc['file_path']], doc['file_path'], page))
+        except BaseException as e:
+            self._fail(e)
+            documents = []
+        finally:
+            self._put(sink, _END, force=True)
+        
+        return documents
+    
+    def _stage_loop(self, name: str, source: queue.Queue, handler, sinks: List[queue.Queue]) -> None:
+        """
+        阶段线程主循环：从上游取出条目处理后送往下游，收到结束标记时向下游传递
+        
+        Args:
+            name: 阶段名称
+            source: 上游队列
+            handler: 处理函数，接收条目，返回 [(下游序号, 条目), ...]
+            sinks: 下游队列列表
+        """
+        busy = 0.0
+        try:
+            while True:
+                item = source.get()
+                if item is _END:
+                    break
+                
+                start = time.perf_counter()
+                outputs = handler(item)
+                busy += time.perf_counter() - start
+                
+                for sink_index, output in outputs:
+                    if not self._put(sinks[sink_index], output):
+                        return
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            metrics.record_time(f'stream.{name}', busy)
+            for sink in sinks:
+                self._put(sink, _END, force=True)
+    
+    def _normalize(self, item: Tuple[int, str, Dict[str, Any]]) -> List[Tuple[int, Any]]:
+        """规范化阶段：丢弃跳过/空白页面，生成文档出处和页码标签"""
+        index, pdf_path, page = item
+        if page.get('skipped') or not page.get('text'):
+            metrics.incr('stream.pages_dropped')
+            return []
+        
+        metrics.incr('stream.pages_normalized')
+        file_name = pdf_path.replace('\\', '/').rsplit('/', 1)[-1]
+        return [(0, {
+            'order': (index, page['page_number']),
+            'document_name': standardize_document_name(file_name),
+            'page_label': format_page_number(f"第{page['page_number']}页"),
+            'text': page['text']
+        })]
+    
+    def _locate(self, record: Dict[str, Any]) -> List[Tuple[int, Any]]:
+        """术语定位阶段：找出页面中出现的目标术语，分发到定义抽取和共现分析阶段"""
+        page_text = record['text']
+        present = [term for term in self._locate_terms if term in page_text]
+        if not present:
+            return []
+        
+        outputs = []
+        define_terms = [term for term in present if term in self._pending_terms]
+        if define_terms:
+            outputs.append((0, (record, define_terms)))
+        
+        pair_terms = sorted(term for term in present if term in self._pair_terms)
+        pairs = [pair for pair in itertools.combinations(pair_terms, 2) if pair in self._pending_pairs]
+        if pairs:
+            outputs.append((1, (record, pairs)))
+        
+        return outputs
+    
+    def _define(self, item: Tuple[Dict[str, Any], List[str]]) -> List[Tuple[int, Any]]:
+        """定义抽取阶段：记录每个术语的候选定义，排序键在文档解析完成后由 rank_candidates 计算"""
+        record, terms = item
+        for term in terms:
+            metrics.incr('extract.pages_matched')
+            scored = self.term_extractor.score_page_definition(term, record['text'])
+            if scored is None:
+                continue
+            
+            confidence, definition = scored
+            self._unranked_terms.setdefault(term, []).append(
+                (confidence, record['order'], record['text'].count(term),
+                 (confidence, definition, record['document_name'], record['page_label']))
+            )
+        return []
+    
+    def _cooccur(self, item: Tuple[Dict[str, Any], List[Tuple[str, str]]]) -> List[Tuple[int, Any]]:
+        """共现分析阶段：对页面中同时出现的术语对评分，记录达到阈值的上下文"""
+        record, pairs = item
+        for term1, term2 in pairs:
+            scored, contexts_scored = self.term_associator.score_page_contexts(term1, term2, record['text'])
+            metrics.incr('associate.contexts_scored', contexts_scored)
+            candidates = self._pair_candidates.setdefault((term1, term2), [])
+            for position, (confidence, relationship_type, context) in enumerate(scored):
+                # 页面到达顺序不确定，带上语料顺序，最终选择与逐文档分析一致
+                candidates.append((record['order'] + (position,), confidence, relationship_type, context,
+                                   record['document_name'], record['page_label']))
+        return []
+    
+    def _finalize_terms(self, pending_terms: List[str]) -> Dict[str, Any]:
+        """按相似度阈值确定流式提取的术语结果并写入缓存"""
+        resolved = {}
+        cache = self.term_extractor.result_cache
+        cache_params = self._cache_params(self.term_extractor)
+        
+        for term in pending_terms:
+            selected = self.term_extractor.select_definitions(self._term_candidates.get(term, []))
+            ranked = [candidate[2] for candidate in selected]
+            resolved[term] = self.term_extractor.build_ranked_result(term, ranked)
+            if cache is not None:
+                cache.put('term', [term], cache_params, resolved[term])
+        
+        return resolved
+    
+    def _finalize_pairs(self, pending_pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Any]:
+        """确定流式分析的术语对结果并写入缓存"""
+        resolved = {}
+        cache = self.term_associator.result_cache
+        cache_params = self._cache_params(self.term_associator)
+        
+        for key in pending_pairs:
+            resolved[key] = self.term_associator.select_association(key[0], key[1], self._pair_candidates.get(key, []))
+            if cache is not None:
+                cache.put('pair', list(key), cache_params, resolved[key])
+        
+        return resolved
+    
+    def _put(self, sink: queue.Queue, item: Any, force: bool = False) -> bool:
+        """
+        带背压的入队：队列满时阻塞等待，管道出错停止时放弃
+        
+        Args:
+            sink: 目标队列
+            item: 条目
+            force: 是否必须送达（结束标记），停止时丢弃队列中的积压条目腾出空间
+        
+        Returns:
+            是否成功入队
+        """
+        while True:
+            if self._stop.is_set() and not force:
+                return False
+            try:
+                sink.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if self._stop.is_set():
+                    try:
+                        sink.get_nowait()
+                    except queue.Empty:
+                        pass
+    
+    def _fail(self, error: BaseException) -> None:
+        """记录阶段异常并通知所有阶段停止"""
+        self.logger.error(f"流式管道阶段失败: {error}")
+        self._errors.append(error)
+        self._stop.set()
\ No newline at end of file
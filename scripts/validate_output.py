@@ -3,6 +3,9 @@
 """
 输出验证模块
 验证输出格式和内容是否符合要求
+
+字段列表和格式正则在模块加载时编译一次；ValidationSession 逐条验证记录并在同一遍中累计报告统计，
+可对流式输出的记录增量使用
 """
 
 import logging
@@ -11,6 +14,159 @@ from typing import Dict, Any, List, Tuple
 
 from src.utils import validate_output_format
 
+# 各任务的必需字段
+TASK1_FIELDS = ("术语名称", "术语定义", "文档出处", "文档页数")
+TASK2_FIELDS = ("术语关联", "关联关系", "关联描述")
+
+# 有效的关联关系类型
+VALID_RELATIONSHIPS = frozenset(("主从关系", "因果关系"))
+
+# 页码标准格式: "第X页" 或 "第X-Y页"
+PAGE_PATTERN = re.compile(r'^第\d+(?:-\d+)?页$')
+
+# 文档出处中不允许的特殊字符
+INVALID_SOURCE_CHARS = re.compile(r'[<>:"/\\|?*]')
+
+# 警告日志中列出的验证错误条数
+LOGGED_ERRORS = 20
+
+
+def is_task1_complete(value: Dict[str, Any]) -> bool:
+    """术语记录的四个字段是否都不为空"""
+    return all(value.get(field) for field in TASK1_FIELDS)
+
+
+def is_task2_complete(value: Dict[str, Any]) -> bool:
+    """关联记录是否包含两个术语、有效关系类型和至少一条描述"""
+    terms = value.get("术语关联")
+    return bool(terms and len(terms) == 2
+                and value.get("关联关系") in VALID_RELATIONSHIPS
+                and value.get("关联描述"))
+
+
+def _task1_passes(key: str, value: Dict[str, Any], _page_match=PAGE_PATTERN.match,
+                  _invalid_search=INVALID_SOURCE_CHARS.search) -> bool:
+    """
+    术语记录是否通过全部检查，与 validate_task1_record 返回空列表等价；
+    绝大多数记录只需这一次判断，未通过时再由 validate_task1_record 生成错误信息
+    """
+    if not key.startswith("W"):
+        return False
+    name = value.get("术语名称")
+    definition = value.get("术语定义")
+    source = value.get("文档出处")
+    page = value.get("文档页数")
+    return bool(name and name.strip()
+                and definition and len(definition) >= 10 and definition.strip()
+                and source and source.strip() and not source.endswith('.pdf') and not _invalid_search(source)
+                and page and page.strip() and _page_match(page))
+
+
+def _task2_passes(key: str, value: Dict[str, Any]) -> bool:
+    """关联记录是否通过全部检查，与 validate_task2_record 返回空列表等价"""
+    if not key.startswith("R"):
+        return False
+    terms = value.get("术语关联")
+    descriptions = value.get("关联描述")
+    if (type(terms) is not list or len(terms) != 2
+            or value.get("关联关系") not in VALID_RELATIONSHIPS or type(descriptions) is not list):
+        return False
+    for term in terms:
+        if not term or not isinstance(term, str):
+            return False
+    for description in descriptions:
+        if not isinstance(description, dict) or not description.get("文档出处") or not description.get("文档页数"):
+            return False
+    return True
+
+
+class ValidationSession:
+    """增量验证会话：逐条验证一个任务的记录，同时累计通过验证的记录的报告统计"""
+    
+    def __init__(self, validator: 'OutputValidator', task: str):
+        """
+        Args:
+            validator: 输出验证器
+            task: 任务类型（task1/task2）
+        """
+        if task == 'task1':
+            # 通过验证的术语记录四个字段都不为空，必然完整
+            self._passes, self._validate, self._complete = _task1_passes, validator.validate_task1_record, None
+        elif task == 'task2':
+            self._passes, self._validate, self._complete = _task2_passes, validator.validate_task2_record, is_task2_complete
+        else:
+            raise ValueError(f"不支持的任务类型: {task}")
+        self.task = task
+        
+        self.checked = 0
+        self.passed = 0
+        self.complete = 0
+        self.incomplete: List[str] = []
+        self.errors: List[str] = []
+    
+    def add(self, key: str, value: Dict[str, Any]) -> List[str]:
+        """
+        验证一条记录并累计统计
+        
+        Args:
+            key: 记录键
+            value: 记录
+            
+        Returns:
+            错误列表，为空表示通过验证
+        """
+        self.checked += 1
+        if not self._passes(key, value):
+            errors = self._validate(key, value)
+            if errors:
+                self.errors.extend(errors)
+                return errors
+        
+        self.passed += 1
+        if self._complete is None or self._complete(value):
+            self.complete += 1
+        else:
+            self.incomplete.append(key)
+        return []
+    
+    def validate(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        验证一组记录
+        
+        Args:
+            results: 任务结果
+            
+        Returns:
+            通过验证的结果
+        """
+        add = self.add
+        return {key: value for key, value in results.items() if not add(key, value)}
+    
+    def analysis(self) -> Dict[str, Any]:
+        """
+        通过验证的记录的完整性统计，与 generate_validation_report 中的分析格式相同
+        
+        Returns:
+            完整性分析
+        """
+        noun = "terms" if self.task == 'task1' else "associations"
+        return {
+            f"total_{noun}": self.passed,
+            f"complete_{noun}": self.complete,
+            f"incomplete_{noun}": list(self.incomplete),
+            "completeness_score": self.complete / self.passed if self.passed else 0.0
+        }
+    
+    def log_errors(self, logger: logging.Logger) -> None:
+        """汇总记录验证错误"""
+        name = "任务1" if self.task == 'task1' else "任务2"
+        if self.errors:
+            shown = self.errors[:LOGGED_ERRORS]
+            more = f" 等（共 {len(self.errors)} 个）" if len(self.errors) > LOGGED_ERRORS else ""
+            logger.warning(f"{name}验证发现 {len(self.errors)} 个错误: {shown}{more}")
+        else:
+            logger.info(f"{name}输出格式验证通过")
+
 
 class OutputValidator:
     """输出验证器"""
@@ -20,6 +176,18 @@ class OutputValidator:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
     
+    def session(self, task: str) -> ValidationSession:
+        """
+        创建增量验证会话
+        
+        Args:
+            task: 任务类型（task1/task2）
+            
+        Returns:
+            验证会话
+        """
+        return ValidationSession(self, task)
+    
     def validate_task1_output(self, task1_results: Dict[str, Any]) -> Dict[str, Any]:
         """
         验证任务1输出格式
@@ -32,37 +200,74 @@ class OutputValidator:
         """
         self.logger.info("开始验证任务1输出格式")
         
-        validated_results = {}
-        validation_errors = []
+        session = self.session('task1')
+        validated_results = session.validate(task1_results)
+        session.log_errors(self.logger)
         
-        for key, value in task1_results.items():
-            # 检查键格式
-            if not key.startswith("W"):
-                validation_errors.append(f"键格式错误: {key}")
-                continue
-            
-            # 检查必需字段
-            required_fields = ["术语名称", "术语定义", "文档出处", "文档页数"]
-            missing_fields = [field for field in required_fields if field not in value]
+        return validated_results
+    
+    def validate_task2_output(self, task2_results: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        验证任务2输出格式
+        
+        Args:
+            task2_results: 任务2结果
             
-            if missing_fields:
-                validation_errors.append(f"{key} 缺少字段: {missing_fields}")
-                continue
+        Returns:
+            验证后的结果
+        """
+        self.logger.info("开始验证任务2输出格式")
+        
+        session = self.session('task2')
+        validated_results = session.validate(task2_results)
+        session.log_errors(self.logger)
+        
+        return validated_results
+    
+    def validate_outputs(self, task1_results: Dict[str, Any],
+                         task2_results: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any], Dict[str, Any]]:
+        """
+        一遍完成两个任务的验证和验证报告，结果与依次调用 validate_task1_output、validate_task2_output
+        和对验证后结果调用 generate_validation_report 相同
+        
+        Args:
+            task1_results: 任务1结果
+            task2_results: 任务2结果
             
-            # 检查字段内容
-            field_errors = self._validate_task1_fields(key, value)
-            validation_errors.extend(field_errors)
+        Returns:
+            (任务1验证后的结果, 任务2验证后的结果, 验证报告)
+        """
+        session1, session2 = self.session('task1'), self.session('task2')
+        validated1 = session1.validate(task1_results)
+        validated2 = session2.validate(task2_results)
+        session1.log_errors(self.logger)
+        session2.log_errors(self.logger)
+        
+        return validated1, validated2, self.build_report(session1.analysis(), session2.analysis())
+    
+    def validate_task1_record(self, key: str, value: Dict[str, Any]) -> List[str]:
+        """
+        验证任务1单条记录，流式输出时逐条调用
+        
+        Args:
+            key: 术语键
+            value: 术语信息
             
-            # 如果通过验证，添加到结果中
-            if not field_errors:
-                validated_results[key] = value
+        Returns:
+            错误列表，为空表示通过验证
+        """
+        # 检查键格式
+        if not key.startswith("W"):
+            return [f"键格式错误: {key}"]
         
-        if validation_errors:
-            self.logger.warning(f"任务1验证发现 {len(validation_errors)} 个错误: {validation_errors}")
-        else:
-            self.logger.info("任务1输出格式验证通过")
+        # 检查必需字段
+        missing_fields = [field for field in TASK1_FIELDS if field not in value]
         
-        return validated_results
+        if missing_fields:
+            return [f"{key} 缺少字段: {missing_fields}"]
+        
+        # 检查字段内容
+        return self._validate_task1_fields(key, value)
     
     def _validate_task1_fields(self, key: str, term_info: Dict[str, str]) -> List[str]:
         """
@@ -105,49 +310,29 @@ class OutputValidator:
         
         return errors
     
-    def validate_task2_output(self, task2_results: Dict[str, Any]) -> Dict[str, Any]:
+    def validate_task2_record(self, key: str, value: Dict[str, Any]) -> List[str]:
         """
-        验证任务2输出格式
+        验证任务2单条记录，流式输出时逐条调用
         
         Args:
-            task2_results: 任务2结果
+            key: 关联关系键
+            value: 关联关系信息
             
         Returns:
-            验证后的结果
+            错误列表，为空表示通过验证
         """
-        self.logger.info("开始验证任务2输出格式")
+        # 检查键格式
+        if not key.startswith("R"):
+            return [f"键格式错误: {key}"]
         
-        validated_results = {}
-        validation_errors = []
-        
-        for key, value in task2_results.items():
-            # 检查键格式
-            if not key.startswith("R"):
-                validation_errors.append(f"键格式错误: {key}")
-                continue
-            
-            # 检查必需字段
-            required_fields = ["术语关联", "关联关系", "关联描述"]
-            missing_fields = [field for field in required_fields if field not in value]
-            
-            if missing_fields:
-                validation_errors.append(f"{key} 缺少字段: {missing_fields}")
-                continue
-            
-            # 检查字段内容
-            field_errors = self._validate_task2_fields(key, value)
-            validation_errors.extend(field_errors)
-            
-            # 如果通过验证，添加到结果中
-            if not field_errors:
-                validated_results[key] = value
+        # 检查必需字段
+        missing_fields = [field for field in TASK2_FIELDS if field not in value]
         
-        if validation_errors:
-            self.logger.warning(f"任务2验证发现 {len(validation_errors)} 个错误: {validation_errors}")
-        else:
-            self.logger.info("任务2输出格式验证通过")
+        if missing_fields:
+            return [f"{key} 缺少字段: {missing_fields}"]
         
-        return validated_results
+        # 检查字段内容
+        return self._validate_task2_fields(key, value)
     
     def _validate_task2_fields(self, key: str, association_info: Dict[str, Any]) -> List[str]:
         """
@@ -173,8 +358,7 @@ class OutputValidator:
         
         # 验证关联关系
         relationship = association_info.get("关联关系", "")
-        valid_relationships = ["主从关系", "因果关系"]
-        if relationship not in valid_relationships:
+        if relationship not in VALID_RELATIONSHIPS:
             errors.append(f"{key} 关联关系无效: {relationship}")
         
         # 验证关联描述
@@ -207,15 +391,8 @@ class OutputValidator:
         Returns:
             格式是否正确
         """
-        # 检查是否包含.pdf后缀
-        if document_source.endswith('.pdf'):
-            return False
-        
-        # 检查是否包含特殊字符
-        if re.search(r'[<>:"/\\|?*]', document_source):
-            return False
-        
-        return True
+        # 检查是否包含.pdf后缀和特殊字符
+        return not document_source.endswith('.pdf') and not INVALID_SOURCE_CHARS.search(document_source)
     
     def _validate_page_format(self, page_info: str) -> bool:
         """
@@ -228,10 +405,7 @@ class OutputValidator:
             格式是否正确
         """
         # 检查标准格式: "第X页" 或 "第X-Y页"
-        pattern1 = r'^第\d+页$'  # 第3页
-        pattern2 = r'^第\d+-\d+页$'  # 第12-13页
-        
-        return bool(re.match(pattern1, page_info) or re.match(pattern2, page_info))
+        return PAGE_PATTERN.match(page_info) is not None
     
     def generate_validation_report(self, task1_results: Dict[str, Any], 
                                  task2_results: Dict[str, Any]) -> Dict[str, Any]:
@@ -242,21 +416,36 @@ class OutputValidator:
             task1_results: 任务1结果
             task2_results: 任务2结果
             
+        Returns:
+            验证报告
+        """
+        return self.build_report(self._analyze_task1_results(task1_results),
+                                 self._analyze_task2_results(task2_results))
+    
+    def build_report(self, task1_analysis: Dict[str, Any], task2_analysis: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        由两个任务的完整性分析生成验证报告
+        
+        Args:
+            task1_analysis: 任务1完整性分析
+            task2_analysis: 任务2完整性分析
+            
         Returns:
             验证报告
         """
         report = {
-            "task1_validation": self._analyze_task1_results(task1_results),
-            "task2_validation": self._analyze_task2_results(task2_results),
+            "task1_validation": task1_analysis,
+            "task2_validation": task2_analysis,
             "overall_assessment": {},
             "recommendations": []
         }
         
         # 总体评估
-        task1_score = report["task1_validation"]["completeness_score"]
-        task2_score = report["task2_validation"]["completeness_score"]
+        task1_score = task1_analysis["completeness_score"]
+        task2_score = task2_analysis["completeness_score"]
+        has_task2 = task2_analysis["total_associations"] > 0
         
-        overall_score = (task1_score + task2_score) / 2 if task2_results else task1_score
+        overall_score = (task1_score + task2_score) / 2 if has_task2 else task1_score
         
         report["overall_assessment"] = {
             "overall_score": overall_score,
@@ -269,7 +458,7 @@ class OutputValidator:
         if task1_score < 0.8:
             report["recommendations"].append("任务1: 检查术语定义完整性和文档出处格式")
         
-        if task2_results and task2_score < 0.8:
+        if has_task2 and task2_score < 0.8:
             report["recommendations"].append("任务2: 检查关联关系类型和描述完整性")
         
         if not report["recommendations"]:
@@ -279,65 +468,24 @@ class OutputValidator:
     
     def _analyze_task1_results(self, task1_results: Dict[str, Any]) -> Dict[str, Any]:
         """分析任务1结果"""
-        analysis = {
-            "total_terms": len(task1_results),
-            "complete_terms": 0,
-            "incomplete_terms": [],
-            "completeness_score": 0.0
+        incomplete = [key for key, value in task1_results.items() if not is_task1_complete(value)]
+        total = len(task1_results)
+        
+        return {
+            "total_terms": total,
+            "complete_terms": total - len(incomplete),
+            "incomplete_terms": incomplete,
+            "completeness_score": (total - len(incomplete)) / total if total > 0 else 0.0
         }
-        
-        for key, value in task1_results.items():
-            # 检查术语是否完整
-            is_complete = all([
-                value.get("术语名称"),
-                value.get("术语定义"),
-                value.get("文档出处"),
-                value.get("文档页数")
-            ])
-            
-            if is_complete:
-                analysis["complete_terms"] += 1
-            else:
-                analysis["incomplete_terms"].append(key)
-        
-        # 计算完整性分数
-        if analysis["total_terms"] > 0:
-            analysis["completeness_score"] = analysis["complete_terms"] / analysis["total_terms"]
-        
-        return analysis
     
     def _analyze_task2_results(self, task2_results: Dict[str, Any]) -> Dict[str, Any]:
         """分析任务2结果"""
-        if not task2_results:
-            return {
-                "total_associations": 0,
-                "complete_associations": 0,
-                "incomplete_associations": [],
-                "completeness_score": 0.0
-            }
-        
-        analysis = {
-            "total_associations": len(task2_results),
-            "complete_associations": 0,
-            "incomplete_associations": [],
-            "completeness_score": 0.0
+        incomplete = [key for key, value in task2_results.items() if not is_task2_complete(value)]
+        total = len(task2_results)
+        
+        return {
+            "total_associations": total,
+            "complete_associations": total - len(incomplete),
+            "incomplete_associations": incomplete,
+            "completeness_score": (total - len(incomplete)) / total if total > 0 else 0.0
         }
-        
-        for key, value in task2_results.items():
-            # 检查关联关系是否完整
-            is_complete = all([
-                value.get("术语关联") and len(value["术语关联"]) == 2,
-                value.get("关联关系") in ["主从关系", "因果关系"],
-                value.get("关联描述") and len(value["关联描述"]) > 0
-            ])
-            
-            if is_complete:
-                analysis["complete_associations"] += 1
-            else:
-                analysis["incomplete_associations"].append(key)
-        
-        # 计算完整性分数
-        if analysis["total_associations"] > 0:
-            analysis["completeness_score"] = analysis["complete_associations"] / analysis["total_associations"]
-        
-        return analysis
\ No newline at end of file
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+结果缓存模块
+按语料版本、规则版本和配置阈值持久化缓存术语抽取与术语对关联结果
+"""
+
+import json
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List, Tuple, Optional
+
+from src.metrics import metrics
+
+# 决定抽取/关联结果的源文件，内容变化时缓存自动失效
+RULE_SOURCE_FILES = [
+    'src/rules.py',
+    'src/utils.py',
+    'src/dedup.py',
+    'src/sentence_store.py',
+    'src/term_dictionary.py',
+    'scripts/extract_terms.py',
+    'scripts/associate_terms.py',
+    'scripts/stream_pipeline.py'
+]
+
+# 读取命中时最近访问时间先记在内存中，累计到该数量或写入、关闭时再批量写回
+TOUCH_BATCH = 256
+
+PROJECT_ROOT = Path(__file__).parent.parent
+
+
+def corpus_version(pdf_dir: str) -> str:
+    """
+    计算语料版本：基于目录中PDF文件的名称、大小和修改时间
+    
+    Args:
+        pdf_dir: PDF目录
+    
+    Returns:
+        语料版本哈希
+    """
+    digest = hashlib.sha1()
+    for pdf_file in sorted(Path(pdf_dir).glob("*.pdf")):
+        stat = pdf_file.stat()
+        digest.update(f"{pdf_file.name}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+
+def rules_version() -> str:
+    """
+    计算规则版本：基于抽取规则和分析代码的文件内容
+    
+    Returns:
+        规则版本哈希
+    """
+    digest = hashlib.sha1()
+    for relative_path in RULE_SOURCE_FILES:
+        path = PROJECT_ROOT / relative_path
+        if path.exists():
+            digest.update(relative_path.encode('utf-8'))
+            digest.update(path.read_bytes())
+    return digest.hexdigest()[:16]
+
+
+class ResultCache:
+    """基于SQLite的持久化结果缓存，按最近访问时间做容量淘汰（LRU）"""
+    
+    def __init__(self, path: str, corpus_version: str, rules_version: str,
+                 max_entries: int = 50000, settings: Dict[str, Any] = None):
+        """
+        初始化结果缓存
+        
+        Args:
+            path: SQLite数据库路径
+            corpus_version: 语料版本
+            rules_version: 规则版本
+            max_entries: 最大缓存条目数
+            settings: 对所有结果都有影响的语料处理配置（如近重复检测），作为缓存键的一部分
+        """
+        self.path = path
+        self.corpus_version = corpus_version
+        self.rules_version = rules_version
+        self.max_entries = max_entries
+        self.settings = settings or {}
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        
+        # 语料有未解析的页面时结果不代表完整语料，不写入缓存
+        self.writable = True
+        # 待写回的最近访问时间：键 -> 访问时钟
+        self._touched: Dict[str, int] = {}
+        
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS results ("
+            "key TEXT PRIMARY KEY, kind TEXT, value TEXT, last_access INTEGER)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_last_access ON results(last_access)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._invalidate_if_stale()
+        
+        row = self._conn.execute("SELECT COUNT(*), COALESCE(MAX(last_access), 0) FROM results").fetchone()
+        self._size, self._clock = row
+        self._conn.commit()
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ResultCache']:
+        """
+        根据配置创建结果缓存
+        
+        Args:
+            config: 系统配置
+        
+        Returns:
+            结果缓存，未开启或创建失败时返回None
+        """
+        cache_config = config.get('result_cache', {})
+        if not cache_config.get('enabled', True):
+            return None
+        
+        try:
+            return cls(
+                cache_config.get('path', 'data/processed/result_cache.sqlite'),
+                corpus_version(config.get('data_dir', 'data/raw')),
+                rules_version(),
+                cache_config.get('max_entries', 50000),
+                {'dedup': config.get('dedup', {})}
+            )
+        except (sqlite3.Error, OSError) as e:
+            logging.getLogger(__name__).warning(f"结果缓存不可用: {e}")
+            return None
+    
+    def _invalidate_if_stale(self) -> None:
+        """语料或规则版本变化时清空缓存"""
+        stored = dict(self._conn.execute("SELECT name, value FROM meta").fetchall())
+        if stored.get('corpus_version') == self.corpus_version and \
+           stored.get('rules_version') == self.rules_version:
+            return
+        
+        if stored:
+            self.logger.info("语料或规则版本已变化，清空结果缓存")
+        self._conn.execute("DELETE FROM results")
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+            [('corpus_version', self.corpus_version), ('rules_version', self.rules_version)]
+        )
+    
+    def record_parse_report(self, parse_report: Dict[str, Any]) -> None:
+        """
+        根据解析报告决定是否写入缓存：有被跳过（包括之后由备用后端恢复）的页面时，
+        结果与完整解析的语料不同，不能以同一语料版本缓存
+        
+        Args:
+            parse_report: PDFParser 的解析报告
+        """
+        skipped = len(parse_report.get('skipped_pages', []))
+        self.writable = not skipped
+        if skipped:
+            self.logger.warning(f"语料有 {skipped} 个页面被跳过，本次运行的结果不写入结果缓存")
+    
+    def make_key(self, kind: str, subject: List[str], params: Dict[str, Any]) -> str:
+        """
+        生成缓存键
+        
+        Args:
+            kind: 结果类型（term/pair）
+            subject: 术语或无序术语对
+            params: 影响结果的配置阈值
+        
+        Returns:
+            缓存键
+        """
+        raw = json.dumps([kind, subject, params, self.settings, self.corpus_version, self.rules_version],
+                         ensure_ascii=False, sort_keys=True)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+    
+    def get(self, kind: str, subject: List[str], params: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        读取缓存
+        
+        Args:
+            kind: 结果类型
+            subject: 术语或无序术语对
+            params: 影响结果的配置阈值
+        
+        Returns:
+            (是否命中, 缓存值)，缓存值可能为None（表示已确认无结果）
+        """
+        key = self.make_key(kind, subject, params)
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                metrics.incr(f'cache.{kind}_misses')
+                return False, None
+            
+            self._clock += 1
+            self._touched[key] = self._clock
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched()
+                self._conn.commit()
+        
+        metrics.incr(f'cache.{kind}_hits')
+        return True, json.loads(row[0])
+    
+    def put(self, kind: str, subject: List[str], params: Dict[str, Any], value: Any) -> None:
+        """
+        写入缓存，超过容量时淘汰最久未访问的条目
+        
+        Args:
+            kind: 结果类型
+            subject: 术语或无序术语对
+            params: 影响结果的配置阈值
+            value: 结果（可为None）
+        """
+        if not self.writable:
+            return
+        
+        key = self.make_key(kind, subject, params)
+        with self._lock:
+            # 淘汰按最近访问时间进行，先写回读取命中的访问时间
+            self._flush_touched()
+            self._clock += 1
+            cursor = self._conn.execute("SELECT 1 FROM results WHERE key = ?", (key,))
+            if cursor.fetchone() is None:
+                self._size += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO results (key, kind, value, last_access) VALUES (?, ?, ?, ?)",
+                (key, kind, json.dumps(value, ensure_ascii=False), self._clock)
+            )
+            
+            if self._size > self.max_entries:
+                evict = self._size - self.max_entries
+                self._conn.execute(
+                    "DELETE FROM results WHERE key IN "
+                    "(SELECT key FROM results ORDER BY last_access LIMIT ?)", (evict,)
+                )
+                self._size -= evict
+                metrics.incr('cache.evictions', evict)
+            
+            self._conn.commit()
+    
+    def _flush_touched(self) -> None:
+        """把内存中的最近访问时间写回数据库（调用方持有锁并负责提交）"""
+        if self._touched:
+            self._conn.executemany("UPDATE results SET last_access = ? WHERE key = ?",
+                                   [(clock, key) for key, clock in self._touched.items()])
+            self._touched.clear()
+    
+    def flush(self) -> None:
+        """写回尚未保存的最近访问时间"""
+        with self._lock:
+            if self._touched:
+                self._flush_touched()
+                self._conn.commit()
+    
+    def __len__(self) -> int:
+        return self._size
+    
+    def close(self) -> None:
+        """写回访问时间并关闭数据库连接"""
+        with self._lock:
+            self._flush_touched()
+            self._conn.commit()
+            self._conn.close()
\ No newline at end of file
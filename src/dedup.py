@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+近重复检测模块
+基于MinHash签名和LSH分桶，在文档和页面两级找出近重复内容（系列标准的分册、修订版中重复的章节），
+重复页面只保留一个规范副本并记录所有出处
+"""
+
+import re
+import logging
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from src.metrics import metrics
+
+# 哈希运算在梅森素数模下进行，乘积不超过uint64
+_MERSENNE_PRIME = np.uint64((1 << 31) - 1)
+_SHINGLE_BASE = np.uint64(1000003)
+
+_WHITESPACE_PATTERN = re.compile(r'\s+')
+_DOCUMENT_YEAR_PATTERN = re.compile(r'[-—](\d{4})(?!.*\d{4})')
+
+
+def document_year(file_stem: str) -> int:
+    """
+    从标准文件名中取发布年份，如 GB+14778-2025 -> 2025
+    
+    Args:
+        file_stem: 文件名（不含扩展名）
+    
+    Returns:
+        年份，无法识别时为0
+    """
+    match = _DOCUMENT_YEAR_PATTERN.search(file_stem)
+    return int(match.group(1)) if match else 0
+
+
+def canonical_order_key(doc: Dict[str, Any]) -> tuple:
+    """规范副本的选择顺序：发布年份最新的优先，其次按文件名"""
+    return (-document_year(doc.get('file_stem', '')), doc['file_name'])
+
+
+class MinHasher:
+    """字符shingle的MinHash签名"""
+    
+    def __init__(self, num_perm: int = 64, shingle_size: int = 5, seed: int = 1):
+        """
+        初始化MinHash
+        
+        Args:
+            num_perm: 哈希函数个数（签名长度）
+            shingle_size: shingle长度（字符）
+            seed: 随机种子，固定后签名在不同运行间一致
+        """
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = np.random.RandomState(seed)
+        self._a = rng.randint(1, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)[:, None]
+        self._b = rng.randint(0, int(_MERSENNE_PRIME), size=num_perm).astype(np.uint64)[:, None]
+    
+    def shingle_hashes(self, text: str) -> np.ndarray:
+        """
+        去除空白后计算所有字符shingle的多项式滚动哈希（去重）
+        
+        Args:
+            text: 文本
+        
+        Returns:
+            shingle哈希数组
+        """
+        normalized = _WHITESPACE_PATTERN.sub('', text or '')
+        count = len(normalized) - self.shingle_size + 1
+        if count <= 0:
+            return np.zeros(0, dtype=np.uint64)
+        
+        codes = np.frombuffer(normalized.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+        hashes = np.zeros(count, dtype=np.uint64)
+        for offset in range(self.shingle_size):
+            hashes = (hashes * _SHINGLE_BASE + codes[offset:offset + count]) % _MERSENNE_PRIME
+        return np.unique(hashes)
+    
+    def signature(self, text: str, block_size: int = 8192) -> Optional[np.ndarray]:
+        """
+        计算文本的MinHash签名
+        
+        Args:
+            text: 文本
+            block_size: 分块计算，限制中间矩阵大小
+        
+        Returns:
+            签名数组，文本短于一个shingle时返回None
+        """
+        hashes = self.shingle_hashes(text)
+        if not len(hashes):
+            return None
+        
+        signature = np.full(self.num_perm, _MERSENNE_PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), block_size):
+            block = hashes[None, start:start + block_size]
+            np.minimum(signature, ((self._a * block + self._b) % _MERSENNE_PRIME).min(axis=1), out=signature)
+        return signature
+
+
+def lsh_clusters(signatures: List[np.ndarray], bands: int, threshold: float) -> List[List[int]]:
+    """
+    LSH分桶找候选对，按签名估计的Jaccard相似度确认后用并查集合并成簇
+    
+    Args:
+        signatures: 签名列表
+        bands: 分段数，签名长度需能被整除
+        threshold: 估计相似度阈值
+    
+    Returns:
+        包含两个及以上成员的簇（成员为签名下标，升序）
+    """
+    if len(signatures) < 2:
+        return []
+    
+    matrix = np.vstack(signatures)
+    rows = matrix.shape[1] // bands
+    parent = list(range(len(signatures)))
+    
+    def find(node: int) -> int:
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+    
+    checked = set()
+    for band in range(bands):
+        buckets = {}
+        for index, key in enumerate(matrix[:, band * rows:(band + 1) * rows]):
+            buckets.setdefault(key.tobytes(), []).append(index)
+        
+        for members in buckets.values():
+            first = members[0]
+            for other in members[1:]:
+                if (first, other) in checked or find(first) == find(other):
+                    continue
+                checked.add((first, other))
+                if np.mean(matrix[first] == matrix[other]) >= threshold:
+                    parent[find(other)] = find(first)
+    
+    clusters = {}
+    for index in range(len(signatures)):
+        clusters.setdefault(find(index), []).append(index)
+    return [members for members in clusters.values() if len(members) > 1]
+
+
+class CorpusDeduplicator:
+    """语料近重复检测：标记重复页面和近重复文档"""
+    
+    def __init__(self, config: Dict[str, Any] = None):
+        """初始化近重复检测"""
+        self.config = config or {}
+        self.logger = logging.getLogger(__name__)
+        
+        dedup_config = self.config.get('dedup', {})
+        self.bands = dedup_config.get('bands', 16)
+        self.page_threshold = dedup_config.get('page_threshold', 0.9)
+        self.document_threshold = dedup_config.get('document_threshold', 0.8)
+        self.min_chars = dedup_config.get('min_chars', 50)
+        self.hasher = MinHasher(
+            dedup_config.get('num_perm', 64),
+            dedup_config.get('shingle_size', 5),
+            dedup_config.get('seed', 1)
+        )
+    
+    def deduplicate(self, pdf_documents: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        标记重复页面：每组近重复页面中，发布年份最新（其次文件名靠前）的文档中的页面为规范副本，
+        规范页面的 duplicates 记录其他出处，其余页面的 duplicate_of 指向规范页面，抽取和关联分析跳过这些页面
+        
+        Args:
+            pdf_documents: PDF文档列表（原地标记）
+        
+        Returns:
+            去重报告
+        """
+        rank = {id(doc): position for position, doc in
+                enumerate(sorted(pdf_documents, key=canonical_order_key))}
+        
+        units = []
+        signatures = []
+        document_signatures = {}
+        for doc in pdf_documents:
+            doc.pop('duplicate_of', None)
+            for page in doc['pages']:
+                page.pop('duplicate_of', None)
+                page.pop('duplicates', None)
+                if page.get('skipped') or len(page.get('text') or '') < self.min_chars:
+                    continue
+                signature = self.hasher.signature(page['text'])
+                if signature is None:
+                    continue
+                units.append((doc, page))
+                signatures.append(signature)
+                
+                # 文档签名是各页面签名的逐位最小值（即页面shingle并集的签名）
+                if id(doc) in document_signatures:
+                    np.minimum(document_signatures[id(doc)], signature, out=document_signatures[id(doc)])
+                else:
+                    document_signatures[id(doc)] = signature.copy()
+        
+        page_report = []
+        duplicate_pages = 0
+        for members in lsh_clusters(signatures, self.bands, self.page_threshold):
+            members.sort(key=lambda index: (rank[id(units[index][0])], units[index][1]['page_number']))
+            canonical_doc, canonical_page = units[members[0]]
+            sources = []
+            for index in members[1:]:
+                doc, page = units[index]
+                page['duplicate_of'] = {'document': canonical_doc['file_stem'],
+                                        'page_number': canonical_page['page_number']}
+                sources.append({'document': doc['file_stem'], 'page_number': page['page_number']})
+            canonical_page['duplicates'] = sources
+            duplicate_pages += len(sources)
+            page_report.append({
+                'canonical': {'document': canonical_doc['file_stem'], 'page_number': canonical_page['page_number']},
+                'duplicates': sources
+            })
+        
+        documents = [doc for doc in pdf_documents if id(doc) in document_signatures]
+        document_report = []
+        for members in lsh_clusters([document_signatures[id(doc)] for doc in documents],
+                                    self.bands, self.document_threshold):
+            cluster = sorted((documents[index] for index in members), key=canonical_order_key)
+            for doc in cluster[1:]:
+                doc['duplicate_of'] = cluster[0]['file_stem']
+            document_report.append({
+                'canonical': cluster[0]['file_stem'],
+                'duplicates': [doc['file_stem'] for doc in cluster[1:]]
+            })
+        
+        metrics.incr('dedup.duplicate_pages', duplicate_pages)
+        metrics.incr('dedup.duplicate_documents', sum(len(item['duplicates']) for item in document_report))
+        if duplicate_pages:
+            self.logger.info(f"近重复检测: {len(units)} 个页面中 {duplicate_pages} 个为重复页面，"
+                             f"{len(document_report)} 组近重复文档")
+        
+        return {
+            'pages_checked': len(units),
+            'duplicate_pages': duplicate_pages,
+            'page_clusters': page_report,
+            'document_clusters': document_report
+        }
\ No newline at end of file
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+术语关联图存储模块
+以CSR邻接数组存储带类型和置信度权重的无向关联边，支持增量更新、邻居/多跳/最短路径查询和度统计
+"""
+
+import json
+import logging
+from collections import deque
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+# 边类型编码
+EDGE_TYPES = ["主从关系", "因果关系", "其他关系"]
+EDGE_TYPE_CODES = {relationship: code for code, relationship in enumerate(EDGE_TYPES)}
+
+
+class AssociationGraph:
+    """术语关联图：CSR邻接数组 + 增量缓冲区"""
+    
+    def __init__(self, compact_threshold: int = 4096):
+        """
+        初始化关联图
+        
+        Args:
+            compact_threshold: 增量缓冲区中的边数超过该值（且超过CSR边数的1/4）时合并进CSR
+        """
+        self.logger = logging.getLogger(__name__)
+        self.compact_threshold = compact_threshold
+        
+        # 生成关联边的语料/规则版本，由调用方设置，随关联图保存
+        self.version = ''
+        
+        self.node_ids: Dict[str, int] = {}
+        self.node_names: List[str] = []
+        
+        # CSR邻接数组，每条无向边在两个端点的行中各存一次
+        self.indptr = np.zeros(1, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int32)
+        self.edge_types = np.zeros(0, dtype=np.int8)
+        self.weights = np.zeros(0, dtype=np.float32)
+        
+        # 增量缓冲区：节点 -> {邻居: (边类型, 权重)}，存放尚未合并进CSR的新边
+        self._delta: Dict[int, Dict[int, Tuple[int, float]]] = {}
+        self._delta_edges = 0
+    
+    def __len__(self) -> int:
+        return len(self.node_names)
+    
+    @property
+    def edge_count(self) -> int:
+        """无向边数量"""
+        return len(self.indices) // 2 + self._delta_edges
+    
+    def add_node(self, term: str) -> int:
+        """
+        添加节点（已存在时直接返回编号）
+        
+        Args:
+            term: 术语
+        
+        Returns:
+            节点编号
+        """
+        node = self.node_ids.get(term)
+        if node is None:
+            node = self.node_ids[term] = len(self.node_names)
+            self.node_names.append(term)
+        return node
+    
+    def add_edge(self, term1: str, term2: str, relationship: str, confidence: float) -> None:
+        """
+        添加或更新一条关联边，已有的边原地更新类型和权重
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+            relationship: 关联关系（主从关系/因果关系）
+            confidence: 置信度
+        """
+        if term1 == term2:
+            return
+        
+        node1, node2 = self.add_node(term1), self.add_node(term2)
+        edge_type = EDGE_TYPE_CODES.get(relationship, EDGE_TYPE_CODES["其他关系"])
+        
+        if self._update_csr_edge(node1, node2, edge_type, confidence):
+            self._update_csr_edge(node2, node1, edge_type, confidence)
+            return
+        
+        if node2 not in self._delta.get(node1, {}):
+            self._delta_edges += 1
+        self._delta.setdefault(node1, {})[node2] = (edge_type, confidence)
+        self._delta.setdefault(node2, {})[node1] = (edge_type, confidence)
+        
+        if self._delta_edges > max(self.compact_threshold, len(self.indices) // 8):
+            self.compact()
+    
+    def add_associations(self, associations: Dict[str, Any]) -> None:
+        """
+        批量添加关联分析结果（R01格式）
+        
+        Args:
+            associations: 关联关系分析结果
+        """
+        for association in associations.values():
+            term1, term2 = association["术语关联"]
+            self.add_edge(term1, term2, association["关联关系"], association.get("置信度", 1.0))
+    
+    def _update_csr_edge(self, node: int, neighbour: int, edge_type: int, confidence: float) -> bool:
+        """在CSR行中查找并更新边，返回边是否存在"""
+        if node >= len(self.indptr) - 1:
+            return False
+        start, end = self.indptr[node], self.indptr[node + 1]
+        positions = np.flatnonzero(self.indices[start:end] == neighbour)
+        if not len(positions):
+            return False
+        self.edge_types[start + positions[0]] = edge_type
+        self.weights[start + positions[0]] = confidence
+        return True
+    
+    def compact(self) -> None:
+        """把增量缓冲区合并进CSR数组"""
+        node_count = len(self.node_names)
+        old_rows = np.repeat(np.arange(len(self.indptr) - 1, dtype=np.int32), np.diff(self.indptr))
+        
+        delta_rows = []
+        delta_cols = []
+        delta_types = []
+        delta_weights = []
+        for node, neighbours in self._delta.items():
+            for neighbour, (edge_type, weight) in neighbours.items():
+                delta_rows.append(node)
+                delta_cols.append(neighbour)
+                delta_types.append(edge_type)
+                delta_weights.append(weight)
+        
+        rows = np.concatenate([old_rows, np.asarray(delta_rows, dtype=np.int32)])
+        cols = np.concatenate([self.indices, np.asarray(delta_cols, dtype=np.int32)])
+        types = np.concatenate([self.edge_types, np.asarray(delta_types, dtype=np.int8)])
+        weights = np.concatenate([self.weights, np.asarray(delta_weights, dtype=np.float32)])
+        
+        order = np.lexsort((cols, rows))
+        self.indices = cols[order]
+        self.edge_types = types[order]
+        self.weights = weights[order]
+        self.indptr = np.zeros(node_count + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=node_count), out=self.indptr[1:])
+        
+        self._delta = {}
+        self._delta_edges = 0
+    
+    def neighbors(self, term: str, relationship: str = None) -> List[Tuple[str, str, float]]:
+        """
+        查询术语的直接邻居，耗时与节点度成正比
+        
+        Args:
+            term: 术语
+            relationship: 只返回指定关系类型的边
+        
+        Returns:
+            [(邻居术语, 关联关系, 置信度), ...]，按置信度从高到低排序
+        """
+        node = self.node_ids.get(term)
+        if node is None:
+            return []
+        
+        wanted = EDGE_TYPE_CODES.get(relationship) if relationship else None
+        result = [
+            (self.node_names[neighbour], EDGE_TYPES[edge_type], round(float(weight), 6))
+            for neighbour, edge_type, weight in self._iter_neighbors(node)
+            if wanted is None or edge_type == wanted
+        ]
+        result.sort(key=lambda item: -item[2])
+        return result
+    
+    def _iter_neighbors(self, node: int):
+        """遍历节点的邻居 (邻居编号, 边类型, 权重)"""
+        if node < len(self.indptr) - 1:
+            start, end = self.indptr[node], self.indptr[node + 1]
+            yield from zip(self.indices[start:end].tolist(), self.edge_types[start:end].tolist(),
+                           self.weights[start:end].tolist())
+        for neighbour, (edge_type, weight) in self._delta.get(node, {}).items():
+            yield neighbour, edge_type, weight
+    
+    def k_hop(self, term: str, k: int = 2) -> Dict[str, int]:
+        """
+        查询k跳以内可达的术语
+        
+        Args:
+            term: 起点术语
+            k: 最大跳数
+        
+        Returns:
+            {术语: 跳数}，不含起点
+        """
+        start = self.node_ids.get(term)
+        if start is None:
+            return {}
+        
+        distances = {start: 0}
+        frontier = deque([start])
+        while frontier:
+            node = frontier.popleft()
+            if distances[node] >= k:
+                continue
+            for neighbour, _, _ in self._iter_neighbors(node):
+                if neighbour not in distances:
+                    distances[neighbour] = distances[node] + 1
+                    frontier.append(neighbour)
+        
+        return {self.node_names[node]: hops for node, hops in distances.items() if node != start}
+    
+    def shortest_path(self, source: str, target: str, max_hops: int = None) -> Optional[List[str]]:
+        """
+        查询两个术语之间跳数最少的路径（双向广度优先搜索）
+        
+        Args:
+            source: 起点术语
+            target: 终点术语
+            max_hops: 最大跳数，超过时视为不可达
+        
+        Returns:
+            路径上的术语列表，不可达时返回None
+        """
+        start, goal = self.node_ids.get(source), self.node_ids.get(target)
+        if start is None or goal is None:
+            return None
+        if start == goal:
+            return [source]
+        
+        parents = [{start: None}, {goal: None}]
+        frontiers = [[start], [goal]]
+        hops = 0
+        
+        while frontiers[0] and frontiers[1]:
+            if max_hops is not None and hops >= max_hops:
+                return None
+            hops += 1
+            
+            # 扩展较小的一侧
+            side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+            next_frontier = []
+            for node in frontiers[side]:
+                for neighbour, _, _ in self._iter_neighbors(node):
+                    if neighbour in parents[side]:
+                        continue
+                    parents[side][neighbour] = node
+                    if neighbour in parents[1 - side]:
+                        return self._join_path(neighbour, parents)
+                    next_frontier.append(neighbour)
+            frontiers[side] = next_frontier
+        
+        return None
+    
+    def _join_path(self, meeting: int, parents: List[Dict[int, Optional[int]]]) -> List[str]:
+        """拼接双向搜索在相遇节点处的路径"""
+        path = []
+        node = meeting
+        while node is not None:
+            path.append(node)
+            node = parents[0][node]
+        path.reverse()
+        node = parents[1][meeting]
+        while node is not None:
+            path.append(node)
+            node = parents[1][node]
+        return [self.node_names[node] for node in path]
+    
+    def degrees(self) -> np.ndarray:
+        """
+        计算所有节点的度
+        
+        Returns:
+            按节点编号排列的度数组
+        """
+        node_count = len(self.node_names)
+        degrees = np.zeros(node_count, dtype=np.int64)
+        csr_rows = len(self.indptr) - 1
+        degrees[:csr_rows] = np.diff(self.indptr)
+        for node, neighbours in self._delta.items():
+            degrees[node] += len(neighbours)
+        return degrees
+    
+    def degree(self, term: str) -> int:
+        """查询术语的度"""
+        node = self.node_ids.get(term)
+        if node is None:
+            return 0
+        csr_degree = int(self.indptr[node + 1] - self.indptr[node]) if node < len(self.indptr) - 1 else 0
+        return csr_degree + len(self._delta.get(node, {}))
+    
+    def degree_stats(self) -> Dict[str, Any]:
+        """
+        度统计
+        
+        Returns:
+            节点数、边数、平均/最大度、孤立节点数、各关系类型的边数
+        """
+        degrees = self.degrees()
+        type_counts = np.bincount(self.edge_types, minlength=len(EDGE_TYPES)) // 2
+        for node, neighbours in self._delta.items():
+            for neighbour, (edge_type, _) in neighbours.items():
+                if node < neighbour:
+                    type_counts[edge_type] += 1
+        
+        return {
+            'nodes': len(self.node_names),
+            'edges': self.edge_count,
+            'mean_degree': round(float(degrees.mean()), 4) if len(degrees) else 0.0,
+            'max_degree': int(degrees.max()) if len(degrees) else 0,
+            'isolated_nodes': int((degrees == 0).sum()),
+            'edge_types': {relationship: int(count) for relationship, count in zip(EDGE_TYPES, type_counts)}
+        }
+    
+    def label_propagation(self, max_iterations: int = 30, seed: int = 0) -> np.ndarray:
+        """
+        加权标签传播社区发现（半同步更新），每轮迭代为O(E log E)
+        
+        每个节点取邻居中权重和最大的标签，节点按随机着色分成两半交替更新以避免同步更新的振荡，
+        平局时随机选择；所有节点的当前标签都已是邻居中得分最高的标签之一，或达到最大迭代次数时停止。
+        
+        Args:
+            max_iterations: 最大迭代次数
+            seed: 随机种子，保证结果可复现
+            
+        Returns:
+            按节点编号排列的社区标签数组，孤立节点自成一个社区
+        """
+        self.compact()
+        node_count = len(self.node_names)
+        labels = np.arange(node_count, dtype=np.int64)
+        if not len(self.indices):
+            return labels
+        
+        rng = np.random.default_rng(seed)
+        rows = np.repeat(np.arange(node_count, dtype=np.int64), np.diff(self.indptr))
+        cols = self.indices.astype(np.int64)
+        weights = self.weights.astype(np.float64)
+        has_neighbors = np.diff(self.indptr) > 0
+        
+        for iteration in range(max_iterations):
+            unstable = 0
+            halves = rng.random(node_count) < 0.5
+            for half in (halves, ~halves):
+                # 按 (节点, 邻居标签) 汇总边权重
+                keys = rows * node_count + labels[cols]
+                unique_keys, inverse = np.unique(keys, return_inverse=True)
+                scores = np.bincount(inverse, weights=weights)
+                key_rows = unique_keys // node_count
+                key_labels = unique_keys % node_count
+                
+                # 每个节点取得分最高的标签，平局时用极小的随机扰动随机选择
+                order = np.lexsort((-(scores + rng.random(len(scores)) * 1e-9), key_rows))
+                first = np.ones(len(order), dtype=bool)
+                first[1:] = key_rows[order][1:] != key_rows[order][:-1]
+                best_rows = key_rows[order][first]
+                best_labels = key_labels[order][first]
+                best_scores = scores[order][first]
+                
+                # 当前标签已是最高得分之一的节点视为稳定
+                current_scores = np.zeros(node_count)
+                is_current = key_labels == labels[key_rows]
+                current_scores[key_rows[is_current]] = scores[is_current]
+                
+                update = half[best_rows] & has_neighbors[best_rows]
+                unstable += int((best_scores[update] > current_scores[best_rows[update]] + 1e-9).sum())
+                labels[best_rows[update]] = best_labels[update]
+            
+            if not unstable:
+                break
+        
+        return labels
+    
+    def communities(self, max_iterations: int = 30, seed: int = 0) -> Dict[str, Any]:
+        """
+        计算社区划分
+        
+        Args:
+            max_iterations: 标签传播最大迭代次数
+            seed: 随机种子
+            
+        Returns:
+            {'method', 'clusters': [{'id', 'size', 'members'}], 'assignments': {术语: 社区编号}}，
+            社区按规模从大到小编号（从1开始）
+        """
+        labels = self.label_propagation(max_iterations, seed)
+        members: Dict[int, List[str]] = {}
+        for node, label in enumerate(labels.tolist()):
+            members.setdefault(label, []).append(self.node_names[node])
+        
+        ordered = sorted(members.values(), key=lambda group: (-len(group), group[0]))
+        clusters = [
+            {'id': cluster_id, 'size': len(group), 'members': group}
+            for cluster_id, group in enumerate(ordered, 1)
+        ]
+        
+        return {
+            'method': 'label_propagation',
+            'clusters': clusters,
+            'assignments': {term: cluster['id'] for cluster in clusters for term in cluster['members']}
+        }
+    
+    def edges(self):
+        """
+        遍历所有无向边
+        
+        Yields:
+            (术语1, 术语2, 关联关系, 置信度)
+        """
+        self.compact()
+        rows = np.repeat(np.arange(len(self.indptr) - 1), np.diff(self.indptr))
+        for row, col, edge_type, weight in zip(rows.tolist(), self.indices.tolist(),
+                                               self.edge_types.tolist(), self.weights.tolist()):
+            if row < col:
+                yield self.node_names[row], self.node_names[col], EDGE_TYPES[edge_type], round(weight, 6)
+    
+    def save(self, path: str) -> None:
+        """
+        保存关联图（.npz）
+        
+        Args:
+            path: 保存路径
+        """
+        self.compact()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(
+            path,
+            indptr=self.indptr,
+            indices=self.indices,
+            edge_types=self.edge_types,
+            weights=self.weights,
+            nodes=np.frombuffer(json.dumps(self.node_names, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+            version=np.frombuffer(self.version.encode('utf-8'), dtype=np.uint8)
+        )
+        self.logger.info(f"关联图已保存到: {path}（{len(self.node_names)} 个节点，{self.edge_count} 条边）")
+    
+    @classmethod
+    def load(cls, path: str, compact_threshold: int = 4096) -> 'AssociationGraph':
+        """
+        加载关联图
+        
+        Args:
+            path: 保存路径
+            compact_threshold: 增量缓冲区合并阈值
+        
+        Returns:
+            关联图
+        """
+        graph = cls(compact_threshold)
+        with np.load(path) as data:
+            graph.indptr = data['indptr']
+            graph.indices = data['indices']
+            graph.edge_types = data['edge_types']
+            graph.weights = data['weights']
+            graph.node_names = json.loads(data['nodes'].tobytes().decode('utf-8'))
+            if 'version' in data.files:
+                graph.version = data['version'].tobytes().decode('utf-8')
+        graph.node_ids = {term: node for node, term in enumerate(graph.node_names)}
+        return graph
\ No newline at end of file
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+运行指标模块
+各阶段计时器、计数器和直方图，关闭时几乎没有开销
+"""
+
+import json
+import time
+import random
+import logging
+from typing import Dict, Any, List
+
+
+class _NullTimer:
+    """关闭指标时使用的空计时器"""
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    """记录一次计时并累加到指标中"""
+    
+    __slots__ = ('metrics', 'name', 'start')
+    
+    def __init__(self, metrics: 'Metrics', name: str):
+        self.metrics = metrics
+        self.name = name
+        self.start = 0.0
+    
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.metrics.record_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Histogram:
+    """数值分布统计，超过容量后使用蓄水池采样估计分位数"""
+    
+    def __init__(self, capacity: int = 10000):
+        """初始化直方图"""
+        self.capacity = capacity
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.samples: List[float] = []
+    
+    def observe(self, value: float) -> None:
+        """记录一个观测值"""
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        
+        if len(self.samples) < self.capacity:
+            self.samples.append(value)
+        else:
+            index = random.randrange(self.count)
+            if index < self.capacity:
+                self.samples[index] = value
+    
+    def summary(self) -> Dict[str, Any]:
+        """生成分布摘要"""
+        if not self.count:
+            return {'count': 0}
+        
+        ordered = sorted(self.samples)
+        
+        def percentile(p: float) -> float:
+            return ordered[min(len(ordered) - 1, int(p * len(ordered)))]
+        
+        return {
+            'count': self.count,
+            'total': round(self.total, 6),
+            'mean': round(self.total / self.count, 6),
+            'min': round(self.min, 6),
+            'max': round(self.max, 6),
+            'p50': round(percentile(0.5), 6),
+            'p90': round(percentile(0.9), 6),
+            'p99': round(percentile(0.99), 6)
+        }
+
+
+class Metrics:
+    """运行指标收集器"""
+    
+    def __init__(self, enabled: bool = False):
+        """初始化指标收集器"""
+        self.enabled = enabled
+        self.reset()
+    
+    def reset(self) -> None:
+        """清空已收集的指标"""
+        self.timers: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started_at = time.time()
+    
+    def configure(self, config: Dict[str, Any]) -> None:
+        """
+        根据配置开启或关闭指标收集
+        
+        Args:
+            config: 系统配置
+        """
+        self.enabled = bool(config.get('metrics', {}).get('enabled', False))
+    
+    def timer(self, name: str):
+        """
+        返回计时上下文管理器
+        
+        Args:
+            name: 计时器名称，如 stage.parse
+        """
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+    
+    def record_time(self, name: str, seconds: float) -> None:
+        """记录一次耗时"""
+        if not self.enabled:
+            return
+        timer = self.timers.get(name)
+        if timer is None:
+            timer = self.timers[name] = Histogram()
+        timer.observe(seconds)
+    
+    def incr(self, name: str, value: int = 1) -> None:
+        """
+        累加计数器
+        
+        Args:
+            name: 计数器名称，如 extract.pages_scanned
+            value: 增量
+        """
+        if not self.enabled:
+            return
+        self.counters[name] = self.counters.get(name, 0) + value
+    
+    def observe(self, name: str, value: float) -> None:
+        """
+        记录直方图观测值
+        
+        Args:
+            name: 直方图名称
+            value: 观测值
+        """
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = Histogram()
+        histogram.observe(value)
+    
+    def report(self) -> Dict[str, Any]:
+        """
+        生成指标报告
+        
+        Returns:
+            包含计时器、计数器和直方图的报告
+        """
+        return {
+            'started_at': self.started_at,
+            'elapsed': round(time.time() - self.started_at, 3),
+            'timers': {name: timer.summary() for name, timer in sorted(self.timers.items())},
+            'counters': dict(sorted(self.counters.items())),
+            'histograms': {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+        }
+    
+    def save(self, output_path: str) -> bool:
+        """
+        保存指标报告
+        
+        Args:
+            output_path: 输出路径
+        
+        Returns:
+            是否保存成功
+        """
+        # 不复用utils.save_json_output，避免utils与本模块循环导入
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                json.dump(self.report(), f, ensure_ascii=False, indent=2)
+            return True
+        except Exception as e:
+            logging.error(f"保存指标报告失败: {e}")
+            return False
+
+
+# 全局指标收集器，各模块通过 `from src.metrics import metrics` 共享
+metrics = Metrics()
\ No newline at end of file
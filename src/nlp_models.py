@@ -5,11 +5,14 @@ NLP模型模块
 相似度计算、问答、词向量嵌入等接口
 """
 
+import json
 import logging
-import numpy as np
+from pathlib import Path
 from typing import List, Dict, Any, Tuple, Optional
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
+
+import numpy as np
+
+from src.vector_store import VectorStore
 
 
 class NLPModels:
@@ -20,18 +23,29 @@ class NLPModels:
         self.config = config or {}
         self.logger = logging.getLogger(__name__)
         
-        # 初始化TF-IDF向量化器
-        self.tfidf_vectorizer = TfidfVectorizer(
-            max_features=10000,
-            min_df=1,
-            max_df=0.8,
-            stop_words=None,  # 中文需要自定义停用词
-            ngram_range=(1, 2)
-        )
+        # TF-IDF向量化器在首次使用时创建，避免导入本模块就加载sklearn
+        self._tfidf_vectorizer = None
         
         self.is_fitted = False
         self.vocabulary_ = None
         
+        # 离线构建的术语语义空间（SemanticSpace），由调用方按需设置
+        self.semantic_space = None
+    
+    @property
+    def tfidf_vectorizer(self):
+        """TF-IDF向量化器"""
+        if self._tfidf_vectorizer is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            self._tfidf_vectorizer = TfidfVectorizer(
+                max_features=10000,
+                min_df=1,
+                max_df=0.8,
+                stop_words=None,  # 中文需要自定义停用词
+                ngram_range=(1, 2)
+            )
+        return self._tfidf_vectorizer
+        
     def fit_tfidf(self, documents: List[str]) -> None:
         """
         训练TF-IDF模型
@@ -68,6 +82,7 @@ class NLPModels:
         # 方法1: 基于TF-IDF的余弦相似度
         if self.is_fitted:
             try:
+                from sklearn.metrics.pairwise import cosine_similarity
                 vectors = self.tfidf_vectorizer.transform([text1, text2])
                 similarity = cosine_similarity(vectors[0:1], vectors[1:2])[0][0]
                 return float(similarity)
@@ -235,6 +250,206 @@ class NLPModels:
             return "因果关系", causal_score / len(causal_keywords)
         else:
             return "未知关系", 0.0
+    
+    def semantic_similarity(self, term1: str, term2: str) -> float:
+        """
+        两个术语在语义空间中的余弦相似度（不要求在同一句中共现）
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+            
+        Returns:
+            相似度，未加载语义空间或术语不在空间中时为0
+        """
+        if self.semantic_space is None:
+            return 0.0
+        score = self.semantic_space.score_pairs([(term1, term2)])[(term1, term2)]
+        return 0.0 if score is None else score
+    
+    def semantic_pages(self, term: str, top_k: int = 5) -> List[Tuple[Tuple[str, int], float]]:
+        """
+        与术语语义最相近的页面
+        
+        Args:
+            term: 术语
+            top_k: 返回结果数
+            
+        Returns:
+            [((文档, 页码), 相似度), ...]，未加载语义空间时为空
+        """
+        if self.semantic_space is None:
+            return []
+        rerank = self.config.get('semantic_space', {}).get('rerank', 50)
+        return self.semantic_space.similar_pages(term, top_k, rerank)
+
+
+class SemanticSpace:
+    """
+    离线构建的LSA语义空间：语料页面的字符n-gram TF-IDF经TruncatedSVD降维，
+    术语向量是包含该术语的页面向量按出现次数加权的平均；术语向量和页面向量都归一化后
+    存入量化的向量存储（VectorStore），按内存映射加载
+    """
+    
+    INDEX_FILE = 'terms.json'
+    TERMS_DIR = 'terms'
+    PAGES_DIR = 'pages'
+    
+    def __init__(self, terms: List[str], term_store: VectorStore, page_store: VectorStore = None,
+                 pages: List[Tuple[str, int]] = None, metadata: Dict[str, Any] = None):
+        """
+        Args:
+            terms: 术语列表
+            term_store: 术语向量存储（每行一个术语）
+            page_store: 页面向量存储（每行一个页面）
+            pages: 页面出处 [(文档, 页码), ...]，与页面向量逐行对应
+            metadata: 构建参数和统计
+        """
+        self.terms = list(terms)
+        self.term_store = term_store
+        self.page_store = page_store
+        self.pages = [tuple(page) for page in pages or []]
+        self.metadata = metadata or {}
+        self.index = {term: row for row, term in enumerate(self.terms)}
+    
+    @property
+    def vectors(self) -> np.ndarray:
+        """按存储精度保存的术语向量矩阵"""
+        return self.term_store.codes
+    
+    @classmethod
+    def build(cls, texts: List[str], terms: List[str], n_components: int = 128,
+              max_features: int = 50000, ngram_range: Tuple[int, int] = (1, 2), seed: int = 0,
+              pages: List[Tuple[str, int]] = None, dtype: str = 'float16') -> 'SemanticSpace':
+        """
+        由语料页面文本构建语义空间
+        
+        Args:
+            texts: 页面文本列表（建议只用规范副本页面）
+            terms: 需要预计算向量的术语
+            n_components: 降维后的维数（不超过语料规模允许的上限）
+            max_features: TF-IDF特征数上限
+            ngram_range: 字符n-gram长度范围
+            seed: SVD随机种子
+            pages: 与 texts 对应的页面出处 [(文档, 页码), ...]
+            dtype: 向量存储精度（float32/float16/int8），页面向量另存全精度副本用于重新排序
+            
+        Returns:
+            语义空间
+        """
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from sklearn.decomposition import TruncatedSVD
+        
+        pages = list(pages) if pages is not None else [('', number) for number in range(len(texts))]
+        kept = [index for index, text in enumerate(texts) if text]
+        texts = [texts[index] for index in kept]
+        pages = [pages[index] for index in kept]
+        if len(texts) < 2:
+            raise ValueError("构建语义空间至少需要两个非空页面")
+        
+        vectorizer = TfidfVectorizer(analyzer='char', ngram_range=tuple(ngram_range), max_features=max_features,
+                                     sublinear_tf=True, dtype=np.float32)
+        matrix = vectorizer.fit_transform(texts)
+        n_components = max(1, min(n_components, matrix.shape[0] - 1, matrix.shape[1] - 1))
+        svd = TruncatedSVD(n_components=n_components, random_state=seed)
+        page_vectors = svd.fit_transform(matrix).astype(np.float32)
+        page_vectors /= np.maximum(np.linalg.norm(page_vectors, axis=1, keepdims=True), 1e-12)
+        
+        terms = list(dict.fromkeys(terms))
+        vectors = np.zeros((len(terms), n_components), dtype=np.float32)
+        covered = 0
+        for row, term in enumerate(terms):
+            counts = np.array([text.count(term) for text in texts], dtype=np.float32)
+            if not counts.any():
+                continue
+            vector = counts @ page_vectors
+            vectors[row] = vector / max(float(np.linalg.norm(vector)), 1e-12)
+            covered += 1
+        
+        metadata = {
+            'n_components': n_components,
+            'pages': len(texts),
+            'features': matrix.shape[1],
+            'explained_variance': round(float(svd.explained_variance_ratio_.sum()), 4),
+            'terms_covered': covered,
+            'dtype': dtype
+        }
+        return cls(terms, VectorStore.from_vectors(vectors, dtype),
+                   VectorStore.from_vectors(page_vectors, dtype, keep_full=True), pages, metadata)
+    
+    def save(self, directory: str) -> None:
+        """
+        保存术语表、页面出处和向量存储
+        
+        Args:
+            directory: 输出目录
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        self.term_store.save(path / self.TERMS_DIR)
+        if self.page_store is not None:
+            self.page_store.save(path / self.PAGES_DIR)
+        with open(path / self.INDEX_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'terms': self.terms, 'pages': self.pages, 'metadata': self.metadata},
+                      f, ensure_ascii=False, indent=2)
+    
+    @classmethod
+    def load(cls, directory: str) -> 'SemanticSpace':
+        """
+        加载语义空间，向量按内存映射读取
+        
+        Args:
+            directory: 保存目录
+            
+        Returns:
+            语义空间
+        """
+        path = Path(directory)
+        with open(path / cls.INDEX_FILE, 'r', encoding='utf-8') as f:
+            saved = json.load(f)
+        page_store = VectorStore.open(path / cls.PAGES_DIR) if (path / cls.PAGES_DIR).exists() else None
+        return cls(saved['terms'], VectorStore.open(path / cls.TERMS_DIR), page_store,
+                   saved.get('pages'), saved.get('metadata'))
+    
+    def score_pairs(self, pairs: List[Tuple[str, str]]) -> Dict[Tuple[str, str], Optional[float]]:
+        """
+        批量计算术语对的余弦相似度：涉及的术语向量一次矩阵乘法得到全部两两相似度
+        
+        Args:
+            pairs: 术语对列表
+            
+        Returns:
+            术语对到相似度的映射，有术语不在空间中（或语料中没有出现、向量为零）时为None，
+            表示无法评分，不同于不相似
+        """
+        terms = sorted({term for pair in pairs for term in pair if term in self.index})
+        matrix = self.term_store.reconstruct([self.index[term] for term in terms])
+        known = np.linalg.norm(matrix, axis=1) > 0 if len(terms) else np.zeros(0, dtype=bool)
+        position = {term: row for row, term in enumerate(terms) if known[row]}
+        similarities = matrix @ matrix.T
+        
+        return {
+            (term1, term2): float(similarities[position[term1], position[term2]])
+            if term1 in position and term2 in position else None
+            for term1, term2 in pairs
+        }
+    
+    def similar_pages(self, term: str, top_k: int = 10, rerank: int = 50) -> List[Tuple[Tuple[str, int], float]]:
+        """
+        与术语语义最相近的页面（不要求页面包含该术语）
+        
+        Args:
+            term: 术语
+            top_k: 返回结果数
+            rerank: 量化打分后用全精度向量重新排序的候选数
+            
+        Returns:
+            [((文档, 页码), 相似度), ...]，术语不在空间中时为空
+        """
+        if term not in self.index or self.page_store is None:
+            return []
+        query = self.term_store.reconstruct([self.index[term]])[0]
+        return [(self.pages[row], score) for row, score in self.page_store.search(query, top_k, rerank)]
 
 
 class QASystem:
@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+解析结果缓存模块
+按文件指纹逐文档持久化PDF解析结果，PDF未变化时直接读取，不再加载PDF解析库；
+页面表格单独缓存，开启表格抽取时不需要重新解析文本
+"""
+
+import os
+import json
+import gzip
+import hashlib
+import logging
+from pathlib import Path
+from typing import Dict, Any, List, Optional
+
+from src.metrics import metrics
+
+# 影响解析结果的解析器配置，变化时缓存失效（表格单独缓存，不影响文本缓存）
+PARSE_SETTINGS = ('extract_images',)
+
+CACHE_SUFFIX = '.json.gz'
+TABLE_CACHE_SUFFIX = '.tables.json.gz'
+
+
+class ParseCache:
+    """单文档解析结果缓存，文件名为 <文件名>.<指纹>.json.gz"""
+    
+    SUFFIX = CACHE_SUFFIX
+    METRIC = 'parse_cache'
+    
+    def __init__(self, directory: str, settings: Dict[str, Any] = None):
+        """
+        初始化解析结果缓存
+        
+        Args:
+            directory: 缓存目录
+            settings: 影响解析结果的解析器配置
+        """
+        self.directory = Path(directory)
+        self.settings = settings or {}
+        self.logger = logging.getLogger(__name__)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['ParseCache']:
+        """
+        根据配置创建解析结果缓存
+        
+        Args:
+            config: 系统配置
+        
+        Returns:
+            解析结果缓存，未开启时返回None
+        """
+        cache_config = config.get('parse_cache', {})
+        if not cache_config.get('enabled', True):
+            return None
+        
+        parser_config = config.get('pdf_parser', {})
+        return cls(
+            cache_config.get('dir', 'data/processed/parsed'),
+            {name: parser_config.get(name, False) for name in PARSE_SETTINGS}
+        )
+    
+    def fingerprint(self, pdf_path: str) -> str:
+        """
+        计算文件指纹：文件名、大小、修改时间和解析配置
+        
+        Args:
+            pdf_path: PDF文件路径
+        
+        Returns:
+            指纹哈希
+        """
+        stat = os.stat(pdf_path)
+        raw = json.dumps([Path(pdf_path).name, stat.st_size, stat.st_mtime_ns, self.settings], sort_keys=True)
+        return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+    
+    def _entry_path(self, pdf_path: str, fingerprint: str) -> Path:
+        """缓存文件路径"""
+        return self.directory / f"{Path(pdf_path).name}.{fingerprint}{self.SUFFIX}"
+    
+    def get(self, pdf_path: str) -> Optional[Dict[str, Any]]:
+        """
+        读取文档的解析结果
+        
+        Args:
+            pdf_path: PDF文件路径
+        
+        Returns:
+            解析结果，未缓存或PDF已变化时返回None
+        """
+        document = self._read(pdf_path)
+        if document is None:
+            return None
+        
+        # 数据目录可能被移动，以当前路径为准
+        document['file_path'] = pdf_path
+        return document
+    
+    def put(self, pdf_path: str, document: Dict[str, Any]) -> bool:
+        """
+        写入文档的解析结果，有页面被跳过的文档不缓存（下次重新解析）；页面表格不写入
+        
+        Args:
+            pdf_path: PDF文件路径
+            document: 解析结果
+        
+        Returns:
+            是否写入
+        """
+        if any(page.get('skipped') for page in document['pages']):
+            return False
+        
+        if any(page.get('tables') for page in document['pages']):
+            document = dict(document, pages=[dict(page, tables=[]) for page in document['pages']])
+        return self._write(pdf_path, document)
+    
+    def _read(self, pdf_path: str) -> Optional[Any]:
+        """读取缓存条目，未缓存、PDF已变化或读取失败时返回None"""
+        try:
+            entry_path = self._entry_path(pdf_path, self.fingerprint(pdf_path))
+            with gzip.open(entry_path, 'rt', encoding='utf-8') as f:
+                payload = json.load(f)
+        except FileNotFoundError:
+            metrics.incr(f'{self.METRIC}.misses')
+            return None
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"解析结果缓存读取失败 {pdf_path}: {e}")
+            metrics.incr(f'{self.METRIC}.misses')
+            return None
+        
+        metrics.incr(f'{self.METRIC}.hits')
+        return payload
+    
+    def _write(self, pdf_path: str, payload: Any) -> bool:
+        """原子写入缓存条目并删除同一文件旧指纹的条目"""
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            entry_path = self._entry_path(pdf_path, self.fingerprint(pdf_path))
+            temp_path = entry_path.with_name(entry_path.name + f".{os.getpid()}.tmp")
+            with gzip.open(temp_path, 'wt', encoding='utf-8', compresslevel=1) as f:
+                # 图像数据流和PDF元数据中的对象不可序列化，转为字符串
+                json.dump(payload, f, ensure_ascii=False, default=str)
+            os.replace(temp_path, entry_path)
+        except OSError as e:
+            self.logger.warning(f"解析结果缓存写入失败 {pdf_path}: {e}")
+            return False
+        
+        self._remove_stale(pdf_path, entry_path)
+        return True
+    
+    def _remove_stale(self, pdf_path: str, current: Path) -> None:
+        """删除同一文件旧指纹的缓存"""
+        prefix = Path(pdf_path).name + '.'
+        for entry in self.directory.iterdir():
+            if entry != current and entry.name.startswith(prefix) and entry.name.endswith(self.SUFFIX) \
+               and len(entry.name) == len(current.name):
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+
+
+class TableCache(ParseCache):
+    """单文档表格缓存，文件名为 <文件名>.<指纹>.tables.json.gz，内容为页码到表格列表的映射"""
+    
+    SUFFIX = TABLE_CACHE_SUFFIX
+    METRIC = 'table_cache'
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], detector_settings: Dict[str, Any] = None) -> Optional['TableCache']:
+        """
+        根据配置创建表格缓存
+        
+        Args:
+            config: 系统配置
+            detector_settings: 表格检测参数（影响哪些页面抽取表格），None表示每页都抽取
+        
+        Returns:
+            表格缓存，未开启解析缓存或表格抽取时返回None
+        """
+        cache_config = config.get('parse_cache', {})
+        if not cache_config.get('enabled', True) or not config.get('pdf_parser', {}).get('extract_tables', False):
+            return None
+        return cls(cache_config.get('dir', 'data/processed/parsed'), {'table_detection': detector_settings})
+    
+    def get(self, pdf_path: str) -> Optional[Dict[int, List[Any]]]:
+        """
+        读取文档的表格
+        
+        Args:
+            pdf_path: PDF文件路径
+        
+        Returns:
+            {页码: 表格列表}，未缓存或PDF已变化时返回None
+        """
+        tables = self._read(pdf_path)
+        if tables is None:
+            return None
+        return {int(page_number): page_tables for page_number, page_tables in tables.items()}
+    
+    def put(self, pdf_path: str, tables: Dict[int, List[Any]]) -> bool:
+        """
+        写入文档的表格
+        
+        Args:
+            pdf_path: PDF文件路径
+            tables: {页码: 表格列表}，只包含有表格的页面
+        
+        Returns:
+            是否写入
+        """
+        return self._write(pdf_path, {str(page_number): page_tables for page_number, page_tables in tables.items()})
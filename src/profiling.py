@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+性能剖析模块
+按管道阶段收集cProfile数据和tracemalloc内存分配快照，生成热点函数报告
+"""
+
+import io
+import pstats
+import cProfile
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List
+
+
+class StageProfiler:
+    """管道阶段剖析器"""
+    
+    def __init__(self, output_dir: str = None, enabled: bool = False,
+                 memory: bool = False, top_n: int = 30, memory_frames: int = 5):
+        """
+        初始化剖析器
+        
+        Args:
+            output_dir: 剖析结果输出目录
+            enabled: 是否开启cProfile剖析
+            memory: 是否同时使用tracemalloc跟踪内存分配
+            top_n: 报告中列出的热点函数/分配位置数量
+            memory_frames: tracemalloc记录的调用栈深度，内存分配热点按完整调用栈分组并列出调用链
+        """
+        self.output_dir = output_dir
+        self.enabled = enabled
+        self.memory = memory
+        self.top_n = top_n
+        self.memory_frames = memory_frames
+        self.logger = logging.getLogger(__name__)
+        
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        # 阶段名 -> 分配调用栈 -> [累计字节增量, 累计次数增量]
+        self.memory_stats: Dict[str, Dict[tracemalloc.Traceback, List[int]]] = {}
+        self.memory_peaks: Dict[str, int] = {}
+    
+    @contextmanager
+    def stage(self, name: str):
+        """
+        剖析一个管道阶段，同名阶段多次执行时结果累加
+        
+        Args:
+            name: 阶段名称
+        """
+        if not self.enabled:
+            yield
+            return
+        
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start(self.memory_frames)
+        
+        before = tracemalloc.take_snapshot() if self.memory else None
+        if self.memory:
+            tracemalloc.reset_peak()
+        
+        profile = self.profiles.setdefault(name, cProfile.Profile())
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            
+            if self.memory:
+                after = tracemalloc.take_snapshot()
+                _, peak = tracemalloc.get_traced_memory()
+                self.memory_peaks[name] = max(self.memory_peaks.get(name, 0), peak)
+                totals = self.memory_stats.setdefault(name, {})
+                for diff in after.compare_to(before, 'traceback'):
+                    total = totals.setdefault(diff.traceback, [0, 0])
+                    total[0] += diff.size_diff
+                    total[1] += diff.count_diff
+    
+    def write_reports(self, output_dir: str = None) -> List[str]:
+        """
+        写出各阶段的.prof文件和热点汇总文本
+        
+        Args:
+            output_dir: 输出目录，默认使用初始化时的目录
+        
+        Returns:
+            写出的文件路径列表
+        """
+        if not self.enabled or not self.profiles:
+            return []
+        
+        output_dir = Path(output_dir or self.output_dir or 'profile')
+        output_dir.mkdir(parents=True, exist_ok=True)
+        written = []
+        
+        for name, profile in self.profiles.items():
+            prof_path = output_dir / f"{name}.prof"
+            profile.dump_stats(str(prof_path))
+            written.append(str(prof_path))
+        
+        summary_path = output_dir / "profile_summary.txt"
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            f.write(self.summary())
+        written.append(str(summary_path))
+        
+        self.logger.info(f"剖析结果已保存到: {output_dir}")
+        return written
+    
+    def summary(self) -> str:
+        """
+        生成热点函数汇总文本
+        
+        Returns:
+            按自身耗时排序的全局热点、各阶段热点以及内存分配热点
+        """
+        sections = []
+        
+        overall = pstats.Stats(*self.profiles.values())
+        sections.append(self._format_stats("全部阶段 - 按自身耗时排序", overall, 'tottime'))
+        
+        for name, profile in self.profiles.items():
+            stats = pstats.Stats(profile)
+            sections.append(self._format_stats(f"阶段 {name} - 按累计耗时排序", stats, 'cumulative'))
+        
+        for name, totals in self.memory_stats.items():
+            lines = [f"===== 阶段 {name} - 内存分配热点（峰值 {self.memory_peaks[name] / 1024 / 1024:.1f}MB） ====="]
+            ranked = sorted(totals.items(), key=lambda item: abs(item[1][0]), reverse=True)
+            for traceback, (size_diff, count_diff) in ranked[:self.top_n]:
+                # 调用栈从最外层到分配位置排列，先列分配位置再逐级列出调用方
+                frames = [f"{frame.filename}:{frame.lineno}" for frame in reversed(traceback)]
+                lines.append(f"{size_diff / 1024:>10.1f}KB {count_diff:>8d}次  {frames[0]}")
+                lines.extend(f"{'':>24}<- {caller}" for caller in frames[1:])
+            sections.append('\n'.join(lines))
+        
+        return '\n\n'.join(sections) + '\n'
+    
+    def _format_stats(self, title: str, stats: pstats.Stats, sort_key: str) -> str:
+        """格式化pstats输出"""
+        stream = io.StringIO()
+        stats.stream = stream
+        stats.strip_dirs().sort_stats(sort_key).print_stats(self.top_n)
+        return f"===== {title} =====\n{stream.getvalue().strip()}"
+    
+    def stop(self) -> None:
+        """停止内存跟踪"""
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
\ No newline at end of file
@@ -6,8 +6,19 @@
 """
 
 import re
+import bisect
 from typing import List, Dict, Any, Tuple, Optional
 
+# 定义模式中术语不能包含的字符（另外不能包含空白）及连续术语字符片段
+TERM_STOP_CHARS = frozenset('，。！？：；')
+TERM_RUN_PATTERN = re.compile(r'[^，。！？：；\s]+')
+
+# 句末标点
+SENTENCE_TERMINATOR_PATTERN = re.compile(r'[。！？]')
+
+# 海洋领域判断缓存的最大术语数，超过后清空
+OCEAN_TERM_CACHE_SIZE = 200000
+
 
 class ExtractionRules:
     """术语抽取规则类"""
@@ -38,6 +49,18 @@ class ExtractionRules:
             r'(?P<term>[^，。！？：；\s]+)\s*表示\s*(?P<definition>[^。！？]+[。！？])'
         ]
         
+        # 各定义模式的连接词，与 definition_patterns 一一对应
+        self.definition_connectors = [('：', ':'), ('是指',), ('定义为',), ('为',), ('即',), ('指的是',), ('表示',)]
+        self._connector_pattern_index = {
+            connector: index
+            for index, connectors in enumerate(self.definition_connectors)
+            for connector in connectors
+        }
+        # 一次扫描定位所有连接词锚点；使用前瞻以保留重叠的锚点（如"定义为"中的"为"）
+        self._anchor_regex = re.compile(
+            '(?=(' + '|'.join(sorted(map(re.escape, self._connector_pattern_index), key=len, reverse=True)) + '))'
+        )
+        
         # 章节标题模式
         self.section_patterns = [
             r'^\s*[一二三四五六七八九十]+[、.]\s*',
@@ -70,25 +93,49 @@ class ExtractionRules:
             r'[^，。！？：；\s]*技术',
             r'[^，。！？：；\s]*方法'
         ]
+        
+        # 海洋相关关键词
+        self.ocean_keywords = [
+            '海洋', '海', '潮', '浪', '波', '流', '风', '气', '水', '冰',
+            '灾害', '防灾', '减灾', '观测', '监测', '预警', '预报',
+            '浮标', '潜标', '雷达', '卫星', '数据', '质量', '标准'
+        ]
+        
+        # 领域术语模式去掉前后的术语字符通配后只剩关键词，re.search 的结果等价于关键词包含判断，
+        # 因此把模式关键词与海洋关键词合并为一个编译好的多关键词匹配器
+        domain_keywords = [re.sub(r'\[\^[^\]]*\]\*', '', pattern) for pattern in self.ocean_term_patterns]
+        self._ocean_keyword_regex = re.compile(
+            '|'.join(map(re.escape, sorted(set(domain_keywords + self.ocean_keywords), key=len, reverse=True)))
+        )
+        self._ocean_term_cache: Dict[str, bool] = {}
     
     def extract_term_definitions(self, text: str) -> List[Dict[str, str]]:
         """
         从文本中提取术语定义
         
+        先一次扫描定位所有连接词锚点，再在每个锚点两侧展开术语和定义片段，
+        结果与按 definition_patterns 逐个执行 re.finditer 相同，但每页只需线性时间。
+        
         Args:
             text: 输入文本
             
         Returns:
             术语定义列表
         """
+        if not text:
+            return []
+        
+        anchors = [[] for _ in self.definition_patterns]
+        for match in self._anchor_regex.finditer(text):
+            connector = match.group(1)
+            anchors[self._connector_pattern_index[connector]].append((match.start(), len(connector)))
+        
+        run_starts = [match.start() for match in TERM_RUN_PATTERN.finditer(text)]
+        terminators = [match.start() for match in SENTENCE_TERMINATOR_PATTERN.finditer(text)]
         definitions = []
         
-        for pattern in self.definition_patterns:
-            matches = re.finditer(pattern, text)
-            for match in matches:
-                term = match.group('term').strip()
-                definition = match.group('definition').strip()
-                
+        for pattern, pattern_anchors in zip(self.definition_patterns, anchors):
+            for term, definition in self._expand_anchors(text, pattern_anchors, run_starts, terminators):
                 # 过滤太短或太长的术语
                 if 2 <= len(term) <= 50 and 10 <= len(definition) <= 500:
                     definitions.append({
@@ -99,6 +146,65 @@ class ExtractionRules:
         
         return definitions
     
+    def _expand_anchors(self, text: str, anchors: List[Tuple[int, int]],
+                        run_starts: List[int], terminators: List[int]) -> List[Tuple[str, str]]:
+        """
+        围绕同一模式的连接词锚点展开术语和定义，模拟 re.finditer 的匹配语义：
+        术语取连接词前（可隔空白）的连续术语字符，同一术语片段有多个锚点时取最右侧可成功的锚点，
+        定义延伸到连接词后的第一个句末标点，匹配之间不重叠
+        
+        Args:
+            text: 输入文本
+            anchors: 按位置排序的 (锚点位置, 连接词长度) 列表
+            run_starts: 连续术语字符片段的起始位置列表
+            terminators: 句末标点位置列表
+            
+        Returns:
+            (术语, 定义) 列表
+        """
+        matches = []
+        last_end = 0
+        group_start = None
+        group_match = None
+        
+        for position, length in anchors:
+            if position < last_end:
+                continue
+            
+            # 术语片段结束于连接词之前的空白处
+            term_end = position
+            while term_end > last_end and text[term_end - 1].isspace():
+                term_end -= 1
+            if term_end <= last_end or text[term_end - 1] in TERM_STOP_CHARS:
+                continue
+            
+            # 术语为锚点前所在的连续术语字符片段
+            term_start = run_starts[bisect.bisect_right(run_starts, term_end - 1) - 1]
+            
+            if term_start != group_start:
+                # 进入新的术语片段，先确定上一个片段的匹配
+                if group_match is not None:
+                    matches.append(group_match[:2])
+                    last_end = group_match[2]
+                    if term_start < last_end:
+                        group_start, group_match = None, None
+                        continue
+                group_start, group_match = term_start, None
+            
+            # 定义从连接词之后延伸到第一个句末标点，且不能为空
+            definition_start = position + length
+            index = bisect.bisect_left(terminators, definition_start)
+            if index == len(terminators) or terminators[index] == definition_start:
+                continue
+            
+            end = terminators[index] + 1
+            group_match = (text[term_start:term_end].strip(), text[definition_start:end].strip(), end)
+        
+        if group_match is not None:
+            matches.append(group_match[:2])
+        
+        return matches
+    
     def is_ocean_related_term(self, term: str) -> bool:
         """
         判断术语是否与海洋领域相关
@@ -109,26 +215,31 @@ class ExtractionRules:
         Returns:
             是否相关
         """
-        if not term:
-            return False
-        
-        # 检查是否匹配海洋领域术语模式
-        for pattern in self.ocean_term_patterns:
-            if re.search(pattern, term):
-                return True
-        
-        # 检查是否包含海洋相关关键词
-        ocean_keywords = [
-            '海洋', '海', '潮', '浪', '波', '流', '风', '气', '水', '冰',
-            '灾害', '防灾', '减灾', '观测', '监测', '预警', '预报',
-            '浮标', '潜标', '雷达', '卫星', '数据', '质量', '标准'
-        ]
-        
-        for keyword in ocean_keywords:
-            if keyword in term:
-                return True
+        return self.filter_ocean_related_terms([term])[0]
+    
+    def filter_ocean_related_terms(self, candidates: List[str]) -> List[bool]:
+        """
+        批量判断候选术语是否与海洋领域相关，结果按术语缓存
         
-        return False
+        Args:
+            candidates: 候选术语列表（可包含重复）
+            
+        Returns:
+            与候选术语一一对应的布尔列表
+        """
+        cache = self._ocean_term_cache
+        if len(cache) > OCEAN_TERM_CACHE_SIZE:
+            cache.clear()
+        
+        mask = []
+        search = self._ocean_keyword_regex.search
+        for term in candidates:
+            related = cache.get(term)
+            if related is None:
+                related = cache[term] = bool(term) and search(term) is not None
+            mask.append(related)
+        
+        return mask
     
     def extract_page_info(self, text: str) -> Optional[str]:
         """
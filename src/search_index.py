@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+全文检索模块
+字符二元组倒排索引，支持短语、AND/OR查询、文档/页码过滤、BM25排序、分页和基于偏移量的摘要
+"""
+
+import re
+import math
+import logging
+from typing import List, Dict, Any, Tuple, Optional, Iterable
+
+import numpy as np
+
+# 单字的编码空间与二元组分开
+_UNIGRAM_FLAG = np.uint64(1 << 42)
+
+# 查询词：双引号短语或不含空白的词
+_QUERY_TOKEN_PATTERN = re.compile(r'"([^"]+)"|(\S+)')
+
+_SENTENCE_END_PATTERN = re.compile(r'[。！？]')
+
+
+def _char_codes(text: str) -> np.ndarray:
+    """文本的Unicode码点数组"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).astype(np.uint64)
+
+
+def _bigram_codes(codes: np.ndarray) -> np.ndarray:
+    """相邻字符的二元组编码"""
+    return (codes[:-1] << np.uint64(21)) | codes[1:]
+
+
+def parse_query(query: str) -> List[List[str]]:
+    """
+    解析查询：空白分隔的词之间为AND，词之间写 OR 表示或，双引号括起的短语可包含空白
+    
+    Args:
+        query: 查询字符串，如 '风暴潮 OR 海啸 预警' 表示 (风暴潮 或 海啸) 且 预警
+    
+    Returns:
+        子句列表，每个子句是若干个短语的或
+    """
+    clauses: List[List[str]] = []
+    pending_or = False
+    for match in _QUERY_TOKEN_PATTERN.finditer(query or ''):
+        phrase, word = match.group(1), match.group(2)
+        if word == 'OR' and clauses:
+            pending_or = True
+            continue
+        token = phrase if phrase is not None else word
+        if pending_or:
+            clauses[-1].append(token)
+        else:
+            clauses.append([token])
+        pending_or = False
+    return clauses
+
+
+class SearchIndex:
+    """PDF页面全文索引"""
+    
+    def __init__(self, k1: float = 1.2, b: float = 0.75, snippet_length: int = 200):
+        """
+        初始化索引
+        
+        Args:
+            k1: BM25词频饱和参数
+            b: BM25长度归一化参数
+            snippet_length: 摘要长度（字符）
+        """
+        self.logger = logging.getLogger(__name__)
+        self.k1 = k1
+        self.b = b
+        self.snippet_length = snippet_length
+        
+        self.pages: List[Dict[str, Any]] = []
+        self._page_lengths = np.zeros(0)
+        self._pending_postings: List[Tuple[np.ndarray, int]] = []
+        # 倒排表按编码分组存放：不同编码各存一次，每个 (编码, 页面) 只占一个int32页面编号
+        self._vocabulary = np.zeros(0, dtype=np.uint64)
+        self._posting_offsets = np.zeros(1, dtype=np.int64)
+        self._posting_pages = np.zeros(0, dtype=np.int32)
+    
+    @classmethod
+    def from_documents(cls, pdf_documents: List[Dict[str, Any]], **kwargs) -> 'SearchIndex':
+        """
+        为PDF文档列表建立索引
+        
+        Args:
+            pdf_documents: PDF文档列表
+            **kwargs: 传给构造函数的参数
+        
+        Returns:
+            全文索引
+        """
+        index = cls(**kwargs)
+        for doc in pdf_documents:
+            index.add_document(doc)
+        index.logger.info(f"全文索引包含 {len(pdf_documents)} 个文档，{len(index.pages)} 个页面")
+        return index
+    
+    def add_document(self, doc: Dict[str, Any]) -> None:
+        """
+        添加一个文档的所有页面，近重复页面只索引规范副本，规范副本的 sources 同时记录副本的出处
+        
+        Args:
+            doc: PDF文档
+        """
+        document = doc.get('file_stem', doc['file_name'].rsplit('.', 1)[0])
+        for page in doc['pages']:
+            if page.get('duplicate_of'):
+                continue
+            text = page.get('text') or ''
+            page_id = len(self.pages)
+            codes = _char_codes(text)
+            bigrams = _bigram_codes(codes) if len(codes) > 1 else np.zeros(0, dtype=np.uint64)
+            
+            # 页面只保存元数据，短语位置在检索时于候选页面的文本上确认
+            self.pages.append({
+                'document': document,
+                'file_name': doc['file_name'],
+                'page_number': page['page_number'],
+                # 只引用源页面，压缩存储的文本在生成摘要时才解压
+                'source': page,
+                'length': len(text),
+                # 规范副本在前，过滤时任一出处满足条件即保留，结果按满足条件的出处报告
+                'sources': [{'document': document, 'page_number': page['page_number']}] + page.get('duplicates', []),
+                'sentence_ends': np.array([match.start() for match in _SENTENCE_END_PATTERN.finditer(text)],
+                                          dtype=np.int32)
+            })
+            self._pending_postings.append((np.union1d(bigrams, codes | _UNIGRAM_FLAG), page_id))
+    
+    def _finalize(self) -> None:
+        """把新增页面合并进全局的倒排表"""
+        if not self._pending_postings:
+            return
+        
+        existing = np.repeat(self._vocabulary, np.diff(self._posting_offsets))
+        codes = [existing] + [unique for unique, _ in self._pending_postings]
+        pages = [self._posting_pages] + [np.full(len(unique), page_id, dtype=np.int32)
+                                         for unique, page_id in self._pending_postings]
+        codes = np.concatenate(codes)
+        pages = np.concatenate(pages)
+        order = np.lexsort((pages, codes))
+        codes = codes[order]
+        self._posting_pages = pages[order]
+        self._vocabulary, starts = np.unique(codes, return_index=True)
+        self._posting_offsets = np.append(starts, len(codes)).astype(np.int64)
+        self._page_lengths = np.array([page['length'] for page in self.pages], dtype=np.float64)
+        self._pending_postings = []
+    
+    def _pages_with_code(self, code: np.uint64) -> np.ndarray:
+        """包含某个编码的页面（升序）"""
+        index = np.searchsorted(self._vocabulary, code)
+        if index == len(self._vocabulary) or self._vocabulary[index] != code:
+            return self._posting_pages[:0]
+        return self._posting_pages[self._posting_offsets[index]:self._posting_offsets[index + 1]]
+    
+    def _phrase_pages(self, phrase: str) -> np.ndarray:
+        """包含短语所有二元组的候选页面"""
+        codes = _char_codes(phrase)
+        if len(codes) == 1:
+            return self._pages_with_code(codes[0] | _UNIGRAM_FLAG)
+        
+        candidates = None
+        for code in np.unique(_bigram_codes(codes)):
+            pages = self._pages_with_code(code)
+            candidates = pages if candidates is None else np.intersect1d(candidates, pages, assume_unique=True)
+            if not len(candidates):
+                break
+        return candidates
+    
+    @staticmethod
+    def _phrase_positions(text: str, phrase: str) -> List[int]:
+        """短语在页面文本中的所有起始位置（含相互重叠的出现）"""
+        starts = []
+        position = text.find(phrase)
+        while position != -1:
+            starts.append(position)
+            position = text.find(phrase, position + 1)
+        return starts
+    
+    def search(self, query: str, doc_prefixes: Iterable[str] = None, documents: Iterable[str] = None,
+               page_range: Tuple[int, int] = None, page: int = 1, page_size: Optional[int] = 10,
+               sort: str = 'relevance') -> Dict[str, Any]:
+        """
+        检索页面
+        
+        Args:
+            query: 查询字符串（见 parse_query）
+            doc_prefixes: 只检索文档名以这些前缀开头的标准，如 ['GB', 'HY_T']
+            documents: 只检索这些文档（文档名，不含扩展名）
+            page_range: 只检索页码在 [起始, 结束] 内的页面
+            page: 结果分页页码（从1开始）
+            page_size: 每页结果数，None表示返回全部
+            sort: relevance 按BM25得分排序，document 按文档和页码顺序排列
+        
+        Returns:
+            {'query', 'total', 'page', 'page_size', 'results': [{'document', 'page_number', 'score', 'matches', 'duplicates', 'snippet'}]}，
+            近重复页面只索引规范副本，规范副本或任一副本满足过滤条件即命中，document/page_number 为第一个满足条件的出处，
+            duplicates 为与命中页面内容相同的其他出处
+        """
+        self._finalize()
+        clauses = parse_query(query)
+        response = {'query': query, 'total': 0, 'page': page, 'page_size': page_size, 'results': []}
+        if not clauses or not self.pages:
+            return response
+        
+        # 先按页面级倒排求满足所有子句的候选页面
+        candidates = None
+        for clause in clauses:
+            clause_pages = np.unique(np.concatenate([self._phrase_pages(phrase) for phrase in clause]))
+            candidates = clause_pages if candidates is None else np.intersect1d(candidates, clause_pages, assume_unique=True)
+        
+        # 在候选页面的文本上确认短语并统计词频；文档频率按过滤前的命中统计，得分不随过滤条件变化
+        phrases = list(dict.fromkeys(phrase for clause in clauses for phrase in clause))
+        hits = []
+        phrase_df = {phrase: 0 for phrase in phrases}
+        for page_id in candidates.tolist():
+            text = self.pages[page_id]['source'].get('text') or ''
+            positions = {phrase: self._phrase_positions(text, phrase) for phrase in phrases}
+            if all(any(positions[phrase] for phrase in clause) for clause in clauses):
+                hits.append((page_id, positions))
+                for phrase in phrases:
+                    if positions[phrase]:
+                        phrase_df[phrase] += 1
+        
+        kept, reported = self._apply_filters(np.asarray([page_id for page_id, _ in hits], dtype=np.int32),
+                                              doc_prefixes, documents, page_range)
+        kept = set(kept.tolist())
+        hits = [(page_id, positions) for page_id, positions in hits if page_id in kept]
+        
+        results = [self._score_hit(page_id, positions, phrase_df, reported.get(page_id, 0))
+                   for page_id, positions in hits]
+        if sort == 'relevance':
+            results.sort(key=lambda result: (-result['score'], result['_page_id']))
+        
+        response['total'] = len(results)
+        if page_size is not None:
+            results = results[(page - 1) * page_size:page * page_size]
+        for result in results:
+            page_id, (start, length) = result.pop('_page_id'), result.pop('_first_match')
+            result['snippet'] = self._snippet(page_id, start, length)
+        response['results'] = results
+        return response
+    
+    def _apply_filters(self, candidates: np.ndarray, doc_prefixes: Iterable[str], documents: Iterable[str],
+                       page_range: Tuple[int, int]) -> Tuple[np.ndarray, Dict[int, int]]:
+        """
+        按文档前缀、文档名和页码范围过滤候选页面，规范副本或任一近重复副本满足条件即保留
+        
+        Returns:
+            (保留的页面, {页面编号: 报告的出处在 sources 中的序号})，未列出的页面按规范副本报告
+        """
+        if not doc_prefixes and not documents and not page_range:
+            return candidates, {}
+        
+        prefixes = tuple(prefix.upper() for prefix in doc_prefixes or ())
+        allowed = set(documents or ())
+        kept = []
+        reported = {}
+        for page_id in candidates.tolist():
+            for source_index, source in enumerate(self.pages[page_id]['sources']):
+                if prefixes and not source['document'].upper().startswith(prefixes):
+                    continue
+                if allowed and source['document'] not in allowed:
+                    continue
+                if page_range and not page_range[0] <= source['page_number'] <= page_range[1]:
+                    continue
+                kept.append(page_id)
+                reported[page_id] = source_index
+                break
+        return np.asarray(kept, dtype=np.int32), reported
+    
+    def _score_hit(self, page_id: int, positions: Dict[str, List[int]],
+                   phrase_df: Dict[str, int], source_index: int = 0) -> Dict[str, Any]:
+        """计算命中页面的BM25得分"""
+        page_count = len(self.pages)
+        average_length = float(self._page_lengths.mean()) or 1.0
+        length_norm = self.k1 * (1 - self.b + self.b * float(self._page_lengths[page_id]) / average_length)
+        
+        score = 0.0
+        matches = 0
+        first_match = None
+        for phrase, starts in positions.items():
+            tf = len(starts)
+            if not tf:
+                continue
+            idf = math.log(1 + (page_count - phrase_df[phrase] + 0.5) / (phrase_df[phrase] + 0.5))
+            score += idf * tf * (self.k1 + 1) / (tf + length_norm)
+            matches += tf
+            if first_match is None or starts[0] < first_match[0]:
+                first_match = (starts[0], len(phrase))
+        
+        sources = self.pages[page_id]['sources']
+        return {
+            'document': sources[source_index]['document'],
+            'page_number': sources[source_index]['page_number'],
+            'score': round(score, 6),
+            'matches': matches,
+            'duplicates': sources[:source_index] + sources[source_index + 1:],
+            '_page_id': page_id,
+            '_first_match': first_match
+        }
+    
+    def _snippet(self, page_id: int, start: int, length: int) -> str:
+        """
+        根据命中偏移量截取摘要，起点回退到前一个句末标点之后
+        
+        Args:
+            page_id: 页面编号
+            start: 命中起始偏移
+            length: 命中长度
+        
+        Returns:
+            摘要文本
+        """
+        page = self.pages[page_id]
+        text = page['source'].get('text') or ''
+        snippet_start = max(0, start - self.snippet_length // 2)
+        snippet_end = min(len(text), start + length + self.snippet_length // 2)
+        
+        if snippet_start > 0:
+            sentence_ends = page['sentence_ends']
+            index = int(np.searchsorted(sentence_ends, snippet_start, side='left')) - 1
+            if index >= 0:
+                snippet_start = int(sentence_ends[index]) + 1
+        
+        return text[snippet_start:snippet_end].strip()
\ No newline at end of file
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+句子库模块
+语料中的每个唯一句子只存一次并记录所有出现位置，术语对的共现上下文按唯一上下文分组，
+每个唯一上下文只评分一次，再展开为所有出现的(文档, 页面)出处（包括近重复检测跳过的副本页面）
+"""
+
+import re
+import bisect
+import logging
+from typing import List, Dict, Any, Tuple, Set
+
+# 与 AssociationRules.extract_association_context 的分句方式一致
+SENTENCE_SPLIT_PATTERN = re.compile(r'[。！？]')
+
+# 拼接唯一句子时使用的分隔符，不会出现在PDF文本中
+_SEPARATOR = '\x00'
+
+
+class SentenceStore:
+    """按唯一句子去重的语料视图"""
+    
+    def __init__(self, pdf_documents: List[Dict[str, Any]], context_window: int = 2):
+        """
+        建立句子库
+        
+        Args:
+            pdf_documents: PDF文档列表（跳过被标记为重复的页面，出处展开时按规范页面的 duplicates 补回）
+            context_window: 上下文包含目标句子前后各多少个句子
+        """
+        self.logger = logging.getLogger(__name__)
+        self.context_window = context_window
+        
+        self.sentences: List[str] = []
+        self.pages: List[Tuple[Dict[str, Any], Dict[str, Any]]] = []
+        self._page_sources: List[List[Tuple[int, Dict[str, Any], Dict[str, Any]]]] = []
+        self._page_sentences: List[List[int]] = []
+        self._occurrences: List[List[Tuple[int, int]]] = []
+        self._term_sentences: Dict[str, Set[int]] = {}
+        
+        # 每个页面在语料中的顺序，副本页面按 (文件名, 页码) 查找
+        orders = {}
+        locations = {}
+        for doc in pdf_documents:
+            for page in doc['pages']:
+                orders[id(page)] = len(orders)
+                locations[(doc.get('file_stem'), page['page_number'])] = (orders[id(page)], doc, page)
+        
+        sentence_ids: Dict[str, int] = {}
+        total = 0
+        for doc in pdf_documents:
+            for page in doc['pages']:
+                if page.get('duplicate_of') or not page.get('text'):
+                    continue
+                page_index = len(self.pages)
+                self.pages.append((doc, page))
+                sources = [(orders[id(page)], doc, page)]
+                for source in page.get('duplicates', []):
+                    location = locations.get((source['document'], source['page_number']))
+                    if location is not None:
+                        sources.append(location)
+                self._page_sources.append(sorted(sources, key=lambda location: location[0]))
+                
+                ids = []
+                for position, sentence in enumerate(SENTENCE_SPLIT_PATTERN.split(page['text'])):
+                    sentence_id = sentence_ids.get(sentence)
+                    if sentence_id is None:
+                        sentence_id = sentence_ids[sentence] = len(self.sentences)
+                        self.sentences.append(sentence)
+                        self._occurrences.append([])
+                    self._occurrences[sentence_id].append((page_index, position))
+                    ids.append(sentence_id)
+                self._page_sentences.append(ids)
+                total += len(ids)
+        
+        # 唯一句子拼接成一个字符串，术语查找一次扫描完成
+        self._joined = _SEPARATOR.join(self.sentences)
+        self._starts = []
+        offset = 0
+        for sentence in self.sentences:
+            self._starts.append(offset)
+            offset += len(sentence) + 1
+        
+        self.logger.info(f"句子库: {len(self.pages)} 个页面，{total} 个句子，其中唯一句子 {len(self.sentences)} 个")
+    
+    def page_sources(self, page_index: int) -> List[Tuple[int, Dict[str, Any], Dict[str, Any]]]:
+        """
+        页面及其近重复副本的所有出处
+        
+        Args:
+            page_index: 页面编号
+        
+        Returns:
+            [(语料顺序, 文档, 页面), ...]，按语料顺序排列
+        """
+        return self._page_sources[page_index]
+    
+    def sentences_with(self, term: str) -> Set[int]:
+        """
+        包含术语的唯一句子编号（按术语缓存）
+        
+        Args:
+            term: 术语
+        
+        Returns:
+            句子编号集合
+        """
+        if term in self._term_sentences:
+            return self._term_sentences[term]
+        
+        found = set()
+        position = self._joined.find(term) if term else -1
+        while position != -1:
+            sentence_id = bisect.bisect_right(self._starts, position) - 1
+            found.add(sentence_id)
+            # 同一句子只记一次，从下一个句子开始继续查找
+            next_start = self._starts[sentence_id + 1] if sentence_id + 1 < len(self._starts) else len(self._joined)
+            position = self._joined.find(term, next_start)
+        
+        self._term_sentences[term] = found
+        return found
+    
+    def cooccurrence_contexts(self, term1: str, term2: str) -> List[Tuple[str, List[Tuple[int, int]]]]:
+        """
+        两个术语同句出现时的上下文，相同上下文合并
+        
+        Args:
+            term1: 术语1
+            term2: 术语2
+        
+        Returns:
+            [(上下文, [(页面编号, 句子位置), ...]), ...]，按首次出现的语料顺序排列
+        """
+        shared = self.sentences_with(term1) & self.sentences_with(term2)
+        if not shared:
+            return []
+        
+        grouped: Dict[Tuple[int, ...], List[Tuple[int, int]]] = {}
+        for sentence_id in shared:
+            for page_index, position in self._occurrences[sentence_id]:
+                ids = self._page_sentences[page_index]
+                # 页面内重复的句子取第一次出现的位置确定上下文，与逐页抽取一致
+                anchor = ids.index(sentence_id)
+                window = tuple(ids[max(0, anchor - self.context_window):anchor + self.context_window + 1])
+                grouped.setdefault(window, []).append((page_index, position))
+        
+        contexts = []
+        for window, occurrences in grouped.items():
+            occurrences.sort()
+            contexts.append((''.join(self.sentences[sentence_id] for sentence_id in window).strip(), occurrences))
+        contexts.sort(key=lambda item: item[1][0])
+        return contexts
\ No newline at end of file
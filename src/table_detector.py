@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+表格检测模块
+根据页面中直线和矩形构成的横竖线判断页面是否可能包含表格，只对可能的页面调用表格抽取。
+页面版面已分析（已抽取文本）时直接使用页面的直线和矩形对象；否则先在页面内容流的原始字节中
+统计画线运算符，数量不足以构成表格时直接判定，其余页面只解释内容流中的路径，不做文字版面分析
+"""
+
+import re
+from typing import List, Dict, Any, Tuple, Optional
+
+# 线段 (x0, top, x1, bottom)
+Segment = Tuple[float, float, float, float]
+
+# 内容流中的字符串（括号字符串和十六进制字符串），统计运算符前去掉，避免字符串内容被当作运算符
+STRING_LITERALS = re.compile(rb'\((?:\\.|[^\\()])*\)|<[0-9A-Fa-f\s]*>', re.DOTALL)
+
+# 路径运算符：l 直线、h 闭合、re 矩形；W n 为只用于裁剪不绘制的路径；其余为绘制运算符；Do 引用外部对象
+PATH_TOKENS = re.compile(rb'(?<![^\s\]\)>])(re|l|h|W\*?\s+n|[SsFfBb]\*?|Do)(?![^\s\[\(</])')
+XOBJECT_REFERENCES = re.compile(rb'/([^\s/\[\]()<>{}%]+)\s*Do(?![^\s\[\(</])')
+
+# 表单嵌套超过该深度时不再估计，按可能有表格处理
+MAX_FORM_DEPTH = 3
+
+
+def _count_positions(positions: List[float], tolerance: float) -> int:
+    """
+    统计不同位置的个数，相距不超过容差的位置视为同一条线
+    
+    Args:
+        positions: 坐标列表
+        tolerance: 合并容差
+    
+    Returns:
+        不同位置数
+    """
+    count = 0
+    last = None
+    for position in sorted(positions):
+        if last is None or position - last > tolerance:
+            count += 1
+        last = position
+    return count
+
+
+class TableDetector:
+    """基于横竖线密度的页面表格检测器"""
+    
+    def __init__(self, min_rule_length: float = 3.0, rule_thickness: float = 2.0, snap_tolerance: float = 3.0,
+                 min_horizontal: int = 2, min_vertical: int = 2, min_rules: int = 5):
+        """
+        Args:
+            min_rule_length: 计入的线段最短长度（pt），与pdfplumber表格抽取的 edge_min_length 默认值相同
+            rule_thickness: 矩形的高（宽）不超过该值时视为一条横（竖）线
+            snap_tolerance: 位置相距不超过该值的线视为同一条
+            min_horizontal: 至少需要的不同横线位置数
+            min_vertical: 至少需要的不同竖线位置数
+            min_rules: 横竖线位置总数下限，单个边框（2横2竖）不算表格
+        """
+        self.min_rule_length = min_rule_length
+        self.rule_thickness = rule_thickness
+        self.snap_tolerance = snap_tolerance
+        self.min_horizontal = min_horizontal
+        self.min_vertical = min_vertical
+        self.min_rules = min_rules
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> Optional['TableDetector']:
+        """
+        根据配置创建表格检测器
+        
+        Args:
+            config: 系统配置
+        
+        Returns:
+            表格检测器，未开启时返回None（对每页都抽取表格）
+        """
+        detection_config = config.get('table_detection', {})
+        if not detection_config.get('enabled', True):
+            return None
+        return cls(
+            min_rule_length=detection_config.get('min_rule_length', 3.0),
+            rule_thickness=detection_config.get('rule_thickness', 2.0),
+            snap_tolerance=detection_config.get('snap_tolerance', 3.0),
+            min_horizontal=detection_config.get('min_horizontal', 2),
+            min_vertical=detection_config.get('min_vertical', 2),
+            min_rules=detection_config.get('min_rules', 5)
+        )
+    
+    def settings(self) -> Dict[str, Any]:
+        """影响检测结果的参数，用于表格缓存指纹"""
+        return {
+            'min_rule_length': self.min_rule_length,
+            'rule_thickness': self.rule_thickness,
+            'snap_tolerance': self.snap_tolerance,
+            'min_horizontal': self.min_horizontal,
+            'min_vertical': self.min_vertical,
+            'min_rules': self.min_rules
+        }
+    
+    def rules(self, segments: List[Segment]) -> Dict[str, int]:
+        """
+        统计线段中不同位置的横线和竖线
+        
+        Args:
+            segments: 线段列表，矩形按四条边计入
+        
+        Returns:
+            {'horizontal': 横线位置数, 'vertical': 竖线位置数}
+        """
+        horizontal, vertical = [], []
+        for x0, top, x1, bottom in segments:
+            width, height = abs(x1 - x0), abs(bottom - top)
+            if height <= self.rule_thickness and width >= self.min_rule_length:
+                horizontal.append((top + bottom) / 2)
+            elif width <= self.rule_thickness and height >= self.min_rule_length:
+                vertical.append((x0 + x1) / 2)
+        
+        return {
+            'horizontal': _count_positions(horizontal, self.snap_tolerance),
+            'vertical': _count_positions(vertical, self.snap_tolerance)
+        }
+    
+    def page_segments(self, page) -> List[Segment]:
+        """
+        页面中的直线和矩形边
+        
+        Args:
+            page: pdfplumber页面对象
+        
+        Returns:
+            线段列表
+        """
+        if not hasattr(page, '_layout'):
+            if not self._may_have_rules(page):
+                return []
+            return _scan_path_segments(page)
+        
+        segments = [(line['x0'], line['top'], line['x1'], line['bottom']) for line in page.lines]
+        for rect in page.rects:
+            x0, x1, top, bottom = rect['x0'], rect['x1'], rect['top'], rect['bottom']
+            segments.extend([(x0, top, x1, top), (x0, bottom, x1, bottom), (x0, top, x0, bottom), (x1, top, x1, bottom)])
+        return segments
+    
+    def _may_have_rules(self, page) -> bool:
+        """
+        按内容流原始字节中的画线运算符数估计线段数上限，上限不足 min_rules 时页面不可能有表格；
+        字符串中的同名字节只会高估，无法读取内容流时按可能处理
+        
+        Args:
+            page: pdfplumber页面对象
+        
+        Returns:
+            是否需要解释内容流
+        """
+        try:
+            from pdfminer.pdftypes import resolve1
+            data = b'\n'.join(resolve1(stream).get_data() for stream in page.page_obj.contents)
+            return _segment_bound(data, page.page_obj.resources) >= self.min_rules
+        except Exception:
+            return True
+    
+    def is_table_page(self, page) -> bool:
+        """
+        页面是否可能包含表格
+        
+        Args:
+            page: pdfplumber页面对象
+        
+        Returns:
+            横竖线足以构成至少两个单元格时为True
+        """
+        segments = self.page_segments(page)
+        if not segments:
+            return False
+        counts = self.rules(segments)
+        return (counts['horizontal'] >= self.min_horizontal and counts['vertical'] >= self.min_vertical
+                and counts['horizontal'] + counts['vertical'] >= self.min_rules)
+
+
+def _scan_path_segments(page) -> List[Segment]:
+    """
+    解释页面内容流，只收集路径中的直线段（矩形已由pdfminer拆为四条边），不分析文字版面
+    
+    Args:
+        page: pdfplumber页面对象
+    
+    Returns:
+        线段列表（PDF坐标，纵坐标方向不影响横竖线统计）
+    """
+    from pdfminer.pdfdevice import PDFDevice
+    from pdfminer.pdfinterp import PDFPageInterpreter
+    from pdfminer.utils import apply_matrix_pt
+    
+    segments = []
+    
+    class PathCollector(PDFDevice):
+        def paint_path(self, graphicstate, stroke, fill, evenodd, path):
+            start = current = None
+            for operation in path:
+                if operation[0] == 'm':
+                    start = current = apply_matrix_pt(self.ctm, operation[1:3])
+                elif operation[0] == 'l' and current is not None:
+                    point = apply_matrix_pt(self.ctm, operation[1:3])
+                    segments.append((current[0], current[1], point[0], point[1]))
+                    current = point
+                elif operation[0] == 'h' and current is not None:
+                    if current != start:
+                        segments.append((current[0], current[1], start[0], start[1]))
+                    current = start
+                elif len(operation) >= 3:
+                    # 曲线只更新当前点
+                    current = apply_matrix_pt(self.ctm, operation[-2:])
+    
+    PDFPageInterpreter(page.pdf.rsrcmgr, PathCollector(page.pdf.rsrcmgr)).process_page(page.page_obj)
+    return segments
+
+
+def _segment_bound(data: bytes, resources: Any, depth: int = 0) -> float:
+    """
+    内容流可能绘制的线段数上限：每个直线和闭合运算符一条、每个矩形四条，只用于裁剪的路径不计；
+    表单按引用递归累加，图像不计
+    
+    Args:
+        data: 内容流字节
+        resources: 内容流的资源字典
+        depth: 表单嵌套深度
+    
+    Returns:
+        线段数上限，无法估计时为无穷大
+    """
+    from pdfminer.pdftypes import resolve1
+    
+    # 嵌套括号每次去掉最内层
+    for _ in range(MAX_FORM_DEPTH):
+        data, replaced = STRING_LITERALS.subn(b' ', data)
+        if not replaced:
+            break
+    
+    bound = pending = 0
+    xobjects = None
+    for token in PATH_TOKENS.findall(data):
+        if token == b're':
+            pending += 4
+        elif token in (b'l', b'h'):
+            pending += 1
+        elif token.startswith(b'W'):
+            pending = 0
+        elif token == b'Do':
+            continue
+        else:
+            bound += pending
+            pending = 0
+    bound += pending
+    
+    for name in XOBJECT_REFERENCES.findall(data):
+        if xobjects is None:
+            xobjects = resolve1((resolve1(resources) or {}).get('XObject')) or {}
+        xobject = resolve1(xobjects.get(name.decode('latin-1')))
+        if xobject is None or depth >= MAX_FORM_DEPTH:
+            return float('inf')
+        subtype = resolve1(xobject.get('Subtype'))
+        if getattr(subtype, 'name', subtype) == 'Image':
+            continue
+        bound += _segment_bound(xobject.get_data(), xobject.get('Resources') or resources, depth + 1)
+    return bound
\ No newline at end of file
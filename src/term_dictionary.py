@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+术语词典模块
+基于Aho-Corasick自动机，一次扫描找出文本中出现的所有已知术语（含重叠出现）
+"""
+
+from collections import deque
+from typing import List, Tuple, Iterable, Set
+
+
+class TermDictionary:
+    """已知术语词典"""
+    
+    def __init__(self, terms: Iterable[str] = (), min_length: int = 2):
+        """
+        初始化术语词典
+        
+        Args:
+            terms: 术语列表
+            min_length: 收录术语的最小长度
+        """
+        self.min_length = min_length
+        self.terms: List[str] = []
+        self._term_set: Set[str] = set()
+        self._built = False
+        self.update(terms)
+    
+    def __len__(self) -> int:
+        return len(self.terms)
+    
+    def __contains__(self, term: str) -> bool:
+        return term in self._term_set
+    
+    def add(self, term: str) -> None:
+        """添加术语，自动机在下次匹配前重建"""
+        term = term.strip() if term else ''
+        if len(term) < self.min_length or term in self._term_set:
+            return
+        self._term_set.add(term)
+        self.terms.append(term)
+        self._built = False
+    
+    def update(self, terms: Iterable[str]) -> None:
+        """批量添加术语"""
+        for term in terms:
+            self.add(term)
+    
+    def _build(self) -> None:
+        """构建Aho-Corasick自动机：字典树 + 失败指针 + 输出链合并"""
+        goto = [{}]
+        outputs = [[]]
+        
+        for term_id, term in enumerate(self.terms):
+            state = 0
+            for char in term:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                    outputs.append([])
+                state = next_state
+            outputs[state].append(term_id)
+        
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                fail[next_state] = goto[fallback].get(char, 0) if goto[fallback].get(char) != next_state else 0
+                outputs[next_state] = outputs[next_state] + outputs[fail[next_state]]
+        
+        self._goto = goto
+        self._fail = fail
+        self._outputs = outputs
+        self._built = True
+    
+    def find_all(self, text: str, extra: Iterable[str] = ()) -> List[Tuple[int, int, str]]:
+        """
+        找出文本中所有术语出现位置
+        
+        Args:
+            text: 输入文本
+            extra: 本次匹配额外查找的术语（不加入词典，不触发自动机重建）
+        
+        Returns:
+            [(起始位置, 结束位置, 术语), ...]，按结束位置排序
+        """
+        if not self._built:
+            self._build()
+        if not text:
+            return []
+        
+        extra = [term for term in dict.fromkeys(extra) if term and term not in self._term_set]
+        if extra:
+            matches = self._find_dictionary(text) + self._find_extra(text, extra)
+            matches.sort(key=lambda match: match[1])
+            return matches
+        return self._find_dictionary(text)
+    
+    def _find_extra(self, text: str, extra: List[str]) -> List[Tuple[int, int, str]]:
+        """逐个查找额外术语的所有出现位置（含重叠出现）"""
+        matches = []
+        for term in extra:
+            start = text.find(term)
+            while start != -1:
+                matches.append((start, start + len(term), term))
+                start = text.find(term, start + 1)
+        return matches
+    
+    def _find_dictionary(self, text: str) -> List[Tuple[int, int, str]]:
+        """用自动机扫描词典术语"""
+        if not self.terms:
+            return []
+        
+        goto, fail, outputs, terms = self._goto, self._fail, self._outputs, self.terms
+        matches = []
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if outputs[state]:
+                end = index + 1
+                for term_id in outputs[state]:
+                    term = terms[term_id]
+                    matches.append((end - len(term), end, term))
+        return matches
+    
+    def find_terms(self, text: str) -> Set[str]:
+        """
+        找出文本中出现的术语集合
+        
+        Args:
+            text: 输入文本
+        
+        Returns:
+            术语集合
+        """
+        return {term for _, _, term in self.find_all(text)}
\ No newline at end of file
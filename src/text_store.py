@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩文本存储模块
+页面文本按页压缩成独立的块，用偏移量索引随机访问，前置一个解压页面的LRU缓存；
+CompressedPage / CompressedDocument 保持文档字典的接口不变，读取 text / full_text 时按需解压
+"""
+
+import zlib
+import lzma
+import threading
+from array import array
+from collections import OrderedDict
+from typing import List, Dict, Any
+
+_CODECS = {
+    'zlib': (lambda data, level: zlib.compress(data, level), zlib.decompress),
+    'lzma': (lambda data, level: lzma.compress(data, preset=level), lzma.decompress)
+}
+
+
+class CompressedTextStore:
+    """按页压缩的文本块存储"""
+    
+    def __init__(self, compression: str = 'zlib', level: int = 6, cache_pages: int = 256):
+        """
+        初始化文本存储
+        
+        Args:
+            compression: 压缩算法（zlib/lzma）
+            level: 压缩级别
+            cache_pages: 解压页面LRU缓存的容量
+        """
+        if compression not in _CODECS:
+            raise ValueError(f"不支持的压缩算法: {compression}")
+        self.compression = compression
+        self.level = level
+        self.cache_pages = cache_pages
+        self._compress, self._decompress = _CODECS[compression]
+        
+        self._blocks = bytearray()
+        self._offsets = array('Q')
+        self._lengths = array('I')
+        self._raw_bytes = 0
+        # 被替换的页面留下的不再引用的字节数
+        self._stale_bytes = 0
+        self._cache: 'OrderedDict[int, str]' = OrderedDict()
+        # 流式管道的各阶段线程会并发读取页面
+        self._lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def __len__(self) -> int:
+        return len(self._offsets)
+    
+    @classmethod
+    def from_config(cls, config: Dict[str, Any]) -> 'CompressedTextStore':
+        """
+        根据配置创建文本存储
+        
+        Args:
+            config: 系统配置
+        
+        Returns:
+            文本存储
+        """
+        store_config = config.get('text_store', {})
+        return cls(
+            store_config.get('compression', 'zlib'),
+            store_config.get('level', 6),
+            store_config.get('cache_pages', 256)
+        )
+    
+    def _append_block(self, text: str) -> bytes:
+        """压缩文本并追加到块缓冲区"""
+        data = text.encode('utf-8')
+        block = self._compress(data, self.level)
+        self._raw_bytes += len(data)
+        self._blocks.extend(block)
+        return block
+    
+    def add(self, text: str) -> int:
+        """
+        添加一个页面的文本
+        
+        Args:
+            text: 页面文本
+        
+        Returns:
+            页面编号
+        """
+        with self._lock:
+            offset = len(self._blocks)
+            block = self._append_block(text)
+            self._offsets.append(offset)
+            self._lengths.append(len(block))
+            return len(self._offsets) - 1
+    
+    def replace(self, page_id: int, text: str) -> None:
+        """
+        替换页面文本（如备用后端恢复的页面）：新块不超过旧块时原位写入，否则追加到末尾；
+        不再引用的字节超过缓冲区的一半时压实缓冲区
+        
+        Args:
+            page_id: 页面编号
+            text: 新文本
+        """
+        with self._lock:
+            offset = self._offsets[page_id]
+            old_length = self._lengths[page_id]
+            data = text.encode('utf-8')
+            block = self._compress(data, self.level)
+            self._raw_bytes += len(data)
+            if len(block) <= old_length:
+                self._blocks[offset:offset + len(block)] = block
+                self._stale_bytes += old_length - len(block)
+            else:
+                self._offsets[page_id] = len(self._blocks)
+                self._blocks.extend(block)
+                self._stale_bytes += old_length
+            self._lengths[page_id] = len(block)
+            self._cache.pop(page_id, None)
+            
+            if self._stale_bytes * 2 > len(self._blocks):
+                self._compact()
+    
+    def _compact(self) -> None:
+        """按页面顺序重写块缓冲区，去掉不再引用的字节（调用方持有锁）"""
+        blocks = bytearray()
+        for page_id, (offset, length) in enumerate(list(zip(self._offsets, self._lengths))):
+            self._offsets[page_id] = len(blocks)
+            blocks.extend(self._blocks[offset:offset + length])
+        self._blocks = blocks
+        self._stale_bytes = 0
+    
+    def get(self, page_id: int) -> str:
+        """
+        读取页面文本，只解压该页面所在的块
+        
+        Args:
+            page_id: 页面编号
+        
+        Returns:
+            页面文本
+        """
+        with self._lock:
+            text = self._cache.get(page_id)
+            if text is not None:
+                self._cache.move_to_end(page_id)
+                self.cache_hits += 1
+                return text
+            
+            offset = self._offsets[page_id]
+            block = bytes(self._blocks[offset:offset + self._lengths[page_id]])
+            text = self._decompress(block).decode('utf-8')
+            self.cache_misses += 1
+            if self.cache_pages > 0:
+                self._cache[page_id] = text
+                if len(self._cache) > self.cache_pages:
+                    self._cache.popitem(last=False)
+            return text
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        存储统计
+        
+        Returns:
+            页面数、原始/压缩字节数、压缩比和缓存命中情况
+        """
+        compressed = sum(self._lengths)
+        return {
+            'compression': self.compression,
+            'pages': len(self._offsets),
+            'buffer_bytes': len(self._blocks),
+            'raw_bytes': self._raw_bytes,
+            'compressed_bytes': compressed,
+            'ratio': round(self._raw_bytes / compressed, 2) if compressed else 0.0,
+            'cache_hits': self.cache_hits,
+            'cache_misses': self.cache_misses
+        }
+
+
+class _LazyFieldDict(dict):
+    """
+    一个字段按需读取、其余字段照常存储的字典，对外行为与普通字典相同
+    
+    子类设置 _lazy_field，并实现 _load()（读取该字段）和 _assign(value)（写入该字段）
+    """
+    
+    __slots__ = ()
+    _lazy_field = None
+    
+    def __getitem__(self, key):
+        if key == self._lazy_field:
+            return self._load()
+        return dict.__getitem__(self, key)
+    
+    def get(self, key, default=None):
+        if key == self._lazy_field:
+            return self._load()
+        return dict.get(self, key, default)
+    
+    def __setitem__(self, key, value):
+        if key == self._lazy_field:
+            self._assign(value)
+        else:
+            dict.__setitem__(self, key, value)
+    
+    def setdefault(self, key, default=None):
+        if key == self._lazy_field:
+            return self._load()
+        return dict.setdefault(self, key, default)
+    
+    def update(self, *args, **kwargs) -> None:
+        # 逐项经过 __setitem__，按需读取的字段写回存储
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+    
+    def __ior__(self, other):
+        self.update(other)
+        return self
+    
+    def _check_removable(self, key) -> None:
+        """按需读取的字段总是存在，不能删除"""
+        if key == self._lazy_field:
+            raise TypeError(f"{type(self).__name__} 的 {key} 字段不能删除")
+    
+    def __delitem__(self, key) -> None:
+        self._check_removable(key)
+        dict.__delitem__(self, key)
+    
+    def pop(self, key, *default):
+        self._check_removable(key)
+        return dict.pop(self, key, *default)
+    
+    def popitem(self):
+        # 按需读取的字段不能删除，先弹出其余字段，只剩它时才报错
+        if not dict.__len__(self):
+            self._check_removable(self._lazy_field)
+        return dict.popitem(self)
+    
+    def clear(self) -> None:
+        # 清空其余字段，按需读取的字段保留
+        dict.clear(self)
+    
+    def __contains__(self, key) -> bool:
+        return key == self._lazy_field or dict.__contains__(self, key)
+    
+    def __iter__(self):
+        yield from dict.__iter__(self)
+        yield self._lazy_field
+    
+    def __len__(self) -> int:
+        return dict.__len__(self) + 1
+    
+    def keys(self):
+        return list(self)
+    
+    def values(self):
+        return [self[key] for key in self]
+    
+    def items(self):
+        # json序列化和dict()复制都经过这里，得到完整内容
+        return [(key, self[key]) for key in self]
+    
+    def copy(self) -> Dict[str, Any]:
+        return dict(self.items())
+    
+    def __eq__(self, other) -> bool:
+        return dict(self.items()) == other
+    
+    def __ne__(self, other) -> bool:
+        return not self == other
+    
+    __hash__ = None
+    
+    def __repr__(self) -> str:
+        return repr(self.copy())
+    
+    def __reduce__(self):
+        # 复制和跨进程传递时还原为普通字典
+        return dict, (self.copy(),)
+
+
+class CompressedPage(_LazyFieldDict):
+    """文本存放在压缩存储中的页面"""
+    
+    __slots__ = ('_store', '_page_id')
+    _lazy_field = 'text'
+    
+    def __init__(self, page: Dict[str, Any], store: CompressedTextStore):
+        """
+        Args:
+            page: 原页面字典
+            store: 文本存储
+        """
+        dict.__init__(self, ((key, value) for key, value in page.items() if key != 'text'))
+        self._store = store
+        self._page_id = store.add(page.get('text') or '')
+    
+    def _load(self) -> str:
+        return self._store.get(self._page_id)
+    
+    def _assign(self, value: str) -> None:
+        self._store.replace(self._page_id, value)
+
+
+class CompressedDocument(_LazyFieldDict):
+    """页面文本压缩存储的文档，full_text 由页面文本按需拼接"""
+    
+    __slots__ = ()
+    _lazy_field = 'full_text'
+    
+    def __init__(self, document: Dict[str, Any], store: CompressedTextStore):
+        """
+        Args:
+            document: 原文档字典
+            store: 文本存储
+        """
+        dict.__init__(self, ((key, value) for key, value in document.items() if key != 'full_text'))
+        pages: List[Dict[str, Any]] = document.get('pages', [])
+        dict.__setitem__(self, 'pages', [page if isinstance(page, CompressedPage) else CompressedPage(page, store)
+                                         for page in pages])
+    
+    def _load(self) -> str:
+        return ''.join(f"\n\n--- 第{page['page_number']}页 ---\n{page['text']}" for page in dict.get(self, 'pages', []))
+    
+    def _assign(self, value: str) -> None:
+        # 全文总是由页面文本生成
+        pass
\ No newline at end of file
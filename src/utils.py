@@ -11,6 +11,8 @@ import json
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 
+from src.metrics import metrics
+
 
 def setup_logging(log_level: str = "INFO") -> logging.Logger:
     """设置日志配置"""
@@ -162,15 +164,19 @@ def extract_term_definition(text: str, term: str) -> Optional[str]:
         rf'{re.escape(term)}\s*即\s*([^。！？]+[。！？])'
     ]
     
+    attempts = 0
     for pattern in definition_patterns:
+        attempts += 1
         match = re.search(pattern, text)
         if match:
             definition = match.group(1).strip()
             # 清理定义文本
             definition = clean_text(definition)
             if len(definition) >= 10:  # 最小长度要求
+                metrics.incr('extract.regex_invocations', attempts)
                 return definition
     
+    metrics.incr('extract.regex_invocations', attempts)
     return None
 
 
@@ -201,6 +207,26 @@ def calculate_similarity(text1: str, text2: str) -> float:
     return intersection / union if union > 0 else 0.0
 
 
+def corpus_fingerprint(pdf_documents: List[Dict[str, Any]]) -> tuple:
+    """
+    计算文档列表的指纹，用于按语料缓存派生结构（句子库、全文索引、术语词典）
+    
+    指纹由各页面对象的标识及其跳过、近重复和备用后端恢复标记组成，不读取页面文本：
+    重新解析得到的新页面、近重复检测和补解析都会改变指纹。调用方需在缓存期间持有文档列表的引用，
+    保证页面对象的标识不被复用。
+    
+    Args:
+        pdf_documents: PDF文档列表
+        
+    Returns:
+        可比较的指纹
+    """
+    return tuple(
+        (id(page), page.get('skipped'), page.get('duplicate_of'), page.get('recovered_by'))
+        for doc in pdf_documents for page in doc['pages']
+    )
+
+
 def validate_output_format(data: Dict[str, Any], task_type: str = "task1") -> bool:
     """
     验证输出格式是否符合要求
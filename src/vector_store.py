@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+向量存储模块
+稠密向量按float16或int8（逐维缩放的对称标量量化）存储在内存映射文件中，
+检索先用量化向量对全部向量打分，再用可选的全精度副本对候选重新排序
+"""
+
+import json
+from pathlib import Path
+from typing import List, Dict, Any, Tuple, Optional
+
+import numpy as np
+
+# 支持的存储精度
+STORAGE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+_INT8_MAX = 127
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    量化向量矩阵
+    
+    Args:
+        vectors: 向量矩阵（每行一个向量）
+        dtype: 存储精度（float32/float16/int8）
+    
+    Returns:
+        (量化后的矩阵, 逐维缩放系数)，浮点精度没有缩放系数
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(f"不支持的存储精度: {dtype}")
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if dtype != 'int8':
+        return vectors.astype(STORAGE_DTYPES[dtype]), None
+    
+    # 每个维度按该维的最大绝对值缩放到[-127, 127]
+    scales = np.abs(vectors).max(axis=0) / _INT8_MAX if len(vectors) else np.ones(vectors.shape[1], np.float32)
+    scales[scales == 0] = 1.0
+    codes = np.clip(np.rint(vectors / scales), -_INT8_MAX, _INT8_MAX).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class VectorStore:
+    """量化的稠密向量存储"""
+    
+    CODES_FILE = 'codes.npy'
+    SCALES_FILE = 'scales.npy'
+    FULL_FILE = 'full.npy'
+    META_FILE = 'meta.json'
+    
+    def __init__(self, codes: np.ndarray, scales: np.ndarray = None, full: np.ndarray = None,
+                 block_rows: int = 65536):
+        """
+        Args:
+            codes: 量化后的向量矩阵（可为内存映射数组）
+            scales: int8量化的逐维缩放系数
+            full: 用于重新排序的全精度向量（可为内存映射数组）
+            block_rows: 打分时每块反量化的行数，限制临时内存
+        """
+        self.codes = codes
+        self.scales = scales
+        self.full = full
+        self.block_rows = block_rows
+    
+    def __len__(self) -> int:
+        return len(self.codes)
+    
+    @property
+    def dim(self) -> int:
+        return self.codes.shape[1]
+    
+    @property
+    def dtype(self) -> str:
+        return np.dtype(self.codes.dtype).name
+    
+    @classmethod
+    def from_vectors(cls, vectors: np.ndarray, dtype: str = 'float16', keep_full: bool = False) -> 'VectorStore':
+        """
+        由全精度向量创建存储
+        
+        Args:
+            vectors: 向量矩阵
+            dtype: 存储精度（float32/float16/int8）
+            keep_full: 是否保留float32全精度副本用于重新排序
+        
+        Returns:
+            向量存储
+        """
+        codes, scales = quantize(vectors, dtype)
+        full = np.asarray(vectors, dtype=np.float32) if keep_full and dtype != 'float32' else None
+        return cls(codes, scales, full)
+    
+    def save(self, directory: str) -> None:
+        """
+        保存到目录，每个数组一个.npy文件
+        
+        Args:
+            directory: 输出目录
+        """
+        path = Path(directory)
+        path.mkdir(parents=True, exist_ok=True)
+        np.save(path / self.CODES_FILE, np.asarray(self.codes))
+        for name, array in ((self.SCALES_FILE, self.scales), (self.FULL_FILE, self.full)):
+            if array is not None:
+                np.save(path / name, np.asarray(array))
+            elif (path / name).exists():
+                (path / name).unlink()
+        with open(path / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump({'dtype': self.dtype, 'count': len(self), 'dim': self.dim,
+                       'full': self.full is not None}, f)
+    
+    @classmethod
+    def open(cls, directory: str) -> 'VectorStore':
+        """
+        以内存映射方式打开存储，向量只在被访问时读入
+        
+        Args:
+            directory: 保存目录
+        
+        Returns:
+            向量存储
+        """
+        path = Path(directory)
+        codes = np.load(path / cls.CODES_FILE, mmap_mode='r')
+        scales = np.load(path / cls.SCALES_FILE) if (path / cls.SCALES_FILE).exists() else None
+        full = np.load(path / cls.FULL_FILE, mmap_mode='r') if (path / cls.FULL_FILE).exists() else None
+        return cls(codes, scales, full)
+    
+    def reconstruct(self, rows: List[int] = None) -> np.ndarray:
+        """
+        反量化指定行
+        
+        Args:
+            rows: 行号列表，默认全部
+        
+        Returns:
+            float32向量矩阵
+        """
+        codes = self.codes if rows is None else self.codes[rows]
+        vectors = np.asarray(codes, dtype=np.float32)
+        return vectors * self.scales if self.scales is not None else vectors
+    
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """
+        量化向量与查询向量的内积，分块计算
+        
+        Args:
+            query: 查询向量
+        
+        Returns:
+            每行的内积
+        """
+        query = np.asarray(query, dtype=np.float32)
+        # 缩放系数并入查询向量，量化矩阵只需转换类型
+        if self.scales is not None:
+            query = query * self.scales
+        scores = np.empty(len(self.codes), dtype=np.float32)
+        for start in range(0, len(self.codes), self.block_rows):
+            block = np.asarray(self.codes[start:start + self.block_rows], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        return scores
+    
+    def search(self, query: np.ndarray, top_k: int = 10, rerank: int = 0) -> List[Tuple[int, float]]:
+        """
+        内积最大的向量（向量已归一化时即余弦相似度）
+        
+        Args:
+            query: 查询向量
+            top_k: 返回结果数
+            rerank: 量化打分后取前多少个候选用全精度向量重新打分，0或没有全精度副本时不重新排序
+        
+        Returns:
+            [(行号, 得分), ...]，按得分从高到低
+        """
+        if not len(self.codes) or top_k <= 0:
+            return []
+        
+        scores = self.scores(query)
+        candidates = max(top_k, rerank) if rerank and self.full is not None else top_k
+        candidates = min(candidates, len(scores))
+        rows = np.argpartition(-scores, candidates - 1)[:candidates]
+        
+        if rerank and self.full is not None:
+            rows = np.sort(rows)
+            scores = np.zeros(len(self.codes), dtype=np.float32)
+            scores[rows] = np.asarray(self.full[rows], dtype=np.float32) @ np.asarray(query, dtype=np.float32)
+        
+        rows = rows[np.lexsort((rows, -scores[rows]))][:top_k]
+        return [(int(row), float(scores[row])) for row in rows]
+    
+    def memory_stats(self) -> Dict[str, Any]:
+        """
+        存储占用
+        
+        Returns:
+            量化矩阵、缩放系数和全精度副本的字节数
+        """
+        return {
+            'dtype': self.dtype,
+            'count': len(self),
+            'dim': self.dim,
+            'codes_bytes': int(self.codes.nbytes),
+            'scales_bytes': int(self.scales.nbytes) if self.scales is not None else 0,
+            'full_bytes': int(self.full.nbytes) if self.full is not None else 0
+        }
\ No newline at end of file
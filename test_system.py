@@ -13,6 +13,28 @@ from pathlib import Path
 # 添加src目录到Python路径
 sys.path.append(str(Path(__file__).parent / "src"))
 
+def _write_test_pdf(path, page_texts):
+    """写出每页一行文本的最小PDF，供解析相关测试使用"""
+    objects = ['<< /Type /Catalog /Pages 2 0 R >>', None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    kids = []
+    for text in page_texts:
+        stream = f'BT /F1 12 Tf 72 720 Td ({text}) Tj ET'
+        objects.append(f'<< /Length {len(stream)} >>\nstream\n{stream}\nendstream')
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] '
+                       f'/Resources << /Font << /F1 3 0 R >> >> /Contents {len(objects)} 0 R >>')
+        kids.append(f'{len(objects)} 0 R')
+    objects[1] = f'<< /Type /Pages /Kids [{" ".join(kids)}] /Count {len(kids)} >>'
+    
+    body, offsets = b'%PDF-1.4\n', []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(body))
+        body += f'{number} 0 obj\n{obj}\nendobj\n'.encode('latin-1')
+    xref = len(body)
+    body += f'xref\n0 {len(objects) + 1}\n0000000000 65535 f \n'.encode('latin-1')
+    body += ''.join(f'{offset:010d} 00000 n \n' for offset in offsets).encode('latin-1')
+    body += f'trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n'.encode('latin-1')
+    Path(path).write_bytes(body)
+
 def test_imports():
     """测试模块导入"""
     print("测试模块导入...")
@@ -91,6 +113,1403 @@ def test_rules():
     
     return True
 
+def test_definition_matcher():
+    """测试锚点优先的定义匹配与正则模式结果一致"""
+    print("\n测试定义匹配...")
+    
+    import re
+    from src.rules import ExtractionRules
+    
+    extraction_rules = ExtractionRules()
+    texts = [
+        "海洋灾害是指由海洋自然环境发生异常或激烈变化导致的灾害。风暴潮定义为由强烈大气扰动引起的海面异常升降现象。",
+        "海啸 为 由海底地震引起的长周期波动现象，海啸即地震海浪现象。观测要素：海浪、潮位和海流的观测数据。",
+        "浮标观测指的是利用锚系浮标对海洋要素进行连续观测的方法，其中数据表示为时间序列。海冰为",
+        "质量控制为数据处理环节为保证数据可靠性而进行的检查工作！"
+    ]
+    
+    for text in texts:
+        expected = []
+        for pattern in extraction_rules.definition_patterns:
+            for match in re.finditer(pattern, text):
+                term, definition = match.group('term').strip(), match.group('definition').strip()
+                if 2 <= len(term) <= 50 and 10 <= len(definition) <= 500:
+                    expected.append({'term': term, 'definition': definition, 'pattern': pattern})
+        assert extraction_rules.extract_term_definitions(text) == expected
+    print("✓ 定义匹配结果与正则模式一致")
+    
+    return True
+
+def test_ocean_term_filter():
+    """测试批量海洋领域术语过滤"""
+    print("\n测试海洋领域术语过滤...")
+    
+    from src.rules import ExtractionRules
+    
+    extraction_rules = ExtractionRules()
+    candidates = ['海洋灾害', '呼吸器', '观测方法', '', '呼吸器', '风暴潮']
+    assert extraction_rules.filter_ocean_related_terms(candidates) == [True, False, True, False, False, True]
+    assert extraction_rules.is_ocean_related_term('卫星遥感')
+    assert not extraction_rules.is_ocean_related_term('安全色')
+    print("✓ 批量过滤结果正确")
+    
+    return True
+
+def test_metrics():
+    """测试运行指标"""
+    print("\n测试运行指标...")
+    
+    from src.metrics import Metrics
+    
+    # 关闭时不记录任何指标
+    disabled = Metrics()
+    disabled.incr('extract.pages_scanned', 5)
+    with disabled.timer('stage.extract'):
+        pass
+    assert disabled.report()['counters'] == {}
+    assert disabled.report()['timers'] == {}
+    print("✓ 关闭指标时不记录数据")
+    
+    # 开启时记录计数器、计时器和直方图
+    enabled = Metrics(enabled=True)
+    enabled.incr('extract.pages_scanned', 5)
+    enabled.incr('extract.pages_scanned')
+    with enabled.timer('stage.extract'):
+        pass
+    for value in range(1, 101):
+        enabled.observe('extract.term_seconds', value)
+    
+    report = enabled.report()
+    assert report['counters']['extract.pages_scanned'] == 6
+    assert report['timers']['stage.extract']['count'] == 1
+    assert report['histograms']['extract.term_seconds']['max'] == 100
+    assert report['histograms']['extract.term_seconds']['p50'] == 51
+    print("✓ 计数器、计时器和直方图正常")
+    
+    return True
+
+def test_result_cache():
+    """测试结果缓存"""
+    print("\n测试结果缓存...")
+    
+    import sqlite3
+    import tempfile
+    from src.cache import ResultCache, RULE_SOURCE_FILES
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cache_path = os.path.join(tmp_dir, 'cache.sqlite')
+        params = {'min_confidence': 0.7}
+        
+        cache = ResultCache(cache_path, 'corpus-v1', 'rules-v1', max_entries=2)
+        cache.put('term', ['海浪'], params, {"术语名称": "海浪"})
+        cache.put('term', ['海啸'], params, None)
+        assert cache.get('term', ['海浪'], params) == (True, {"术语名称": "海浪"})
+        assert cache.get('term', ['海啸'], params) == (True, None)
+        assert cache.get('term', ['海浪'], {'min_confidence': 0.5})[0] is False
+        print("✓ 缓存读写正常")
+        
+        # 超出容量时淘汰最久未访问的条目
+        cache.get('term', ['海浪'], params)
+        cache.put('term', ['海冰'], params, None)
+        assert len(cache) == 2
+        assert cache.get('term', ['海啸'], params)[0] is False
+        assert cache.get('term', ['海浪'], params)[0] is True
+        print("✓ LRU淘汰正常")
+        
+        # 读取命中只在内存中记录访问时间，写入或关闭时批量写回
+        def stored_access():
+            with sqlite3.connect(cache_path) as conn:
+                return dict(conn.execute("SELECT value, last_access FROM results").fetchall())
+        before = stored_access()
+        cache.get('term', ['海冰'], params)
+        assert stored_access() == before
+        cache.flush()
+        assert stored_access()['null'] > before['null']
+        
+        # 有被跳过页面的语料不写入缓存
+        cache.record_parse_report({'skipped_pages': [{'file_name': 'GB+1-2020.pdf', 'page_number': 3}]})
+        cache.put('term', ['海流'], params, None)
+        assert cache.get('term', ['海流'], params)[0] is False
+        cache.record_parse_report({'skipped_pages': []})
+        cache.put('term', ['海流'], params, None)
+        assert cache.get('term', ['海流'], params)[0] is True
+        cache.close()
+        
+        # 近重复检测等语料处理配置是缓存键的一部分
+        cache = ResultCache(cache_path, 'corpus-v1', 'rules-v1', max_entries=2, settings={'dedup': {'enabled': False}})
+        assert cache.get('term', ['海流'], params)[0] is False
+        cache.close()
+        assert {'src/dedup.py', 'src/sentence_store.py', 'src/term_dictionary.py',
+                'scripts/stream_pipeline.py'} <= set(RULE_SOURCE_FILES)
+        print("✓ 访问时间批量写回，不完整语料的结果不缓存，语料处理配置参与缓存键")
+        
+        # 语料版本变化时缓存失效
+        cache = ResultCache(cache_path, 'corpus-v2', 'rules-v1', max_entries=2)
+        assert len(cache) == 0
+        cache.close()
+        print("✓ 版本变化时缓存自动失效")
+    
+    return True
+
+def test_ranked_definition_search():
+    """测试候选页面排序和提前终止的定义搜索"""
+    print("\n测试定义搜索...")
+    
+    from scripts.extract_terms import TermExtractor
+    
+    definition = '海浪是指由风引起的海面波动现象，海浪即风浪和涌浪的统称。'
+    documents = [{'file_name': 'GB+1-2020.pdf', 'pages': [
+        {'page_number': 1, 'text': '海浪观测规范'},
+        {'page_number': 2, 'text': '海浪为观测要素之一，海浪资料需要长期积累。'},
+        {'page_number': 3, 'text': '3 术语和定义\n' + definition},
+        {'page_number': 4, 'text': '4 技术要求\n' + definition}
+    ]}]
+    
+    extractor = TermExtractor({'term_extraction': {'top_k_alternates': 2}})
+    candidates, pages_scanned = extractor._rank_candidate_pages('海浪', documents)
+    assert pages_scanned == 4 and candidates[0][1]['page_number'] == 3
+    print("✓ 术语和定义章节页面优先")
+    
+    result = extractor._extract_single_term('海浪', documents)
+    assert result['文档页数'] == '第3页'
+    # 第3页已达到最高置信度，不再评估其余页面
+    assert result['候选定义'] == []
+    print("✓ 达到最高置信度后提前终止")
+    
+    return True
+
+def test_streaming_pipeline():
+    """测试流式管道"""
+    print("\n测试流式管道...")
+    
+    import itertools
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    from scripts.stream_pipeline import StreamingPipeline
+    
+    documents = [
+        {'file_name': 'GB+1-2020.pdf', 'file_path': 'a/GB+1-2020.pdf', 'pages': [
+            {'page_number': 1, 'text': '海浪是指由风引起的海面波动现象，海浪即风浪和涌浪的统称。'},
+            {'page_number': 2, 'text': '', 'skipped': 'page_timeout'}
+        ]},
+        {'file_name': 'GB+2-2021.pdf', 'file_path': 'a/GB+2-2021.pdf', 'pages': [
+            {'page_number': 1, 'text': '海浪是指由风引起的海面波动现象，海浪即风浪和涌浪的统称。'},
+            {'page_number': 3, 'text': '风暴潮是指由强烈大气扰动引起的海面异常升降现象，风暴潮即风暴增水。'}
+        ]},
+        {'file_name': 'GB+3-2022.pdf', 'file_path': 'a/GB+3-2022.pdf', 'pages': [
+            {'page_number': 1, 'text': '海洋灾害术语'},
+            {'page_number': 2, 'text': '3 术语和定义\n风暴潮是指由强烈大气扰动引起的海面异常升降现象，风暴潮即风暴增水。'}
+        ]}
+    ]
+    
+    class FakeParser:
+        """按与语料顺序相反的顺序产出页面"""
+        def list_pdf_files(self, pdf_dir=None):
+            return [doc['file_path'] for doc in documents]
+        
+        def reset_parse_report(self):
+            pass
+        
+        def iter_parsed_pages(self, pdf_paths, max_queue=0):
+            for doc in reversed(documents):
+                for page in reversed(doc['pages']):
+                    yield 'page', doc['file_path'], page
+                yield 'document', doc['file_path'], doc
+    
+    terms = ['海浪', '风暴潮', '海啸']
+    extractor = TermExtractor()
+    associator = TermAssociator()
+    pipeline = StreamingPipeline({'pipeline': {'queue_size': 1}}, FakeParser(), extractor, associator)
+    streamed = pipeline.run(terms, terms)
+    
+    # 结果与逐文档搜索一致（同置信度时取语料中靠前的页面）
+    assert streamed['terms'] == extractor.resolve_terms(terms, documents)
+    assert streamed['terms']['海浪']['文档出处'] == 'GB+1-2020'
+    assert streamed['terms']['海啸'] is None
+    # 同置信度时与逐文档搜索一样优先"术语和定义"章节中的页面
+    assert streamed['terms']['风暴潮']['文档出处'] == 'GB+3-2022'
+    assert streamed['pairs'] == associator.resolve_pairs(list(itertools.combinations(terms, 2)), documents)
+    assert [doc['file_name'] for doc in streamed['documents']] == ['GB+1-2020.pdf', 'GB+2-2021.pdf', 'GB+3-2022.pdf']
+    print("✓ 流式结果与逐文档搜索一致")
+    
+    # 流式运行不做近重复检测；近重复检测默认关闭，开启时与逐阶段运行的结果分开缓存
+    assert pipeline._cache_params(associator) == associator.cache_params()
+    deduplicating = StreamingPipeline({'dedup': {'enabled': True}}, FakeParser(), extractor, associator)
+    assert deduplicating._cache_params(extractor) != extractor.cache_params()
+    print("✓ 开启近重复检测时缓存键区分运行方式")
+    
+    return True
+
+def test_term_dictionary():
+    """测试术语词典和词典约束的直接关联查找"""
+    print("\n测试术语词典...")
+    
+    from src.term_dictionary import TermDictionary
+    from scripts.associate_terms import TermAssociator
+    
+    dictionary = TermDictionary(['海浪', '风浪', '海浪观测', '涌浪', '海'])
+    assert dictionary.find_all('海浪观测包括风浪') == [(0, 2, '海浪'), (0, 4, '海浪观测'), (6, 8, '风浪')]
+    assert '海' not in dictionary
+    print("✓ 多模式匹配正常")
+    
+    documents = [{'file_name': 'GB+1-2020.pdf', 'pages': [
+        {'page_number': 1, 'text': '海浪包括风浪和涌浪，海浪分为多种类型。'}
+    ]}]
+    associations = TermAssociator({'association_analysis': {'min_confidence': 0.3}}).find_direct_associations(
+        '海浪', documents, dictionary
+    )
+    assert {association['关联术语'] for association in associations} == {'风浪', '涌浪'}
+    print("✓ 只对词典中的术语评分")
+    
+    # 目标术语不在词典中时只在本次匹配中查找，不改动共享词典
+    shared = TermDictionary(['风浪', '涌浪'])
+    associations = TermAssociator({'association_analysis': {'min_confidence': 0.3}}).find_direct_associations(
+        '海浪', documents, shared
+    )
+    assert {association['关联术语'] for association in associations} == {'风浪', '涌浪'}
+    assert '海浪' not in shared and len(shared) == 2
+    
+    # 未设置词典时按文档列表和任务术语构建，换一批文档时重建
+    associator = TermAssociator()
+    built = associator.get_term_dictionary(documents, ['风浪', '涌浪'])
+    assert '风浪' in built and '涌浪' in built
+    assert associator.get_term_dictionary(documents, ['风浪', '涌浪']) is built
+    assert associator.get_term_dictionary(list(documents), ['风浪']) is not built
+    print("✓ 目标术语不写入词典，词典按文档和任务术语缓存")
+    
+    return True
+
+def test_association_graph():
+    """测试术语关联图存储"""
+    print("\n测试关联图存储...")
+    
+    import tempfile
+    from src.graph_store import AssociationGraph
+    
+    graph = AssociationGraph(compact_threshold=2)
+    graph.add_edge('海洋灾害', '风暴潮', '主从关系', 0.9)
+    graph.add_edge('风暴潮', '海岸侵蚀', '因果关系', 0.8)
+    graph.add_edge('海洋灾害', '海啸', '主从关系', 0.85)
+    graph.add_edge('海洋灾害', '风暴潮', '主从关系', 0.95)
+    graph.add_node('海冰')
+    
+    assert graph.neighbors('海洋灾害') == [('风暴潮', '主从关系', 0.95), ('海啸', '主从关系', 0.85)]
+    assert graph.neighbors('风暴潮', '因果关系') == [('海岸侵蚀', '因果关系', 0.8)]
+    assert graph.k_hop('海啸', 2) == {'海洋灾害': 1, '风暴潮': 2}
+    assert graph.shortest_path('海啸', '海岸侵蚀') == ['海啸', '海洋灾害', '风暴潮', '海岸侵蚀']
+    assert graph.shortest_path('海啸', '海冰') is None
+    stats = graph.degree_stats()
+    assert stats['edges'] == 3 and stats['isolated_nodes'] == 1 and stats['max_degree'] == 2
+    print("✓ 邻居、多跳和最短路径查询正常")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        graph_path = os.path.join(tmp_dir, 'graph.npz')
+        graph.version = 'corpus-rules'
+        graph.save(graph_path)
+        loaded = AssociationGraph.load(graph_path)
+        assert loaded.version == 'corpus-rules'
+        assert loaded.degree_stats() == stats
+        assert loaded.neighbors('海洋灾害') == graph.neighbors('海洋灾害')
+    print("✓ 关联图保存和加载正常")
+    
+    return True
+
+def test_community_detection():
+    """测试关联网络社区发现"""
+    print("\n测试社区发现...")
+    
+    import itertools
+    from scripts.associate_terms import TermAssociator
+    
+    groups = [['海浪', '涌浪', '风浪', '波高'], ['浮标', '潜标', '锚系', '传感器']]
+    associations = {}
+    for group in groups:
+        for term1, term2 in itertools.combinations(group, 2):
+            associations[f"R{len(associations) + 1:02d}"] = {
+                "术语关联": [term1, term2], "关联关系": "主从关系", "置信度": 0.9
+            }
+    associations["R99"] = {"术语关联": ['波高', '浮标'], "关联关系": "因果关系", "置信度": 0.7}
+    
+    terms = groups[0] + groups[1] + ['海冰']
+    network = TermAssociator().build_association_network(terms, [], associations)
+    communities = network["communities"]
+    
+    assert [cluster['size'] for cluster in communities['clusters']] == [4, 4, 1]
+    assignments = communities['assignments']
+    assert len({assignments[term] for term in groups[0]}) == 1
+    assert len({assignments[term] for term in groups[1]}) == 1
+    assert assignments['海浪'] != assignments['浮标']
+    assert {node['id']: node['group'] for node in network['nodes']} == assignments
+    print("✓ 标签传播社区划分正确")
+    
+    # 持久化关联图中以往运行的边不进入本次输出的链接和统计
+    from src.graph_store import AssociationGraph
+    associator = TermAssociator()
+    associator.association_graph = AssociationGraph()
+    associator.association_graph.add_edge('海浪', '海冰', '因果关系', 0.6)
+    network = associator.build_association_network(terms, [], {"R01": associations["R01"]})
+    assert [(link['source'], link['target']) for link in network['links']] == [('海浪', '涌浪')]
+    assert network['statistics']['edges'] == 1 and network['statistics']['nodes'] == len(terms)
+    assert associator.association_graph.edge_count == 2
+    print("✓ 关联网络只输出本次运行确认的关联")
+    
+    return True
+
+def test_search_index():
+    """测试全文索引检索"""
+    print("\n测试全文索引...")
+    
+    import numpy as np
+    from scripts.parse_pdfs import PDFParser
+    
+    docs = [
+        {'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020', 'pages': [
+            {'page_number': 1, 'text': '风暴潮是由强风引起的海面异常升高现象。风暴潮警戒潮位应予公布。'},
+            {'page_number': 2, 'text': '海啸预警要求。本页不涉及其他内容。'}
+        ]},
+        {'file_name': 'HY_T+2-2021.pdf', 'file_stem': 'HY_T+2-2021', 'pages': [
+            {'page_number': 1, 'text': '海浪观测方法。风暴 潮位不是短语。'},
+            {'page_number': 2, 'text': '风暴潮预警。'}
+        ]}
+    ]
+    parser = PDFParser()
+    
+    hits = parser.search_text_in_pdfs('风暴潮', docs)
+    assert [(hit['document'], hit['page_number']) for hit in hits] == [('GB+1-2020', 1), ('HY_T+2-2021', 2)]
+    assert 'full_text' not in hits[0]
+    assert hits[0]['text_snippet'].startswith('风暴潮是由强风')
+    print("✓ 短语检索与原有子串语义一致")
+    
+    result = parser.search('风暴潮 OR 海啸 预警', docs)
+    assert result['total'] == 2
+    assert {(hit['document'], hit['page_number']) for hit in result['results']} == {('GB+1-2020', 2), ('HY_T+2-2021', 2)}
+    scores = [hit['score'] for hit in parser.search('风暴潮', docs)['results']]
+    assert len(scores) == 2 and scores == sorted(scores, reverse=True)
+    assert parser.search('风暴潮', docs, doc_prefixes=['HY_T'])['total'] == 1
+    assert parser.search('"风暴 潮位"', docs)['total'] == 1
+    assert parser.search('风暴潮', docs, page_range=(2, 2))['total'] == 1
+    
+    paged = parser.search('风暴', docs, page=2, page_size=2)
+    assert paged['total'] == 3 and len(paged['results']) == 1
+    # 文档频率在过滤前统计，过滤不改变得分
+    unfiltered = {hit['document']: hit['score'] for hit in parser.search('风暴', docs)['results'] if hit['page_number'] == 1}
+    filtered = parser.search('风暴', docs, documents=['HY_T+2-2021'])['results']
+    assert [hit['score'] for hit in filtered if hit['page_number'] == 1] == [unfiltered['HY_T+2-2021']]
+    # 页面只保存元数据，不保存逐页的二元组位置表
+    assert not any(isinstance(value, np.ndarray) and value.dtype.itemsize > 4
+                   for page in parser.get_search_index(docs).pages for value in page.values())
+    print("✓ AND/OR查询、过滤、BM25排序和分页正常")
+    
+    # 索引按语料指纹缓存：同一语料复用，重新解析的文档或新标记的重复页面触发重建
+    index = parser.get_search_index(docs)
+    assert parser.get_search_index(docs) is index
+    reparsed = [dict(doc, pages=[dict(page) for page in doc['pages']]) for doc in docs]
+    assert parser.get_search_index(reparsed) is not index
+    reparsed[1]['pages'][1]['duplicate_of'] = {'file_name': 'GB+1-2020.pdf', 'page_number': 1}
+    assert parser.search('风暴潮', reparsed)['total'] == 1
+    
+    # 近重复页面只索引规范副本，过滤条件匹配任一副本时按该副本报告
+    from src.dedup import CorpusDeduplicator
+    shared = '风暴潮警戒潮位是防潮减灾的重要指标，沿海地区应根据历史潮位资料、岸段重要性和海岸防护能力分级核定，并向社会公布。'
+    deduplicated = [
+        {'file_name': 'GB_T+1-2020.pdf', 'file_stem': 'GB_T+1-2020',
+         'pages': [{'page_number': number, 'text': '总则。'} for number in (1, 2)] + [{'page_number': 3, 'text': shared}]},
+        {'file_name': 'HY_T+2-2010.pdf', 'file_stem': 'HY_T+2-2010',
+         'pages': [{'page_number': 1, 'text': '范围。'}, {'page_number': 2, 'text': shared}]}
+    ]
+    assert CorpusDeduplicator({}).deduplicate(deduplicated)['duplicate_pages'] == 1
+    assert deduplicated[1]['pages'][1]['duplicate_of']
+    hit = parser.search('警戒潮位', deduplicated)['results'][0]
+    assert (hit['document'], hit['page_number']) == ('GB_T+1-2020', 3)
+    assert hit['duplicates'] == [{'document': 'HY_T+2-2010', 'page_number': 2}]
+    for options in ({'doc_prefixes': ['HY_T']}, {'documents': ['HY_T+2-2010']}, {'page_range': (2, 2)}):
+        hits = parser.search('警戒潮位', deduplicated, **options)['results']
+        assert [(hit['document'], hit['page_number']) for hit in hits] == [('HY_T+2-2010', 2)]
+        assert hits[0]['duplicates'] == [{'document': 'GB_T+1-2020', 'page_number': 3}]
+    assert parser.search('警戒潮位', deduplicated, page_range=(4, 9))['total'] == 0
+    assert [(hit['document'], hit['page_number']) for hit in parser.search_text_in_pdfs('警戒潮位', deduplicated)] == [
+        ('GB_T+1-2020', 3), ('HY_T+2-2010', 2)]
+    print("✓ 近重复页面的过滤和子串检索覆盖所有出处")
+    
+    from scripts.associate_terms import TermAssociator
+    associator = TermAssociator()
+    store = associator.get_sentence_store(docs)
+    assert associator.get_sentence_store(docs) is store
+    assert associator.get_sentence_store(reparsed) is not store
+    print("✓ 全文索引和句子库按语料指纹缓存")
+    
+    return True
+
+def test_lazy_startup():
+    """测试解析结果缓存和延迟导入的启动路径"""
+    print("\n测试延迟导入...")
+    
+    import subprocess
+    import tempfile
+    from src.parse_cache import ParseCache
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        data_dir = Path(tmp_dir) / 'raw'
+        data_dir.mkdir()
+        pdf_path = str(data_dir / 'GB+1-2020.pdf')
+        Path(pdf_path).write_bytes(b'%PDF-1.4 placeholder')
+        
+        config = {'data_dir': str(data_dir), 'parse_cache': {'dir': str(Path(tmp_dir) / 'parsed')},
+                  'result_cache': {'enabled': False}, 'pdf_parser': {'workers': 0}}
+        config_path = Path(tmp_dir) / 'config.json'
+        config_path.write_text(json.dumps(config), encoding='utf-8')
+        
+        cache = ParseCache.from_config(config)
+        document = {'file_path': pdf_path, 'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020',
+                    'page_count': 1, 'metadata': {}, 'full_text': '',
+                    'pages': [{'page_number': 1, 'text': '风暴潮：由强风引起的海面异常升高现象。'}]}
+        assert cache.put(pdf_path, document)
+        assert cache.get(pdf_path)['pages'] == document['pages']
+        print("✓ 解析结果缓存读写正常")
+        
+        script = (
+            "import sys, app\n"
+            "assert 'pdfplumber' not in sys.modules and 'numpy' not in sys.modules\n"
+            f"system = app.OceanTerminologySystem({str(config_path)!r})\n"
+            "documents = system._parse_documents()\n"
+            "print(len(documents), documents[0]['pages'][0]['text'][:3], 'pdfplumber' in sys.modules)\n"
+        )
+        completed = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True,
+                                   cwd=Path(__file__).parent)
+        assert completed.returncode == 0, completed.stderr
+        assert completed.stdout.split() == ['1', '风暴潮', 'False']
+        print("✓ 导入app不加载重量级依赖，命中解析缓存时不导入pdfplumber")
+    
+    return True
+
+def test_parse_budgets():
+    """测试单页/单文档解析预算、跳过页面报告和备用后端重试"""
+    print("\n测试解析预算...")
+    
+    import time
+    import tempfile
+    import multiprocessing
+    from scripts.parse_pdfs import PDFParser, _parse_pdf_worker
+    
+    original_parse_page = PDFParser._parse_page
+    
+    def slow_parse_page(self, page, page_num):
+        # 第2页和第4页及以后模拟病态页面
+        if page_num == 2 or page_num >= 4:
+            time.sleep(5)
+        return original_parse_page(self, page, page_num)
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = str(Path(tmp_dir) / 'GB+1-2020.pdf')
+        _write_test_pdf(pdf_path, ['page one', 'page two', 'page three', 'page four', 'page five'])
+        config = {'data_dir': tmp_dir, 'parse_cache': {'enabled': False}, 'dedup': {'enabled': False},
+                  'pdf_parser': {'workers': 1, 'page_timeout': 0.3, 'document_timeout': 0}}
+        
+        PDFParser._parse_page = slow_parse_page
+        try:
+            reader, writer = multiprocessing.Pipe(duplex=False)
+            _parse_pdf_worker(pdf_path, {**config, 'pdf_parser': {'page_timeout': 0.3}}, writer)
+            received = []
+            while reader.poll():
+                received.append(reader.recv())
+            skipped = [payload['page_number'] for event_type, _, payload in received if event_type == 'skip']
+            parsed = [payload['page_number'] for event_type, _, payload in received if event_type == 'page']
+            assert skipped == [2, 4, 5] and parsed == [1, 3] and received[-1][0] == 'done'
+            print("✓ 超出单页预算的页面被跳过，其余页面正常回传")
+            
+            if multiprocessing.get_start_method() != 'fork':
+                print("✓ 当前平台不以fork启动工作进程，跳过文档预算检查")
+                return True
+            
+            parser = PDFParser(config)
+            documents = parser.parse_all_pdfs()
+            pages = documents[0]['pages']
+            assert [page['page_number'] for page in pages] == [1, 2, 3, 4, 5]
+            assert pages[0]['text'] == 'page one' and pages[1]['skipped'] == 'page_timeout' and pages[1]['text'] == ''
+            assert [(entry['page_number'], entry['reason']) for entry in parser.parse_report['skipped_pages']] == [
+                (2, 'page_timeout'), (4, 'page_timeout'), (5, 'page_timeout')]
+            assert parser.parse_report['documents']['GB+1-2020.pdf']['pages_parsed'] == 2
+            
+            parser = PDFParser({**config, 'pdf_parser': {'workers': 1, 'page_timeout': 0, 'document_timeout': 1}})
+            documents = parser.parse_all_pdfs()
+            pages = documents[0]['pages']
+            report = parser.parse_report['documents']['GB+1-2020.pdf']
+            assert report['status'] == 'document_timeout' and report['pages_parsed'] == 1
+            assert pages[0]['text'] == 'page one' and all(page['skipped'] == 'document_timeout' for page in pages[1:])
+            assert len(parser.parse_report['skipped_pages']) == 4
+            print("✓ 超出文档预算时保留已解析页面，剩余页面以占位信息记入解析报告")
+        finally:
+            PDFParser._parse_page = original_parse_page
+        
+        # 消费方暂停时工作进程阻塞在回传上，这段时间不计入文档预算
+        paused = PDFParser({**config, 'pdf_parser': {'workers': 1, 'page_timeout': 0, 'document_timeout': 1}})
+        events = paused.iter_parsed_pages([pdf_path], max_queue=1)
+        next(events)
+        time.sleep(2)
+        pages = [payload for event_type, _, payload in events if event_type == 'page']
+        assert len(pages) == 4 and not any(page.get('skipped') for page in pages)
+        assert paused.parse_report['documents']['GB+1-2020.pdf']['status'] == 'ok'
+        
+        # 消费方提前结束时工作进程被停止
+        events = paused.iter_parsed_pages([pdf_path], max_queue=1)
+        next(events)
+        events.close()
+        assert not multiprocessing.active_children()
+        print("✓ 消费方暂停不计入文档预算，提前结束时工作进程退出")
+        
+        # 已缓存文本的文档补充表格时同样在工作进程中执行预算，超出预算的页面记入解析报告
+        original_extract_page_tables = PDFParser._extract_page_tables
+        
+        def slow_extract_page_tables(self, page):
+            if page.page_number == 2:
+                time.sleep(5)
+            return original_extract_page_tables(self, page)
+        
+        cache_config = {**config, 'parse_cache': {'dir': str(Path(tmp_dir) / 'cache')},
+                        'pdf_parser': {'workers': 1, 'page_timeout': 0.3, 'document_timeout': 0}}
+        PDFParser(cache_config).parse_all_pdfs()
+        PDFParser._extract_page_tables = slow_extract_page_tables
+        try:
+            table_parser = PDFParser({**cache_config, 'pdf_parser': {**cache_config['pdf_parser'], 'extract_tables': True}})
+            cached = table_parser.parse_all_pdfs()
+        finally:
+            PDFParser._extract_page_tables = original_extract_page_tables
+        report = table_parser.parse_report
+        assert report['documents']['GB+1-2020.pdf']['status'] == 'cached'
+        assert report['documents']['GB+1-2020.pdf']['tables'] == 'extracted'
+        assert [(entry['page_number'], entry['reason']) for entry in report['skipped_table_pages']] == [(2, 'page_timeout')]
+        assert not report['skipped_pages'] and cached[0]['pages'][1]['text'] == 'page two'
+        # 有页面被跳过时不写入表格缓存
+        assert table_parser.table_cache.get(pdf_path) is None
+        print("✓ 补充表格抽取执行单页预算，跳过的页面记入解析报告且不写入表格缓存")
+        
+        # 已用同一后端失败过的页面不再重试
+        parser.retry_skipped_pages(documents, backend='pdfplumber')
+        assert all(page.get('skipped') for page in documents[0]['pages'][1:])
+        assert not any('retried_with' in entry for entry in parser.parse_report['skipped_pages'])
+        
+        # 模拟首次解析使用其他后端：重试同样在工作进程中执行单页预算，仍超出预算的页面保持跳过
+        import pdfplumber.page
+        original_extract_text = pdfplumber.page.Page.extract_text
+        
+        def slow_extract_text(self, *args, **kwargs):
+            if self.page_number == 5:
+                time.sleep(5)
+            return original_extract_text(self, *args, **kwargs)
+        
+        for page in documents[0]['pages'][1:]:
+            page['failed_backends'] = ['pypdf2']
+        retry_parser = PDFParser({**config, 'pdf_parser': {'workers': 1, 'page_timeout': 0.3, 'document_timeout': 0}})
+        retry_parser.parse_report = parser.parse_report
+        pdfplumber.page.Page.extract_text = slow_extract_text
+        try:
+            retry_parser.retry_skipped_pages(documents, backend='pdfplumber')
+        finally:
+            pdfplumber.page.Page.extract_text = original_extract_text
+        pages = documents[0]['pages']
+        assert [page['text'] for page in pages] == ['page one', 'page two', 'page three', 'page four', '']
+        assert all(page['recovered_by'] == 'pdfplumber' for page in pages[1:4])
+        assert pages[4]['skipped'] == 'document_timeout' and pages[4]['failed_backends'] == ['pypdf2', 'pdfplumber']
+        entries = parser.parse_report['skipped_pages']
+        assert [entry['recovered'] for entry in entries] == [True, True, True, False]
+        assert entries[-1]['retry_reason'] == 'page_timeout'
+        assert 'page four' in documents[0]['full_text']
+        print("✓ 备用后端在解析预算内重新解析跳过的页面并更新解析报告")
+    
+    return True
+
+def test_stage_profiler():
+    """测试分阶段剖析，同名阶段多次执行时结果累加"""
+    print("\n测试分阶段剖析...")
+    
+    import tempfile
+    from src.profiling import StageProfiler
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiler = StageProfiler(output_dir=tmp_dir, enabled=True, memory=True)
+        kept = []
+        try:
+            for _ in range(2):
+                with profiler.stage('extract'):
+                    kept.append([bytearray(100000) for _ in range(10)])
+            with profiler.stage('associate'):
+                kept.append(bytearray(10))
+        finally:
+            profiler.stop()
+        
+        allocated = [total for traceback, total in profiler.memory_stats['extract'].items()
+                     if traceback[-1].filename == __file__]
+        assert sum(size for size, _ in allocated) >= 2 * 10 * 100000
+        assert sum(count for _, count in allocated) >= 20
+        print("✓ 同名阶段的内存分配按位置累加")
+        
+        written = profiler.write_reports()
+        assert sorted(Path(path).name for path in written) == ['associate.prof', 'extract.prof', 'profile_summary.txt']
+        summary = Path(tmp_dir, 'profile_summary.txt').read_text(encoding='utf-8')
+        assert summary.count('阶段 extract - 内存分配热点') == 1
+        # 分配热点按调用栈分组，列出分配位置的调用链
+        assert '<- ' in summary
+        print("✓ 剖析报告写出正常")
+    
+    return True
+
+def test_benchmark_compare():
+    """测试基准测试的语料放大和回退判定"""
+    print("\n测试基准回退判定...")
+    
+    from scripts.benchmark import PipelineBenchmark
+    
+    benchmark = PipelineBenchmark({'benchmark': {'regression_tolerance': 0.2, 'min_regression_seconds': 0.05}})
+    documents = [{'file_stem': 'GB', 'file_name': 'GB.pdf', 'pages': [{'page_number': 1, 'text': '风暴潮'}]}]
+    assert benchmark.scale_corpus(documents, 1) is documents
+    scaled = benchmark.scale_corpus(documents, 3)
+    assert [doc['file_stem'] for doc in scaled] == ['GB', 'GB-副本1', 'GB-副本2']
+    assert scaled[2]['file_name'] == 'GB-副本2.pdf' and documents[0]['file_stem'] == 'GB'
+    # 页面字典各自独立，文本对象在副本间共享
+    assert scaled[1]['pages'][0] is not documents[0]['pages'][0]
+    assert scaled[1]['pages'][0]['text'] is documents[0]['pages'][0]['text']
+    print("✓ 语料放大只复制结构")
+    
+    baseline = {'results': {'x1': {
+        'extract': {'wall_time': 1.0},
+        'validate': {'wall_time': 0.01},
+        'associate': {'wall_time': 1.0}
+    }}}
+    current = {'results': {'x1': {
+        'extract': {'wall_time': 2.0},
+        'validate': {'wall_time': 0.04},
+        'associate': {'wall_time': 1.1},
+        'search': {'wall_time': 5.0}
+    }, 'x10': {'extract': {'wall_time': 9.0}}}}
+    comparison = {item['stage']: item for item in benchmark.compare(current, baseline)}
+    # 基线中没有的阶段和倍数不参与对比
+    assert sorted(comparison) == ['associate', 'extract', 'validate']
+    assert comparison['extract']['regression'] and comparison['extract']['ratio'] == 2.0
+    # 比例超过容差但绝对增量低于 min_regression_seconds，不算回退
+    assert comparison['validate']['ratio'] == 4.0 and not comparison['validate']['regression']
+    assert not comparison['associate']['regression']
+    print("✓ 耗时回退按容差和最小增量判定")
+    
+    return True
+
+def test_batch_run():
+    """测试批处理：清单/目录解析、语料只解析一次、各任务文件分别输出"""
+    print("\n测试批处理...")
+    
+    import tempfile
+    from app import OceanTerminologySystem
+    
+    docs = [
+        {'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020', 'pages': [
+            {'page_number': 1, 'text': '风暴潮是指由强烈大气扰动引起的海面异常升降现象。由于风暴潮引起海岸侵蚀加剧。'},
+            {'page_number': 2, 'text': '海岸侵蚀是指海岸在海洋动力作用下发生后退的现象。风暴潮导致海岸侵蚀。'}
+        ]}
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        tmp_path = Path(tmp_dir)
+        config = {'data_dir': str(tmp_path / 'raw'), 'output_dir': str(tmp_path / 'output'),
+                  'result_cache': {'enabled': False}, 'parse_cache': {'enabled': False},
+                  'term_extraction': {'similarity_threshold': 0.3}, 'association_analysis': {'min_confidence': 0.1}}
+        config_path = tmp_path / 'config.json'
+        config_path.write_text(json.dumps(config), encoding='utf-8')
+        
+        tasks_dir = tmp_path / 'tasks'
+        (tasks_dir / 'more').mkdir(parents=True)
+        task_files = {
+            tasks_dir / 'a.json': ['风暴潮', '海岸侵蚀'],
+            tasks_dir / 'b.json': ['海岸侵蚀', '海啸', '风暴潮'],
+            tasks_dir / 'more' / 'a.json': ['风暴潮']
+        }
+        for path, terms in task_files.items():
+            path.write_text(json.dumps(terms, ensure_ascii=False), encoding='utf-8')
+        (tmp_path / 'manifest.txt').write_text('# 批处理清单\ntasks/a.json\n\ntasks/more/a.json\n', encoding='utf-8')
+        (tmp_path / 'manifest.json').write_text(json.dumps(['tasks/b.json', str(tasks_dir / 'a.json')]), encoding='utf-8')
+        
+        system = OceanTerminologySystem(str(config_path))
+        assert system._resolve_batch_tasks(str(tasks_dir)) == [tasks_dir / 'a.json', tasks_dir / 'b.json']
+        assert system._resolve_batch_tasks(str(tmp_path / 'manifest.txt')) == [tasks_dir / 'a.json', tasks_dir / 'more' / 'a.json']
+        assert system._resolve_batch_tasks(str(tmp_path / 'manifest.json')) == [tasks_dir / 'b.json', tasks_dir / 'a.json']
+        print("✓ 任务目录和清单文件解析正常")
+        
+        parse_calls = []
+        
+        def parse_all_pdfs(pdf_dir=None):
+            parse_calls.append(pdf_dir)
+            return docs
+        
+        system.pdf_parser.parse_all_pdfs = parse_all_pdfs
+        output_dir = tmp_path / 'output'
+        summary = system.run_batch(str(tmp_path / 'manifest.txt'), str(output_dir))
+        system.run_batch(str(tmp_path / 'manifest.json'), str(tmp_path / 'output2'))
+        assert len(parse_calls) == 1
+        assert summary['task_files'] == 2 and summary['total_terms'] == 3 and summary['unique_terms'] == 2
+        assert [task['output_dir'] for task in summary['tasks']] == [str(output_dir / 'a'), str(output_dir / 'a_2')]
+        print("✓ 多个任务文件共享一次解析的语料，同名任务文件输出到不同目录")
+        
+        for task_output, terms in ((output_dir / 'a', task_files[tasks_dir / 'a.json']),
+                                   (output_dir / 'a_2', task_files[tasks_dir / 'more' / 'a.json']),
+                                   (tmp_path / 'output2' / 'b', task_files[tasks_dir / 'b.json'])):
+            expected1 = system.validator.validate_task1_output(system.term_extractor.extract_terms(terms, docs))
+            expected2 = system.validator.validate_task2_output(system.term_associator.analyze_associations(terms, docs))
+            assert json.loads((task_output / 'task1_results.json').read_text(encoding='utf-8')) == expected1
+            assert json.loads((task_output / 'task2_results.json').read_text(encoding='utf-8')) == expected2
+        assert (output_dir / 'batch_summary.json').exists() and (output_dir / 'parse_report.json').exists()
+        assert json.loads((tmp_path / 'output2' / 'b' / 'task1_results.json').read_text(encoding='utf-8'))['W01']['术语名称'] == '海岸侵蚀'
+        print("✓ 各任务文件的输出与单独运行的结果相同")
+    
+    return True
+
+def test_near_duplicate_detection():
+    """测试近重复页面和文档检测"""
+    print("\n测试近重复检测...")
+    
+    from src.dedup import CorpusDeduplicator
+    from src.utils import standardize_document_name
+    from scripts.extract_terms import TermExtractor
+    
+    definition = '3 术语和定义\n海浪是指由风引起的海面波动现象，海浪即风浪和涌浪的统称。本条款适用于海浪观测、预报和灾害评估工作。'
+    scope = ('1 范围\n本标准规定了海浪观测的技术要求、观测方法和资料处理方法，适用于沿海台站和海上平台。'
+             '海浪观测项目包括波高、周期和波向，观测资料应按规定格式整理、审核并及时报送主管部门归档保存。')
+    documents = [
+        {'file_name': 'HY_T+1.1-2010.pdf', 'file_stem': 'HY_T+1.1-2010', 'pages': [
+            {'page_number': 1, 'text': scope}, {'page_number': 2, 'text': definition}
+        ]},
+        {'file_name': 'HY_T+1.1-2020.pdf', 'file_stem': 'HY_T+1.1-2020', 'pages': [
+            {'page_number': 1, 'text': scope.replace('沿海台站', '沿海观测台站')}, {'page_number': 3, 'text': definition}
+        ]},
+        {'file_name': 'HY_T+1.2-2020.pdf', 'file_stem': 'HY_T+1.2-2020', 'pages': [
+            {'page_number': 2, 'text': definition},
+            {'page_number': 3, 'text': '4 潮汐观测\n潮汐观测采用验潮井和压力式验潮仪，观测时次为整点，数据经质量控制后入库存档。'}
+        ]}
+    ]
+    
+    report = CorpusDeduplicator().deduplicate(documents)
+    # 定义页出现在三份文档中，规范副本取最新年份中文件名靠前的文档
+    canonical = documents[1]['pages'][1]
+    assert canonical['duplicates'] == [{'document': 'HY_T+1.2-2020', 'page_number': 2},
+                                       {'document': 'HY_T+1.1-2010', 'page_number': 2}]
+    assert documents[0]['pages'][1]['duplicate_of'] == {'document': 'HY_T+1.1-2020', 'page_number': 3}
+    assert documents[0]['pages'][0]['duplicate_of'] == {'document': 'HY_T+1.1-2020', 'page_number': 1}
+    assert 'duplicate_of' not in documents[2]['pages'][1]
+    assert report['duplicate_pages'] == 3
+    assert report['document_clusters'] == [{'canonical': 'HY_T+1.1-2020', 'duplicates': ['HY_T+1.1-2010']}]
+    print("✓ 重复页面记录所有出处，规范副本选择确定")
+    
+    extractor = TermExtractor()
+    candidates, pages_scanned = extractor._rank_candidate_pages('海浪', documents)
+    assert pages_scanned == 3 and len(candidates) == 2
+    result = extractor._extract_single_term('海浪', documents)
+    assert result['文档出处'] == standardize_document_name('HY_T+1.1-2020.pdf')
+    print("✓ 抽取跳过重复页面，文档出处取规范副本")
+    
+    return True
+
+def test_sentence_dedup():
+    """测试句子去重的关联分析"""
+    print("\n测试句子去重...")
+    
+    from src.sentence_store import SentenceStore
+    from scripts.associate_terms import TermAssociator
+    
+    boilerplate = '本标准规定了观测要求。由于风暴潮引起海岸侵蚀加剧。'
+    documents = [
+        {'file_name': f'GB+{number}-2020.pdf', 'pages': [
+            {'page_number': 1, 'text': f'第{number}部分。' + boilerplate},
+            {'page_number': 2, 'text': boilerplate}
+        ]}
+        for number in (1, 2, 3)
+    ]
+    
+    store = SentenceStore(documents)
+    contexts = store.cooccurrence_contexts('风暴潮', '海岸侵蚀')
+    # 第2页的上下文在三份文档中相同，只需评分一次
+    assert [len(occurrences) for _, occurrences in contexts] == [1, 3, 1, 1]
+    assert len(store.sentences) == len({sentence for doc in documents for page in doc['pages']
+                                        for sentence in page['text'].split('。')})
+    print("✓ 唯一句子只存一次，相同上下文合并")
+    
+    associator = TermAssociator({'association_analysis': {'max_citations': 3}})
+    results = associator.analyze_associations(['风暴潮', '海岸侵蚀'], documents)
+    assert results['R01']['关联关系'] == '因果关系'
+    assert results['R01']['关联描述'][0]['文档页数'] == '第1页'
+    assert len(results['R01']['关联描述']) == 1
+    
+    # 各文档第1页的上下文不同，最佳上下文所在的页面全部展开为出处
+    for doc in documents:
+        doc['pages'][0]['text'] = boilerplate
+    associator = TermAssociator({'association_analysis': {'max_citations': 3}})
+    citations = associator.analyze_associations(['风暴潮', '海岸侵蚀'], documents)['R01']['关联描述']
+    assert [(item['文档页数']) for item in citations] == ['第1页', '第2页', '第1页']
+    print("✓ 关联描述展开为所有出处，按语料顺序截取")
+    
+    # 开启近重复检测时，被跳过的副本页面仍按语料顺序展开为出处，与不去重时一致
+    import copy
+    from src.dedup import CorpusDeduplicator
+    shared = '本标准规定了风暴潮监测的技术要求。由于风暴潮引起海岸侵蚀加剧，沿海工程需要加强防护措施和预警能力建设。'
+    corpus = [
+        {'file_name': 'HY-T+1003-2013.pdf', 'file_stem': 'HY-T+1003-2013',
+         'pages': [{'page_number': 1, 'text': '海洋观测规范总则。'}, {'page_number': 2, 'text': shared}]},
+        {'file_name': 'GB-T+1004-2014.pdf', 'file_stem': 'GB-T+1004-2014',
+         'pages': [{'page_number': 1, 'text': '海洋调查规范总则。'}, {'page_number': 2, 'text': shared}]}
+    ]
+    deduplicated = copy.deepcopy(corpus)
+    report = CorpusDeduplicator({'dedup': {'enabled': True}}).deduplicate(deduplicated)
+    assert report['duplicate_pages'] == 1 and deduplicated[0]['pages'][1]['duplicate_of']
+    config = {'association_analysis': {'max_citations': 3}}
+    plain = TermAssociator(config).analyze_associations(['风暴潮', '海岸侵蚀'], corpus)['R01']
+    deduped = TermAssociator(config).analyze_associations(['风暴潮', '海岸侵蚀'], deduplicated)['R01']
+    assert len(deduped['关联描述']) == 2 and deduped == plain
+    print("✓ 近重复页面展开为出处，结果与不去重时一致")
+    
+    return True
+
+def test_compressed_text_store():
+    """测试压缩文本存储"""
+    print("\n测试压缩文本存储...")
+    
+    import json
+    import pickle
+    from src.text_store import CompressedTextStore, CompressedDocument, CompressedPage
+    from src.search_index import SearchIndex
+    
+    texts = ['风暴潮是由强烈大气扰动引起的海面异常升降现象。' * 20, '', '海啸警报。' * 30]
+    for compression in ('zlib', 'lzma'):
+        store = CompressedTextStore(compression, cache_pages=1)
+        ids = [store.add(text) for text in texts]
+        # 逆序读取，缓存只有一页，每页单独解压
+        assert [store.get(page_id) for page_id in reversed(ids)] == texts[::-1]
+        assert store.stats()['compressed_bytes'] < store.stats()['raw_bytes']
+    print("✓ 页面按块压缩，可单独解压")
+    
+    plain = {'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020', 'page_count': 3, 'full_text': '',
+             'pages': [{'page_number': number + 1, 'text': text} for number, text in enumerate(texts)]}
+    plain['full_text'] = ''.join(f"\n\n--- 第{page['page_number']}页 ---\n{page['text']}" for page in plain['pages'])
+    document = CompressedDocument(plain, CompressedTextStore(cache_pages=1))
+    assert 'text' not in dict.keys(document['pages'][0])
+    assert document == plain and json.loads(json.dumps(document, ensure_ascii=False)) == plain
+    assert type(pickle.loads(pickle.dumps(document))) is dict and dict(document['pages'][2]) == plain['pages'][2]
+    
+    document['pages'][1]['text'] = '恢复的页面'
+    assert document['pages'][1].get('text') == '恢复的页面' and '恢复的页面' in document['full_text']
+    
+    # 其余修改方法同样经过按需读取的字段，不会在字典中留下失效的副本
+    page = document['pages'][0]
+    assert page.setdefault('text', 'x') == texts[0]
+    page.update({'text': '更新的页面', 'recovered_by': 'pdfplumber'})
+    page |= {'ocr': False}
+    assert 'text' not in dict.keys(page) and page['text'] == '更新的页面' and page['ocr'] is False
+    assert page.pop('recovered_by') == 'pdfplumber' and 'recovered_by' not in page
+    del page['ocr']
+    for mutate in (lambda: page.pop('text'), lambda: page.__delitem__('text')):
+        try:
+            mutate()
+            assert False, "按需读取的字段不应被删除"
+        except TypeError:
+            pass
+    assert page == {'page_number': 1, 'text': '更新的页面'}
+    # popitem 和 clear 只移除其余字段
+    scratch = CompressedPage({'page_number': 9, 'ocr': True, 'text': '临时页面'}, CompressedTextStore())
+    assert scratch.popitem() == ('ocr', True) and scratch.popitem() == ('page_number', 9)
+    try:
+        scratch.popitem()
+        assert False, "按需读取的字段不应被删除"
+    except TypeError:
+        pass
+    scratch.update(page_number=9, ocr=True)
+    scratch.clear()
+    assert scratch == {'text': '临时页面'}
+    print("✓ 文档和页面字典接口不变，文本按需解压")
+    
+    # 反复替换页面文本时缓冲区不会无限增长
+    store = CompressedTextStore(cache_pages=0)
+    page_ids = [store.add(text) for text in texts]
+    for round_number in range(50):
+        store.replace(page_ids[1], f'第{round_number}次恢复的页面。' * (round_number % 7 + 1) * 10)
+    assert [store.get(page_id) for page_id in (page_ids[0], page_ids[2])] == [texts[0], texts[2]]
+    assert store.get(page_ids[1]) == '第49次恢复的页面。' * 10
+    assert store.stats()['buffer_bytes'] <= 2 * store.stats()['compressed_bytes']
+    
+    # 每轮解析使用新的文本存储，上一轮的文档继续读取旧存储
+    from scripts.parse_pdfs import PDFParser
+    parser = PDFParser({'text_store': {'enabled': True}})
+    previous = parser._compress_document(plain)
+    parser.reset_parse_report()
+    assert len(parser.text_store) == 0 and previous['pages'][0]['text'] == texts[0]
+    print("✓ 替换页面后压实缓冲区，每轮解析换用新的存储")
+    
+    hits = SearchIndex.from_documents([document]).search('"海啸"')['results']
+    assert [hit['page_number'] for hit in hits] == [3] and hits[0]['snippet'].startswith('海啸警报')
+    print("✓ 全文检索透明读取压缩文本")
+    
+    return True
+
+def test_shard_merge():
+    """测试分片运行的候选合并"""
+    print("\n测试分片合并...")
+    
+    import json
+    from scripts.shard_run import assign_shards
+    from scripts.stream_pipeline import StreamingPipeline
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    
+    assert assign_shards([5, 1, 4, 2, 3], 2) == [[0, 1, 3], [2, 4]]
+    assert assign_shards([1], 4) == [[0]]
+    print("✓ 文件按大小均衡分配到分片")
+    
+    pages = [
+        '风暴潮是指由强烈大气扰动引起的海面异常升降现象。由于风暴潮引起海岸侵蚀加剧。',
+        '风暴潮是由大风引起的。风暴潮导致海岸侵蚀。',
+        '风暴潮是指由强烈大气扰动引起的海面异常升降现象。由于风暴潮引起海岸侵蚀加剧。'
+    ]
+    records = [{'order': (index, 1), 'document_name': f'GB-{index}', 'page_label': '第1页', 'text': text}
+               for index, text in enumerate(pages)]
+    config = {'term_extraction': {'similarity_threshold': 0.3}, 'association_analysis': {'min_confidence': 0.1}}
+    
+    def new_pipeline():
+        pipeline = StreamingPipeline(config, None, TermExtractor(config), TermAssociator(config))
+        pipeline.reset_candidates(['风暴潮'], [('海岸侵蚀', '风暴潮')])
+        return pipeline
+    
+    def feed(pipeline, shard_records):
+        for record in shard_records:
+            pipeline._define((record, ['风暴潮']))
+            pipeline._cooccur((record, [('海岸侵蚀', '风暴潮')]))
+        pipeline.rank_candidates({record['order'][0]: {'file_name': f"GB-{record['order'][0]}.pdf",
+                                                       'pages': [{'page_number': 1, 'text': record['text']}]}
+                                  for record in shard_records})
+    
+    single = new_pipeline()
+    feed(single, records)
+    
+    merged = new_pipeline()
+    # 后到的分片持有语料顺序靠前的页面，合并结果仍与单进程相同
+    for shard_records in ([records[2], records[1]], [records[0]]):
+        shard = new_pipeline()
+        feed(shard, shard_records)
+        merged.merge_candidates(json.loads(json.dumps(shard.export_candidates(), ensure_ascii=False)))
+    
+    assert merged.finalize() == single.finalize()
+    terms, pairs = merged.finalize()
+    assert terms['风暴潮']['文档出处'] == 'GB-0'
+    assert pairs[('海岸侵蚀', '风暴潮')] is not None
+    print("✓ 分片候选合并与单进程结果一致")
+    
+    return True
+
+def test_shard_run():
+    """测试分片计划、子进程分片运行和合并"""
+    print("\n测试分片运行...")
+    
+    import shutil
+    import tempfile
+    from scripts.parse_pdfs import PDFParser
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    from scripts.shard_run import ShardCoordinator
+    from scripts.stream_pipeline import StreamingPipeline
+    
+    terms = ['storm surge', 'tsunami', 'sea ice']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        root = Path(tmp_dir) / 'site'
+        (root / 'pdfs').mkdir(parents=True)
+        _write_test_pdf(root / 'pdfs' / 'GB+1-2020.pdf', ['storm surge and tsunami', 'sea ice'])
+        _write_test_pdf(root / 'pdfs' / 'GB+2-2021.pdf', ['tsunami warning'])
+        _write_test_pdf(root / 'pdfs' / 'GB+3-2022.pdf', ['storm surge causes sea ice', 'tsunami'])
+        
+        def new_config(site):
+            return {'data_dir': str(site / 'pdfs'), 'parse_cache': {'enabled': False},
+                    'result_cache': {'enabled': False}, 'pdf_parser': {'workers': 1}}
+        
+        config = new_config(root)
+        coordinator = ShardCoordinator(config, PDFParser(config), TermExtractor(config), TermAssociator(config))
+        coordinator.plan(terms, terms, shards=2, work_dir=str(root / 'work'))
+        
+        # 交换目录和语料整体移动（如挂载到其他机器）后，清单中的相对路径仍然有效
+        moved = Path(tmp_dir) / 'moved'
+        shutil.move(str(root), str(moved))
+        plan_path = str(moved / 'work' / 'plan.json')
+        assert coordinator.run_workers(plan_path) == []
+        merged_terms, merged_pairs = coordinator.merge(plan_path)
+        
+        config = new_config(moved)
+        streamed = StreamingPipeline(config, PDFParser(config), TermExtractor(config), TermAssociator(config)).run(terms, terms)
+        assert merged_terms == streamed['terms'] and merged_pairs == streamed['pairs']
+        shards = coordinator.pdf_parser.parse_report['shards']
+        assert sorted(shard['documents'] for shard in shards) == [1, 2]
+        assert len(coordinator.pdf_parser.parse_report['documents']) == 3
+    print("✓ 子进程分片运行后合并结果与单进程流式运行一致")
+    
+    return True
+
+def test_semantic_space():
+    """测试LSA语义空间"""
+    print("\n测试语义空间...")
+    
+    import tempfile
+    import numpy as np
+    from src.nlp_models import SemanticSpace
+    from scripts.associate_terms import TermAssociator
+    
+    texts = [
+        '风暴潮引起海水漫溢，沿岸增水。风暴潮预警发布后，潮位站加密观测。',
+        '海岸侵蚀使岸线后退。增水和海水漫溢加剧海岸侵蚀。',
+        '海冰冰情观测包括冰厚和冰型。海冰灾害影响航运。',
+        '冰厚测量采用钻孔法，冰型按海冰形态划分。'
+    ]
+    terms = ['风暴潮', '海岸侵蚀', '海冰', '冰厚', '海啸']
+    space = SemanticSpace.build(texts, terms, n_components=3)
+    assert space.vectors.dtype == np.float16 and space.metadata['terms_covered'] == 4
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        space.save(temp_dir)
+        loaded = SemanticSpace.load(temp_dir)
+        assert isinstance(loaded.vectors, np.memmap)
+        scores = loaded.score_pairs([('海冰', '冰厚'), ('风暴潮', '海岸侵蚀'), ('风暴潮', '冰厚'), ('风暴潮', '海啸')])
+        del loaded
+    # 风暴潮与海岸侵蚀不在同一句中出现，但语义相近
+    assert scores[('海冰', '冰厚')] > scores[('风暴潮', '海岸侵蚀')] > scores[('风暴潮', '冰厚')]
+    assert scores[('风暴潮', '海啸')] is None
+    print("✓ 术语向量float16存储、内存映射加载，批量计算相似度")
+    
+    associator = TermAssociator({'semantic_space': {'min_score': 0.1}})
+    associator.semantic_space = space
+    keys = [('冰厚', '海冰'), ('冰厚', '风暴潮'), ('海岸侵蚀', '风暴潮')]
+    ranked, pruned = associator.rank_pairs(keys)
+    assert ranked == [('冰厚', '海冰'), ('海岸侵蚀', '风暴潮')] and pruned == [('冰厚', '风暴潮')]
+    resolved = associator.resolve_pairs([('风暴潮', '冰厚')], [{'file_name': 'a.pdf', 'pages': []}])
+    assert resolved == {('冰厚', '风暴潮'): None}
+    
+    # 不在语义空间中的术语无法评分，排在最后且不被剪枝，仍做上下文分析
+    ranked, pruned = associator.rank_pairs(keys + [('海啸', '风暴潮')])
+    assert ranked == [('冰厚', '海冰'), ('海岸侵蚀', '风暴潮'), ('海啸', '风暴潮')] and pruned == [('冰厚', '风暴潮')]
+    documents = [{'file_name': 'GB+1-2020.pdf', 'pages': [
+        {'page_number': 1, 'text': '海啸是风暴潮以外的另一类海洋灾害，海啸引起风暴潮增水。'}
+    ]}]
+    config = {'semantic_space': {'min_score': 0.1}, 'association_analysis': {'min_confidence': 0.1}}
+    associator, plain = TermAssociator(config), TermAssociator(config)
+    associator.semantic_space = space
+    resolved = associator.resolve_pairs([('风暴潮', '海啸')], documents)
+    assert resolved[('海啸', '风暴潮')] is not None and resolved == plain.resolve_pairs([('风暴潮', '海啸')], documents)
+    print("✓ 术语对按语义相似度预排序，低相似度术语对被剪枝，未收录术语的术语对不剪枝")
+    
+    return True
+
+def test_vector_store():
+    """测试量化向量存储"""
+    print("\n测试向量存储...")
+    
+    import tempfile
+    import numpy as np
+    from src.vector_store import VectorStore, quantize
+    
+    rng = np.random.RandomState(0)
+    vectors = rng.randn(500, 32).astype(np.float32) * np.linspace(0.1, 2.0, 32, dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    
+    codes, scales = quantize(vectors, 'int8')
+    assert codes.dtype == np.int8 and scales.shape == (32,)
+    # 逐维缩放：每维的量化误差不超过该维缩放系数的一半
+    assert np.all(np.abs(codes * scales - vectors) <= scales / 2 + 1e-6)
+    print("✓ int8逐维缩放量化")
+    
+    query = vectors[7] + 0.05 * rng.randn(32).astype(np.float32)
+    exact = [row for row, _ in VectorStore(vectors).search(query, 10)]
+    with tempfile.TemporaryDirectory() as temp_dir:
+        VectorStore.from_vectors(vectors, 'int8', keep_full=True).save(temp_dir)
+        store = VectorStore.open(temp_dir)
+        assert isinstance(store.codes, np.memmap) and isinstance(store.full, np.memmap)
+        assert store.memory_stats()['codes_bytes'] == vectors.nbytes // 4
+        reranked = store.search(query, 10, rerank=50)
+        assert [row for row, _ in reranked] == exact
+        assert abs(reranked[0][1] - float(vectors[exact[0]] @ query)) < 1e-5
+        del store
+    print("✓ 内存映射加载，全精度重新排序后与精确检索一致")
+    
+    return True
+
+def test_async_server():
+    """测试异步术语查询服务"""
+    print("\n测试术语查询服务...")
+    
+    import json
+    import asyncio
+    import threading
+    from concurrent.futures import ThreadPoolExecutor
+    import scripts.serve as serve_module
+    from scripts.serve import TerminologyServer, _init_worker
+    from scripts.parse_pdfs import PDFParser
+    
+    docs = [
+        {'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020', 'pages': [
+            {'page_number': 1, 'text': '风暴潮是指由强烈大气扰动引起的海面异常升降现象。由于风暴潮引起海岸侵蚀加剧。'},
+            {'page_number': 2, 'text': '海啸预警要求。风暴潮导致海岸侵蚀。'}
+        ]}
+    ]
+    config = {'result_cache': {'enabled': False}, 'term_extraction': {'similarity_threshold': 0.3},
+              'association_analysis': {'min_confidence': 0.1}}
+    # 线程池代替进程池，工作线程共享同一份语料
+    executor = ThreadPoolExecutor(max_workers=2, initializer=_init_worker, initargs=(config, docs))
+    pair_executor = ThreadPoolExecutor(max_workers=1, initializer=_init_worker, initargs=(config, docs))
+    server = TerminologyServer(config, pdf_documents=docs, executor=executor, pair_executor=pair_executor)
+    server.start()
+    
+    async def scenario():
+        responses = await asyncio.gather(*[server.handle({'id': i, 'op': 'term', 'term': '风暴潮'}) for i in range(3)])
+        assert [response['id'] for response in responses] == [0, 1, 2]
+        assert all(response['ok'] and response['result'] == responses[0]['result'] for response in responses)
+        assert responses[0]['result']['文档出处'] == 'GB+1-2020'
+        assert server.stats['offloaded'] == 1 and server.stats['coalesced'] == 2
+        print("✓ 相同术语的并发请求只计算一次")
+        
+        again = await server.handle({'id': 3, 'op': 'term', 'term': '风暴潮', 'deadline': 0})
+        assert again['ok'] and server.stats['inline'] == 1 and server.stats['offloaded'] == 1
+        
+        late, search = await asyncio.gather(
+            server.handle({'id': 4, 'op': 'pair', 'terms': ['风暴潮', '海岸侵蚀'], 'deadline': 0}),
+            server.handle({'id': 5, 'op': 'search', 'query': '海啸'}))
+        assert late == {'id': 4, 'ok': False, 'error': 'deadline_exceeded'}
+        assert search['ok'] and search['result']['total'] == 1
+        # 超时的计算继续进行，结果供后续请求使用
+        pair = await server.handle({'id': 6, 'op': 'pair', 'terms': ['海岸侵蚀', '风暴潮']})
+        assert pair['ok'] and pair['result'] is not None and server.stats['offloaded'] == 2
+        print("✓ 超过截止时间的请求不阻塞其他查询，计算结果保留")
+        
+        # 进行中的计算数达到上限时拒绝新的计算，合并到已有计算的请求和廉价查询照常处理
+        server.max_pending = 1
+        first, coalesced, rejected, cheap = await asyncio.gather(
+            server.handle({'id': 10, 'op': 'term', 'term': '海岸侵蚀'}),
+            server.handle({'id': 11, 'op': 'term', 'term': '海岸侵蚀'}),
+            server.handle({'id': 12, 'op': 'term', 'term': '海啸'}),
+            server.handle({'id': 13, 'op': 'term', 'term': '风暴潮'}))
+        assert first['ok'] and coalesced['ok'] and cheap['ok']
+        assert rejected == {'id': 12, 'ok': False, 'error': 'overloaded'} and server.stats['overloaded'] == 1
+        retried = await server.handle({'id': 14, 'op': 'term', 'term': '海啸'})
+        assert retried['ok']
+        server.max_pending = 64
+        print("✓ 计算排队达到上限时返回overloaded")
+        
+        # 术语对在单独的执行器中计算并单独计数，慢的术语对既不占用工作线程也不占用术语查询的名额
+        original_worker_pair = serve_module._worker_pair
+        release = threading.Event()
+        
+        def slow_worker_pair(term1, term2):
+            release.wait(10)
+            return original_worker_pair(term1, term2)
+        
+        serve_module._worker_pair = slow_worker_pair
+        server.max_pending = 2
+        try:
+            slow = await asyncio.gather(*[server.handle({'id': 20 + i, 'op': 'pair', 'terms': terms, 'deadline': 0})
+                                          for i, terms in enumerate([['风暴潮', '海啸'], ['海啸', '海岸侵蚀']])])
+            assert all(response['error'] == 'deadline_exceeded' for response in slow)
+            term = await server.handle({'id': 22, 'op': 'term', 'term': '海面', 'deadline': 5})
+            assert term['ok'] and len(server._inflight) == 2
+        finally:
+            release.set()
+            serve_module._worker_pair = original_worker_pair
+            server.max_pending = 64
+        print("✓ 慢的术语对不阻塞术语查询")
+        
+        listener = await asyncio.start_server(server._handle_connection, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+        writer.write(b'{"id": "a", "op": "stats"}\nnot json\n{"id": "b", "op": "drop"}\n')
+        writer.write_eof()
+        replies = {}
+        for _ in range(3):
+            reply = json.loads(await reader.readline())
+            replies[reply['id']] = reply
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        assert replies['a']['result']['requests'] >= 7
+        assert replies[None]['error'] == 'invalid_json' and replies['b']['error'] == 'unknown_op: drop'
+        print("✓ JSON行协议往返")
+    
+    try:
+        asyncio.run(scenario())
+    finally:
+        server.close()
+        executor.shutdown()
+        pair_executor.shutdown()
+    
+    # 默认的进程池使用服务启动时解析的语料，工作进程不再重新解析
+    original_parse_all_pdfs = PDFParser.parse_all_pdfs
+    
+    def forbidden_parse(self, pdf_dir=None):
+        raise AssertionError("工作进程不应重新解析语料")
+    
+    PDFParser.parse_all_pdfs = forbidden_parse
+    pooled = TerminologyServer(dict(config, server={'workers': 1, 'pair_workers': 1}), pdf_documents=docs)
+    try:
+        pooled.start()
+        term = asyncio.run(pooled.lookup_term('风暴潮', 30))
+        pair = asyncio.run(pooled.lookup_pair('风暴潮', '海岸侵蚀', 30))
+        assert term['文档出处'] == 'GB+1-2020' and pair is not None
+    finally:
+        PDFParser.parse_all_pdfs = original_parse_all_pdfs
+        pooled.close()
+    print("✓ 工作进程直接使用启动时解析的语料")
+    
+    return True
+
+def test_output_validator():
+    """测试单遍输出验证"""
+    print("\n测试输出验证...")
+    
+    from scripts.validate_output import OutputValidator
+    
+    task1 = {
+        'W01': {'术语名称': '风暴潮', '术语定义': '由强烈大气扰动引起的海面异常升降现象', '文档出处': 'GB+1-2020', '文档页数': '第3页'},
+        'W02': {'术语名称': '海啸', '术语定义': '', '文档出处': '', '文档页数': ''},
+        'W03': {'术语名称': '海冰', '术语定义': '海水冻结而成的冰及进入海洋的淡水冰', '文档出处': 'GB.pdf', '文档页数': '第3页'},
+        'W04': {'术语名称': '海浪', '术语定义': '由风引起的海面波动现象的统称之一', '文档出处': 'HY_T+1-2020', '文档页数': '第12-13页'},
+        'X05': {}
+    }
+    description = [{'文档出处': 'GB+1-2020', '文档页数': '第1页'}]
+    task2 = {
+        'R01': {'术语关联': ['风暴潮', '海岸侵蚀'], '关联关系': '因果关系', '关联描述': description},
+        'R02': {'术语关联': ['风暴潮', '增水'], '关联关系': '主从关系', '关联描述': []},
+        'R03': {'术语关联': ['风暴潮'], '关联关系': '因果关系', '关联描述': description},
+        'R04': {'术语关联': ['风暴潮', '海啸'], '关联关系': '因果关系', '关联描述': [{'文档出处': '', '文档页数': '第1页'}]}
+    }
+    validator = OutputValidator()
+    
+    validated1, validated2, report = validator.validate_outputs(task1, task2)
+    assert list(validated1) == ['W01', 'W04'] and list(validated2) == ['R01', 'R02']
+    assert validated1 == validator.validate_task1_output(task1) and validated2 == validator.validate_task2_output(task2)
+    assert report == validator.generate_validation_report(validated1, validated2)
+    assert report['task2_validation']['incomplete_associations'] == ['R02']
+    assert report['overall_assessment']['overall_score'] == 0.75
+    print("✓ 一遍完成验证和报告统计，与分步结果一致")
+    
+    session = validator.session('task2')
+    for key, value in task2.items():
+        assert bool(session.add(key, value)) == (key in ('R03', 'R04'))
+    assert session.analysis() == report['task2_validation'] and len(session.errors) == 2
+    print("✓ 增量验证流式记录")
+    
+    return True
+
+def test_ndjson_output():
+    """测试NDJSON流式输出"""
+    print("\n测试流式输出...")
+    
+    import json
+    import tempfile
+    from pathlib import Path
+    from scripts.stream_output import NDJSONResultWriter, iter_task1_records, iter_task2_records, read_ndjson, assemble_json
+    from scripts.extract_terms import TermExtractor
+    from scripts.associate_terms import TermAssociator
+    from scripts.validate_output import OutputValidator
+    
+    docs = [
+        {'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020', 'pages': [
+            {'page_number': 1, 'text': '风暴潮是指由强烈大气扰动引起的海面异常升降现象。由于风暴潮引起海岸侵蚀加剧。'},
+            {'page_number': 2, 'text': '海岸侵蚀是指海岸在海洋动力作用下发生后退的现象。风暴潮导致海岸侵蚀。'}
+        ]}
+    ]
+    config = {'term_extraction': {'similarity_threshold': 0.3}, 'association_analysis': {'min_confidence': 0.1}}
+    terms = ['风暴潮', '海啸', '海岸侵蚀', '风暴潮']
+    extractor, associator, validator = TermExtractor(config), TermAssociator(config), OutputValidator(config)
+    
+    expected1 = validator.validate_task1_output(extractor.extract_terms(terms, docs))
+    expected2 = validator.validate_task2_output(associator.analyze_associations(terms, docs))
+    assert list(expected1) == ['W01', 'W03', 'W04'] and list(expected2) == ['R01', 'R02']
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for task, records, expected in (('task1', iter_task1_records(extractor, terms, docs, chunk_size=1), expected1),
+                                        ('task2', iter_task2_records(associator, terms, docs, chunk_size=2), expected2)):
+            ndjson_path = Path(temp_dir) / f"{task}.ndjson"
+            with NDJSONResultWriter(ndjson_path, task, validator) as writer:
+                key, value = next(records)
+                writer.write(key, value)
+                # 第一条记录写出后即可读取
+                assert list(read_ndjson(ndjson_path)) == [(key, value)]
+                writer.write_all(records)
+            assert writer.written == len(expected)
+            assert writer.rejected == (1 if task == 'task1' else 0)
+            assert writer.summary()['validation'] == validator.generate_validation_report(expected, expected2)[f"{task}_validation"]
+            
+            json_path = Path(temp_dir) / f"{task}.json"
+            assert assemble_json(str(ndjson_path), str(json_path)) == len(expected)
+            assert json_path.read_text(encoding='utf-8') == json.dumps(expected, ensure_ascii=False, indent=2)
+    print("✓ 逐条验证写出，组装结果与整体验证后的JSON完全相同")
+    
+    # 已输出且之后不再出现的术语结果随即释放，重复术语仍只提取一次
+    requested = []
+    resolve_terms = extractor.resolve_terms
+    def tracking_resolve(batch_terms, documents):
+        requested.extend(batch_terms)
+        return resolve_terms(batch_terms, documents)
+    extractor.resolve_terms = tracking_resolve
+    try:
+        records = dict(iter_task1_records(extractor, terms, docs, chunk_size=1))
+    finally:
+        del extractor.resolve_terms
+    assert requested == ['风暴潮', '海啸', '海岸侵蚀'] and records['W04'] == records['W01']
+    print("✓ 术语结果只保留到最后一次出现")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        empty_path = Path(temp_dir) / 'empty.ndjson'
+        with NDJSONResultWriter(empty_path, 'task2'):
+            pass
+        assert assemble_json(str(empty_path), str(Path(temp_dir) / 'empty.json')) == 0
+        assert (Path(temp_dir) / 'empty.json').read_text(encoding='utf-8') == json.dumps({}, indent=2)
+    print("✓ 空结果组装")
+    
+    return True
+
+def test_table_detection():
+    """测试表格页面检测和表格缓存"""
+    print("\n测试表格检测...")
+    
+    import tempfile
+    from src.table_detector import TableDetector, _segment_bound
+    from src.parse_cache import ParseCache, TableCache
+    
+    detector = TableDetector.from_config({})
+    grid = [(0, y, 100, y) for y in (0, 20, 40)] + [(x, 0, x, 40) for x in (0, 50, 100)]
+    border = [(0, 0, 100, 0), (0, 40, 100, 40), (0, 0, 0, 40), (100, 0, 100, 40)]
+    assert detector.rules(grid) == {'horizontal': 3, 'vertical': 3}
+    # 相距不超过合并容差的线视为同一条，过短的线不计
+    assert detector.rules(grid + [(0, 21, 100, 21), (10, 10, 11, 10)]) == {'horizontal': 3, 'vertical': 3}
+    assert detector.rules(border) == {'horizontal': 2, 'vertical': 2}
+    assert TableDetector.from_config({'table_detection': {'enabled': False}}) is None
+    print("✓ 横竖线统计正常，单个边框不算表格")
+    
+    assert _segment_bound(b'0 0 100 40 re S 0 0 m 100 0 l S', None) == 5
+    # 只用于裁剪的路径和字符串中的运算符不计
+    assert _segment_bound(b'0 0 100 40 re W n BT (0 0 m 1 1 l S) Tj ET', None) == 0
+    assert _segment_bound(b'0 0 m 1 1 l h f*', None) == 2
+    print("✓ 内容流线段数上限估计正常")
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        pdf_path = str(Path(tmp_dir) / 'GB+1-2020.pdf')
+        Path(pdf_path).write_bytes(b'%PDF-1.4 placeholder')
+        config = {'parse_cache': {'dir': tmp_dir}, 'pdf_parser': {'extract_tables': True}}
+        
+        assert TableCache.from_config({'parse_cache': {'dir': tmp_dir}}, detector.settings()) is None
+        table_cache = TableCache.from_config(config, detector.settings())
+        tables = {2: [[['项目', '数值'], ['潮位', '3.5']]]}
+        assert table_cache.get(pdf_path) is None
+        assert table_cache.put(pdf_path, tables) and table_cache.get(pdf_path) == tables
+        # 检测参数变化时表格缓存失效
+        assert TableCache.from_config(config, None).get(pdf_path) is None
+        
+        text_cache = ParseCache.from_config(config)
+        document = {'file_path': pdf_path, 'file_name': 'GB+1-2020.pdf', 'file_stem': 'GB+1-2020',
+                    'page_count': 2, 'metadata': {}, 'full_text': '',
+                    'pages': [{'page_number': 1, 'text': '', 'tables': []},
+                              {'page_number': 2, 'text': '', 'tables': tables[2]}]}
+        assert text_cache.put(pdf_path, document)
+        assert all(not page.get('tables') for page in text_cache.get(pdf_path)['pages'])
+        assert ParseCache.from_config({'parse_cache': {'dir': tmp_dir}}).get(pdf_path) is not None
+        print("✓ 表格与文本分开缓存，开关表格抽取不影响文本缓存")
+    
+    return True
+
 def test_config():
     """测试配置加载"""
     print("\n测试配置加载...")
@@ -163,6 +1582,32 @@ def main():
         test_imports,
         test_utils,
         test_rules,
+        test_definition_matcher,
+        test_ocean_term_filter,
+        test_metrics,
+        test_result_cache,
+        test_ranked_definition_search,
+        test_streaming_pipeline,
+        test_term_dictionary,
+        test_association_graph,
+        test_community_detection,
+        test_search_index,
+        test_lazy_startup,
+        test_parse_budgets,
+        test_stage_profiler,
+        test_benchmark_compare,
+        test_batch_run,
+        test_near_duplicate_detection,
+        test_sentence_dedup,
+        test_compressed_text_store,
+        test_shard_merge,
+        test_shard_run,
+        test_semantic_space,
+        test_vector_store,
+        test_async_server,
+        test_output_validator,
+        test_ndjson_output,
+        test_table_detection,
         test_config,
         test_task_file,
         test_data_directory